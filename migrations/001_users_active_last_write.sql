@@ -0,0 +1,2 @@
+-- when a user last made a change, their reads go to the primary for a short while afterwards (read-your-writes)
+ALTER TABLE users_active ADD COLUMN IF NOT EXISTS last_write TIMESTAMP;
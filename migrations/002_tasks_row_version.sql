@@ -0,0 +1,16 @@
+-- a version for each task that changes whenever the task does, used to cache the task document
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS row_version INTEGER NOT NULL DEFAULT 1;
+
+-- bumped by a trigger so that updates made outside of the api (e.g. the escalator) change the version too
+CREATE OR REPLACE FUNCTION tasks_bump_row_version() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.row_version := OLD.row_version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_row_version ON tasks;
+CREATE TRIGGER tasks_row_version
+    BEFORE UPDATE ON tasks
+    FOR EACH ROW
+    EXECUTE PROCEDURE tasks_bump_row_version();
@@ -0,0 +1,41 @@
+-- replace tasks.label_1, label_2 and label_3 with an array of label ids that can be filtered with a GIN index.
+-- the old columns are dropped by 008 once the api that only reads the array has been deployed.
+BEGIN;
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS labels INTEGER[] NOT NULL DEFAULT '{}';
+
+UPDATE tasks
+SET labels = array_remove(ARRAY[label_1, label_2, label_3], NULL)
+WHERE label_1 IS NOT NULL
+OR    label_2 IS NOT NULL
+OR    label_3 IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS tasks_labels_idx ON tasks USING GIN (labels);
+
+-- until 008 both apis are running, so whichever representation a write changes is copied to the other one.
+-- the api allows at most 3 labels so they always fit in the old columns.
+CREATE OR REPLACE FUNCTION tasks_sync_labels() RETURNS TRIGGER AS $$
+BEGIN
+    -- the old api only writes the columns, the new one only writes the array
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.labels = '{}' THEN
+            NEW.labels := array_remove(ARRAY[NEW.label_1, NEW.label_2, NEW.label_3], NULL);
+        END IF;
+    ELSIF NEW.labels IS NOT DISTINCT FROM OLD.labels
+    AND (NEW.label_1, NEW.label_2, NEW.label_3) IS DISTINCT FROM (OLD.label_1, OLD.label_2, OLD.label_3) THEN
+        NEW.labels := array_remove(ARRAY[NEW.label_1, NEW.label_2, NEW.label_3], NULL);
+    END IF;
+    NEW.label_1 := NEW.labels[1];
+    NEW.label_2 := NEW.labels[2];
+    NEW.label_3 := NEW.labels[3];
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_labels_sync ON tasks;
+CREATE TRIGGER tasks_labels_sync
+    BEFORE INSERT OR UPDATE ON tasks
+    FOR EACH ROW
+    EXECUTE PROCEDURE tasks_sync_labels();
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- a full text search document for each task, weighted so that matches in the title rank above the description and
+-- the custom fields, with a GIN index for GET /tasks/search. concat_ws isn't immutable so it can't be used here.
+BEGIN;
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(custom_1, '') || ' ' || coalesce(custom_2, '') || ' ' || coalesce(custom_3, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS tasks_search_idx ON tasks USING GIN (search);
+
+COMMIT;
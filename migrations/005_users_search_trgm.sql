@@ -0,0 +1,8 @@
+-- a trigram index over the user's name, email and job title for GET /users/search, the expression has to be the same
+-- as the one in the search's WHERE for the index to be used
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS users_search_trgm_idx ON users USING GIN (
+    lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(job_title, ''))
+    gin_trgm_ops
+);
@@ -0,0 +1,2 @@
+-- a version for each org's labels, templates and escalations, bumped by the api whenever they change and used to cache them
+ALTER TABLE organisations ADD COLUMN IF NOT EXISTS reference_version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,11 @@
+-- reordering the board updates the display_order of every task in the org, which mustn't change their versions and
+-- invalidate every cached task and ETag, so the display order is read along with the version instead.
+-- search is generated from the other columns so it's left out of the comparison too.
+CREATE OR REPLACE FUNCTION tasks_bump_row_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF to_jsonb(NEW) - 'display_order' - 'search' IS DISTINCT FROM to_jsonb(OLD) - 'display_order' - 'search' THEN
+        NEW.row_version := OLD.row_version + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,10 @@
+-- run after the api that reads and writes tasks.labels has been deployed everywhere, as the previous version still
+-- uses label_1, label_2 and label_3. they're kept in sync with the labels array by 003 until then.
+BEGIN;
+
+DROP TRIGGER IF EXISTS tasks_labels_sync ON tasks;
+DROP FUNCTION IF EXISTS tasks_sync_labels();
+
+ALTER TABLE tasks DROP COLUMN label_1, DROP COLUMN label_2, DROP COLUMN label_3;
+
+COMMIT;
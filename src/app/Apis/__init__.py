@@ -9,14 +9,17 @@ from app.Controllers.Public.HealthController import api as health_v1
 from app.Controllers.Public.VersionController import api as version_v1
 from app.Controllers.Public.ManagePasswordController import api as password_v1
 from app.Controllers.Authenticated.ActiveUsers import api as active_users_v1
+from app.Controllers.Authenticated.Dashboard import api as dashboard_v1
 from app.Controllers.Authenticated.Roles import api as roles_v1
 from app.Controllers.Authenticated.Organisation import api as organisation_v1
 from app.Controllers.Authenticated.Task.AssignTaskController import api as assign_task_v1
+from app.Controllers.Authenticated.Task.BulkTasksController import api as bulk_tasks_v1
 from app.Controllers.Authenticated.Task.CancelTaskController import api as cancel_task_v1
 from app.Controllers.Authenticated.Task.DelayTaskController import api as delay_task_v1
 from app.Controllers.Authenticated.Task.DropTaskController import api as drop_task_v1
 from app.Controllers.Authenticated.Task.RepositionTaskController import api as repo_task_v1
 from app.Controllers.Authenticated.Task.TaskActivityController import api as task_activity_v1
+from app.Controllers.Authenticated.Task.TasksByIdController import api as tasks_by_id_v1
 from app.Controllers.Authenticated.Task.TaskController import api as task_v1
 from app.Controllers.Authenticated.Task.TaskLabelsController import api as task_labels_v1
 from app.Controllers.Authenticated.Task.TaskPrioritiesController import api as task_priorities_v1
@@ -26,6 +29,7 @@ from app.Controllers.Authenticated.Task.TasksController import api as tasks_v1
 from app.Controllers.Authenticated.Task.TransitionTaskController import api as transition_task_v1
 from app.Controllers.Authenticated.User.UserActivityController import api as user_activity_v1
 from app.Controllers.Authenticated.User.UserController import api as user_v1
+from app.Controllers.Authenticated.User.UserImportController import api as user_import_v1
 from app.Controllers.Authenticated.User.UserPagesController import api as user_pages_v1
 from app.Controllers.Authenticated.User.UserAvatarController import api as user_avatar_v1
 from app.Controllers.Authenticated.User.UsersController import api as users_v1
@@ -33,6 +37,8 @@ from app.Controllers.Authenticated.User.UserSettingsController import api as use
 from app.Controllers.Authenticated.User.UserWelcomeController import api as user_welcome_v1
 from app.Controllers.Authenticated.User.DisableUserController import api as disable_user_v1
 from app.Controllers.Authenticated.ValidateToken import api as validate_token_v1
+from app.Extensions.Encoders import output_json
+from app.Extensions.Validators import compile_validators
 
 
 # swagger monkey patch
@@ -46,14 +52,17 @@ if getenv("APP_ENV", "Local") in ["Staging", "Production"]:
     Api.specs_url = specs_url
 
 api = Api(title="Delegator API", version="1.0", description="The API to get Delegating")
+api.representations["application/json"] = output_json
 
 api.add_namespace(account_v1)
 api.add_namespace(active_users_v1)
 api.add_namespace(contact_v1)
+api.add_namespace(dashboard_v1)
 api.add_namespace(organisation_v1)
 api.add_namespace(password_v1)
 api.add_namespace(roles_v1)
 api.add_namespace(assign_task_v1)
+api.add_namespace(bulk_tasks_v1)
 api.add_namespace(cancel_task_v1)
 api.add_namespace(delay_task_v1)
 api.add_namespace(drop_task_v1)
@@ -65,9 +74,11 @@ api.add_namespace(task_priorities_v1)
 api.add_namespace(task_templates_v1)
 api.add_namespace(template_escalations_v1)
 api.add_namespace(tasks_v1)
+api.add_namespace(tasks_by_id_v1)
 api.add_namespace(transition_task_v1)
 api.add_namespace(user_activity_v1)
 api.add_namespace(user_v1)
+api.add_namespace(user_import_v1)
 api.add_namespace(user_pages_v1)
 api.add_namespace(user_avatar_v1)
 api.add_namespace(users_v1)
@@ -77,3 +88,5 @@ api.add_namespace(disable_user_v1)
 api.add_namespace(validate_token_v1)
 api.add_namespace(health_v1)
 api.add_namespace(version_v1)
+
+compile_validators(api)
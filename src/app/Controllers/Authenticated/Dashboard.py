@@ -0,0 +1,130 @@
+import datetime
+
+import structlog
+from flask import current_app
+from flask_restx import Namespace, fields
+from sqlalchemy import and_
+
+from app.Controllers.Authenticated.ActiveUsers import active_user_dto
+from app.Controllers.Authenticated.Organisation import OrganisationSettings
+from app.Controllers.Authenticated.Task.TaskLabelsController import TaskLabels
+from app.Controllers.Authenticated.Task.TaskPrioritiesController import TaskPriorities
+from app.Controllers.Authenticated.Task.TasksController import Tasks
+from app.Controllers.Authenticated.Task.TransitionTaskController import TransitionTask
+from app.Controllers.Authenticated.User.UsersController import MinimalUsers
+from app.Controllers.Base import RequestValidationController
+from app.Decorators import requires_jwt, authorize
+from app.Extensions.Cache import VersionedCache
+from app.Extensions.Database import session_scope
+from app.Extensions.Encoders import marshal
+from app.Models import OrgSetting, ReferenceData, SparseFields, get_tasks_schema_docs
+from app.Models.Dao import ActiveUser, User
+from app.Models.Enums import Operations, Resources
+from app.Models.RBAC import Permission
+
+api = Namespace(path="/dashboard", name="Dashboard", description="Load everything the board needs at once")
+log = structlog.getLogger()
+
+# permissions are seed data which only change with a release, so they're cached for the worker's life
+reference_cache = VersionedCache(max_size=100)
+
+
+@api.route("/")
+class Dashboard(RequestValidationController):
+    response_dto = api.model(
+        "Dashboard Response",
+        {
+            "tasks": fields.List(fields.Nested(Tasks.task_dto)),
+            "transitions": fields.List(fields.Nested(TransitionTask.task_transition_dto)),
+            "labels": fields.List(fields.Nested(TaskLabels.task_label_dto)),
+            "priorities": fields.List(fields.Nested(TaskPriorities.task_priority_dto)),
+            "users": fields.List(fields.Nested(MinimalUsers.min_user_response)),
+            "active_users": fields.List(fields.Nested(active_user_dto)),
+            "pages": fields.List(fields.String()),
+            "org_settings": fields.Nested(OrganisationSettings.get_org_settings_response, allow_null=True),
+        },
+    )
+
+    @requires_jwt
+    @authorize(Operations.GET, Resources.TASKS)
+    @api.doc(params=get_tasks_schema_docs)
+    @api.response(200, "Success", response_dto)
+    def get(self, **kwargs):
+        """Returns the tasks, their transitions and the reference data that the board needs in one request.
+        Anything the user doesn't have permission to get is null."""
+        req_user: User = kwargs["req_user"]
+
+        task_filters = Tasks.parse_filters()
+        log.info("Parsed request filters", filters=task_filters)
+
+        permitted, pages = self._permissions(req_user.role)
+        dashboard = dict.fromkeys(self.response_dto)
+        if Resources.PAGES in permitted:
+            dashboard["pages"] = pages
+
+        with session_scope() as session:
+            dashboard["tasks"] = Tasks.get_task_dicts(
+                session, task_filters.filters(req_user.org_id), SparseFields({}, Tasks.task_dto)
+            )
+
+            if Resources.TASK_TRANSITIONS in permitted:
+                # computed from the same rows rather than scanning the tasks again
+                dashboard["transitions"] = [
+                    {
+                        "task_id": task["id"],
+                        "valid_transitions": TransitionTask.valid_transitions(
+                            req_user, task["status"], task["assignee"]["id"] if task["assignee"] else None
+                        ),
+                    }
+                    for task in dashboard["tasks"]
+                ]
+
+            if Resources.TASK_LABELS in permitted:
+                dashboard["labels"] = ReferenceData.labels(req_user)
+
+            if Resources.TASK_PRIORITIES in permitted:
+                dashboard["priorities"] = ReferenceData.priorities()
+
+            if Resources.USERS in permitted:
+                users_qry = (
+                    session.query(*[getattr(User, field).label(field) for field in MinimalUsers.min_user_response])
+                    .filter(and_(User.org_id == req_user.org_id, User.deleted == None))  # noqa
+                    .all()
+                )
+                dashboard["users"] = [user._asdict() for user in users_qry]
+
+            if Resources.ACTIVE_USERS in permitted:
+                # inactive users are purged by GET /active-users, here they're just left out so this stays a read
+                inactive_cutoff = datetime.datetime.utcnow() - datetime.timedelta(
+                    seconds=current_app.config["INACTIVE_USER_TTL"]
+                )
+                active_users = session.query(ActiveUser).filter(
+                    ActiveUser.org_id == req_user.org_id, ActiveUser.last_active >= inactive_cutoff
+                )
+                dashboard["active_users"] = [active_user.as_dict() for active_user in active_users]
+
+        if Resources.ORG_SETTINGS in permitted:
+            org_setting = OrgSetting(req_user.org_id)
+            org_setting.get()
+            dashboard["org_settings"] = org_setting.as_dict()
+
+        log.info(f"Found {len(dashboard['tasks'])} tasks for the dashboard")
+        req_user.log(Operations.GET, Resources.TASKS)
+        return marshal(dashboard, self.response_dto), 200
+
+    @staticmethod
+    def _permissions(role: str) -> tuple:
+        """Returns the resources the role can get and the pages it can access"""
+        cached = reference_cache.get(("permissions", role))
+        if cached is not None:
+            return cached
+
+        with session_scope() as session:
+            permissions = (
+                session.query(Permission.operation_id, Permission.resource_id).filter(Permission.role_id == role).all()
+            )
+
+        permitted = {resource for operation, resource in permissions if operation == Operations.GET}
+        pages = sorted({resource.split("_PAGE")[0] for _, resource in permissions if resource.endswith("_PAGE")})
+        reference_cache.set(("permissions", role), (permitted, pages))
+        return permitted, pages
@@ -8,10 +8,10 @@ from sqlalchemy import exists, and_, func
 
 
 from app.Controllers.Base import RequestValidationController
-from app.Decorators import requires_jwt, authorize
+from app.Decorators import requires_jwt, authorize, cache_reference_data
 from app.Extensions.Database import session_scope
 from app.Extensions.Errors import ValidationError
-from app.Models import OrgSetting
+from app.Models import OrgSetting, ReferenceData
 from app.Models.Dao import Organisation
 from app.Models.Enums import Operations, Resources, Roles
 
@@ -83,6 +83,8 @@ class OrganisationSettings(RequestValidationController):
 
     @requires_jwt
     @authorize(Operations.GET, Resources.ORG_SETTINGS)
+    @cache_reference_data
+    @api.response(304, "Not Modified")
     @api.marshal_with(get_org_settings_response, code=200)
     def get(self, **kwargs):
         """Get an organisation's settings"""
@@ -113,6 +115,7 @@ class OrganisationSettings(RequestValidationController):
 
         org_setting.custom_task_fields = request_body["custom_task_fields"]
         org_setting.update()
+        ReferenceData.invalidate(req_user.org_id)
 
         req_user.log(Operations.UPDATE, Resources.ORG_SETTINGS, resource_id=req_user.org_id)
         return org_setting.as_dict(), 200
@@ -1,9 +1,8 @@
 from flask_restx import Namespace, fields
-from sqlalchemy import and_
 
 from app.Controllers.Base import RequestValidationController
-from app.Decorators import requires_jwt, authorize
-from app.Extensions.Database import session_scope
+from app.Decorators import requires_jwt, authorize, cache_reference_data
+from app.Models import ReferenceData
 from app.Models.Enums import Operations, Resources, Roles
 from app.Models.RBAC import Role
 
@@ -29,18 +28,22 @@ roles_response = api.model("Roles Response", {"roles": fields.List(fields.Nested
 class Roles(RequestValidationController):
     @requires_jwt
     @authorize(Operations.GET, Resources.ROLES)
+    @cache_reference_data
+    @api.response(304, "Not Modified")
     @api.marshal_with(roles_response, code=200)
     @api.response(200, "Roles Retrieved", roles_response)
     def get(self, **kwargs):
         """Return all roles lower in rank than the requesting user's role."""
         req_user = kwargs["req_user"]
-
-        with session_scope() as session:
-            # rank > 50 are reserved for admin duties
-            roles_qry = session.query(Role).filter(and_(Role.rank <= 50)).all()
-
-        # the role will be disabled if its rank is higher than the users rank
-        roles = [r.as_dict(disabled=r.rank < req_user.roles.rank) for r in roles_qry]
+        req_user_rank = ReferenceData.role(req_user.role)["rank"]
+
+        roles = []
+        # rank > 50 are reserved for admin duties
+        for role in ReferenceData.roles().values():
+            if role["rank"] <= 50:
+                # the role will be disabled if its rank is higher than the users rank
+                disabled = role["rank"] < req_user_rank
+                roles.append({**role, "disabled": disabled, "tooltip": Role.disabled_tooltip if disabled else None})
 
         req_user.log(Operations.GET, Resources.ROLES)
         return {"roles": roles}, 200
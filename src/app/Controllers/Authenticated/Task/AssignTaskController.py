@@ -3,6 +3,7 @@ from flask_restx import Namespace, fields
 
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
+from app.Models.Dao import Task
 from app.Models.Enums import Operations, Resources
 
 api = Namespace(path="/task/assign", name="Task", description="Manage a task")
@@ -17,15 +18,17 @@ class AssignTask(RequestValidationController):
     @authorize(Operations.ASSIGN, Resources.TASK)
     @api.expect(request_dto, validate=True)
     @api.response(204, "Success")
+    @api.response(412, "The task has changed since the If-Match version")
     def post(self, **kwargs):
         """Assigns a user to task"""
         request_body = request.get_json()
 
         # validate
-        task = self.check_task_id(request_body["task_id"], kwargs["req_user"].org_id)
-        assignee_id = self.check_task_assignee(request_body["assignee"], **kwargs)
+        references = self.check_references(task_id=request_body["task_id"], assignee=request_body["assignee"], **kwargs)
+        task = references.task
+        self.check_if_match(task)
 
         # assign
-        task.assign(assignee=assignee_id, req_user=kwargs["req_user"])
+        task.assign(assignee=references.assignee.id, req_user=kwargs["req_user"])
 
-        return "", 204
+        return "", 204, {"ETag": Task.etag(task.row_version)}
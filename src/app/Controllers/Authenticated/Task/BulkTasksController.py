@@ -0,0 +1,340 @@
+import datetime
+import typing
+from collections import defaultdict
+
+import structlog
+from flask import request
+from flask_restx import Namespace, fields
+
+from app.Controllers.Base import RequestValidationController
+from app.Decorators import requires_jwt, authorize_each
+from app.Extensions.Database import session_scope
+from app.Extensions.Errors import AuthorizationError
+from app.Models import Event, Notification, NotificationAction
+from app.Models.Dao import DelayedTask, Task, TaskLabel, User
+from app.Models.Enums import Events, Operations, Resources, TaskStatuses
+from app.Models.Enums.Notifications import ClickActions, NotificationIcons, TargetTypes
+from app.Models.RBAC import Log
+from app.Utilities.All import get_all_user_ids
+
+api = Namespace(path="/tasks/bulk", name="Tasks", description="Manage tasks")
+log = structlog.getLogger()
+
+
+class NullableInteger(fields.Integer):
+    __schema_type__ = ["integer", "null"]
+    __schema_example__ = "nullable integer"
+
+
+class NullableString(fields.String):
+    __schema_type__ = ["string", "null"]
+    __schema_example__ = "nullable string"
+
+
+@api.route("/")
+class BulkTasks(RequestValidationController):
+    # the permission that each action requires, the same as the endpoint for a single task
+    actions = {
+        "assign": (Operations.ASSIGN, Resources.TASK),
+        "transition": (Operations.TRANSITION, Resources.TASK),
+        "prioritise": (Operations.UPDATE, Resources.TASK),
+        "label": (Operations.UPDATE, Resources.TASK),
+        "cancel": (Operations.CANCEL, Resources.TASK),
+    }
+    statuses = [TaskStatuses.READY, TaskStatuses.IN_PROGRESS, TaskStatuses.COMPLETED, TaskStatuses.CANCELLED]
+
+    operation_dto = api.model(
+        "Bulk Task Operation",
+        {
+            "task_id": fields.Integer(required=True),
+            "action": fields.String(enum=list(actions), required=True),
+            "assignee": NullableInteger(description="For assign, null unassigns the task"),
+            "status": fields.String(enum=statuses, description="For transition"),
+            "priority": fields.Integer(min=0, max=2, description="For prioritise"),
+            "labels": fields.List(fields.Integer(), max_items=3, description="For label"),
+        },
+    )
+    request_dto = api.model(
+        "Bulk Tasks Request",
+        {"operations": fields.List(fields.Nested(operation_dto), required=True, min_items=1, max_items=100)},
+    )
+    result_dto = api.model(
+        "Bulk Task Result",
+        {
+            "task_id": fields.Integer(),
+            "action": fields.String(),
+            "success": fields.Boolean(),
+            "msg": NullableString(),
+        },
+    )
+    response_dto = api.model("Bulk Tasks Response", {"results": fields.List(fields.Nested(result_dto))})
+
+    @requires_jwt
+    @authorize_each(actions)
+    @api.expect(request_dto, validate=True)
+    @api.marshal_with(response_dto, code=200)
+    def post(self, **kwargs):
+        """Applies a list of operations to tasks in a single transaction, invalid operations are skipped"""
+        req_user: User = kwargs["req_user"]
+        operations = request.get_json()["operations"]
+
+        if req_user.is_service_account:
+            raise AuthorizationError("Invalid requester - bulk operations are only available to users")
+
+        scopes = kwargs["auth_scopes"]
+        changes = _BulkChanges(req_user)
+
+        with session_scope() as session:
+            # load everything the operations refer to up front rather than per operation
+            tasks = {
+                task.id: task
+                for task in session.query(Task).filter(
+                    Task.org_id == req_user.org_id, Task.id.in_([op["task_id"] for op in operations])
+                )
+            }
+            user_ids = {op["assignee"] for op in operations if op.get("assignee") is not None}
+            user_ids.update(task.assignee for task in tasks.values() if task.assignee is not None)
+            users = {
+                user.id: user
+                for user in session.query(User).filter(
+                    User.org_id == req_user.org_id, User.id.in_(list(user_ids)), User.deleted == None  # noqa
+                )
+            }
+            label_ids = {label_id for op in operations for label_id in op.get("labels") or []}
+            labels = {
+                label_id
+                for label_id, in session.query(TaskLabel.id).filter(
+                    TaskLabel.org_id == req_user.org_id, TaskLabel.id.in_(list(label_ids))
+                )
+            }
+            delays = {
+                delay.task_id: delay
+                for delay in session.query(DelayedTask).filter(
+                    DelayedTask.task_id.in_(list(tasks)), DelayedTask.expired == None  # noqa
+                )
+            }
+
+            results = []
+            for op in operations:
+                error = self._apply(op, tasks.get(op["task_id"]), scopes, users, labels, delays, changes)
+                results.append(
+                    {"task_id": op["task_id"], "action": op["action"], "success": error is None, "msg": error}
+                )
+
+            session.add_all(changes.transition_events)
+            session.add_all(changes.audit_logs)
+
+        changes.publish()
+
+        log.info(f"Applied {len(changes.audit_logs)} of {len(operations)} bulk task operations")
+        return {"results": results}, 200
+
+    def _apply(
+        self,
+        op: dict,
+        task: typing.Union[Task, None],
+        scopes: dict,
+        users: dict,
+        labels: set,
+        delays: dict,
+        changes: "_BulkChanges",
+    ) -> typing.Union[str, None]:
+        """Applies an operation to its task, returns why it couldn't be applied or None if it was"""
+        action = op["action"]
+        operation, resource = self.actions[action]
+
+        if task is None:
+            return f"Task {op['task_id']} doesn't exist"
+        if scopes[action] is None:
+            return f"No permissions to {operation} {resource}."
+
+        if action == "assign":
+            error = self._assign(op, task, scopes[action], users, changes)
+        elif action in ("transition", "cancel"):
+            error = self._transition(op, task, scopes[action], delays, changes)
+        elif action == "prioritise":
+            error = self._prioritise(op, task, changes)
+        else:
+            error = self._label(op, task, labels, changes)
+        if error is not None:
+            return error
+
+        changes.audit_logs.append(
+            Log(
+                org_id=changes.req_user.org_id,
+                user_id=changes.req_user.id,
+                operation=operation,
+                resource=resource,
+                resource_id=task.id,
+            )
+        )
+        return None
+
+    @staticmethod
+    def _assign(op: dict, task: Task, scope: str, users: dict, changes: "_BulkChanges") -> typing.Union[str, None]:
+        if "assignee" not in op:
+            return "assignee is required to assign a task"
+        assignee = op["assignee"]
+        if assignee is not None:
+            if assignee not in users:
+                return f"User {assignee} doesn't exist"
+            if scope == "SELF" and assignee != changes.req_user.id:
+                return f"User {changes.req_user.id} can only perform this action on themselves."
+        if task.assignee != assignee:
+            changes.assigned(task, users.get(assignee))
+            task.assignee = assignee
+        return None
+
+    @staticmethod
+    def _transition(op: dict, task: Task, scope: str, delays: dict, changes: "_BulkChanges") -> typing.Union[str, None]:
+        status = TaskStatuses.CANCELLED if op["action"] == "cancel" else op.get("status")
+        if status is None:
+            return "status is required to transition a task"
+        if scope == "SELF" and task.assignee not in (None, changes.req_user.id):
+            return f"User {changes.req_user.id} can only perform this action on themselves."
+        if task.status != status:
+            error = task.transition_error(status)
+            if error is not None:
+                return error
+            changes.transitioned(task, status)
+            changes.transition_events.append(task.apply_transition(status, changes.req_user, delays.pop(task.id, None)))
+        return None
+
+    @staticmethod
+    def _prioritise(op: dict, task: Task, changes: "_BulkChanges") -> typing.Union[str, None]:
+        if op.get("priority") is None:
+            return "priority is required to prioritise a task"
+        if task.priority != op["priority"]:
+            changes.prioritised(task, op["priority"])
+            task.priority = op["priority"]
+            task.priority_changed_at = datetime.datetime.utcnow()
+        return None
+
+    @staticmethod
+    def _label(op: dict, task: Task, labels: set, changes: "_BulkChanges") -> typing.Union[str, None]:
+        if op.get("labels") is None:
+            return "labels are required to label a task"
+        for label_id in op["labels"]:
+            if label_id not in labels:
+                return f"Label {label_id} doesn't exist"
+        if task.labels != op["labels"]:
+            changes.describe(task, "Labels changed.")
+            task.labels = op["labels"]
+        return None
+
+
+class _BulkChanges(object):
+    """Collects what a bulk request changed so that the events and notifications can be coalesced"""
+
+    def __init__(self, req_user: User):
+        self.req_user = req_user
+        self.transition_events = []
+        self.audit_logs = []
+        # task id to the task and the changes made to it
+        self.tasks = {}
+        self.descriptions = defaultdict(list)
+        self.old_statuses = {}
+        # user id to the tasks they've been assigned to or had cancelled
+        self.assignments = defaultdict(list)
+        self.cancellations = defaultdict(list)
+        self.escalations = []
+
+    def describe(self, task: Task, description: str) -> None:
+        self.tasks[task.id] = task
+        self.descriptions[task.id].append(description)
+
+    def assigned(self, task: Task, assignee: typing.Union[User, None]) -> None:
+        if assignee is None:
+            self.describe(task, "Unassigned.")
+        else:
+            self.describe(task, f"Assigned to {assignee.name()}.")
+            # don't notify the assignee if they assigned themselves or the task is scheduled
+            if assignee.id != self.req_user.id and task.status != TaskStatuses.SCHEDULED:
+                self.assignments[assignee.id].append(task)
+
+    def transitioned(self, task: Task, status: str) -> None:
+        self.old_statuses.setdefault(task.id, task.status)
+        self.describe(
+            task, f"Transitioned from {Task.pretty_status_label(task.status)} to {Task.pretty_status_label(status)}."
+        )
+        if status == TaskStatuses.CANCELLED and task.assignee is not None:
+            self.cancellations[task.assignee].append(task)
+
+    def prioritised(self, task: Task, priority: int) -> None:
+        self.describe(task, f"Priority changed from {task.priority} to {priority}.")
+        if priority > task.priority:
+            self.escalations.append(task)
+
+    def publish(self) -> None:
+        """Publishes one event per changed task and assignee, and one notification per affected user"""
+        if len(self.tasks) == 0:
+            return
+
+        req_user = self.req_user
+
+        for task_id, task in self.tasks.items():
+            if self.old_statuses.get(task_id, task.status) != task.status:
+                event = f"task_transitioned_{task.status.lower()}"
+            else:
+                event = Events.task_updated
+            Event(
+                org_id=task.org_id,
+                event=event,
+                event_id=task_id,
+                event_friendly=" ".join(self.descriptions[task_id]) + f" Bulk updated by {req_user.name()}.",
+            ).publish()
+
+        Event(
+            org_id=req_user.org_id,
+            event=Events.user_bulk_updated_tasks,
+            event_id=req_user.id,
+            event_friendly=f"Updated {len(self.tasks)} tasks.",
+        ).publish()
+
+        for assignee, tasks in self.assignments.items():
+            Event(
+                org_id=req_user.org_id,
+                event=Events.user_assigned_to_task,
+                event_id=assignee,
+                event_friendly=f"Assigned to {self._describe(tasks)} by {req_user.name()}.",
+            ).publish()
+            Notification(
+                title="You've been assigned a task!" if len(tasks) == 1 else "You've been assigned tasks!",
+                event_name=Events.user_assigned_to_task,
+                msg=f"{req_user.name()} assigned {self._describe(tasks)} to you.",
+                target_id=tasks[0].id,
+                target_type=TargetTypes.TASK,
+                actions=[NotificationAction(ClickActions.VIEW_TASK, NotificationIcons.VIEW_TASK_ICON)],
+                user_ids=[assignee],
+            ).push()
+
+        for assignee, tasks in self.cancellations.items():
+            Notification(
+                title="Task cancelled" if len(tasks) == 1 else "Tasks cancelled",
+                event_name=Events.task_transitioned_cancelled,
+                msg=f"{self._describe(tasks)} {self._was(tasks)} cancelled by {req_user.name()}.",
+                target_id=tasks[0].id,
+                target_type=TargetTypes.TASK,
+                actions=[],
+                user_ids=[assignee],
+            ).push()
+
+        if len(self.escalations) > 0:
+            Notification(
+                title="Task escalated" if len(self.escalations) == 1 else "Tasks escalated",
+                event_name=Events.task_escalated,
+                msg=f"{self._describe(self.escalations)} {self._was(self.escalations)} escalated.",
+                target_type=TargetTypes.TASK,
+                target_id=self.escalations[0].id,
+                actions=[NotificationAction(ClickActions.ASSIGN_TO_ME, NotificationIcons.VIEW_TASK_ICON)],
+                user_ids=get_all_user_ids(req_user.org_id, exclude=[req_user.id]),
+            ).push()
+
+    @staticmethod
+    def _describe(tasks: typing.List[Task]) -> str:
+        """A short description of the tasks for a notification"""
+        return tasks[0].title if len(tasks) == 1 else f"{len(tasks)} tasks"
+
+    @staticmethod
+    def _was(tasks: typing.List[Task]) -> str:
+        return "has been" if len(tasks) == 1 else "have been"
@@ -5,8 +5,11 @@ from flask_restx import Namespace, fields
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
 from app.Extensions.Database import session_scope
+from app.Extensions.Errors import ResourceNotFoundError, ValidationError
 from app.Models import Event
+from app.Models.Dao import Task
 from app.Models.Enums import Operations, Resources, Events
+from app.Models.RBAC import Log
 from app.Utilities.All import reindex_display_orders
 
 api = Namespace(path="/task/reposition", name="Task", description="Manage a task")
@@ -25,15 +28,17 @@ class RepositionTask(RequestValidationController):
     @authorize(Operations.UPDATE, Resources.TASK_POSITION)
     @api.expect(reposition_task_dto, validate=True)
     @api.response(204, "Success")
+    @api.response(412, "The task has changed since the If-Match version")
     def post(self, **kwargs):
         """Repositions a task"""
         req_user = kwargs["req_user"]
         request_body = request.get_json()
 
         task_to_repo = self.check_task_id(request_body["task_id"], kwargs["req_user"].org_id)
+        self.check_if_match(task_to_repo)
 
         if task_to_repo.display_order != request_body["display_order"]:
-            reindex_display_orders(task_to_repo.org_id, request_body["display_order"])
+            reindex_display_orders(task_to_repo.org_id, request_body["display_order"], exclude_task_id=task_to_repo.id)
 
         with session_scope():
             task_to_repo.display_order = request_body["display_order"]
@@ -50,4 +55,96 @@ class RepositionTask(RequestValidationController):
             store_in_db=False,
         ).publish()
 
+        return "", 204, {"ETag": Task.etag(task_to_repo.row_version)}
+
+
+@api.route("/batch")
+class RepositionTasks(RequestValidationController):
+
+    reposition_tasks_dto = api.model(
+        "Reposition Tasks Request",
+        {
+            "task_ids": fields.List(
+                fields.Integer(),
+                required=True,
+                min_items=1,
+                max_items=500,
+                description="The tasks in their new order, they're reordered within the positions they already have",
+            )
+        },
+    )
+
+    @requires_jwt
+    @authorize(Operations.UPDATE, Resources.TASK_POSITION)
+    @api.expect(reposition_tasks_dto, validate=True)
+    @api.response(204, "Success")
+    def post(self, **kwargs):
+        """Repositions several tasks at once, e.g. after a drag and drop"""
+        req_user = kwargs["req_user"]
+        task_ids = request.get_json()["task_ids"]
+
+        if len(set(task_ids)) != len(task_ids):
+            raise ValidationError("Each task can only be repositioned once")
+
+        with session_scope() as session:
+            # the tasks swap between the positions that they already have, so no other task needs to move. the nth
+            # task in the request takes the nth lowest of their positions
+            moved = session.execute(
+                """
+                   WITH new_order AS (
+                       SELECT id, ordinality FROM unnest(CAST(:task_ids AS INTEGER[])) WITH ORDINALITY AS o(id)
+                   ),
+                   positions AS (
+                       SELECT display_order, row_number() OVER (ORDER BY display_order, id) AS ordinality
+                       FROM tasks
+                       WHERE org_id = :org_id AND id = ANY(CAST(:task_ids AS INTEGER[]))
+                   ),
+                   matched AS (
+                       SELECT count(*) AS n FROM positions
+                   )
+                   UPDATE tasks
+                   SET display_order = positions.display_order
+                   FROM new_order
+                   JOIN positions USING (ordinality), matched
+                   WHERE tasks.id = new_order.id
+                   AND tasks.org_id = :org_id
+                   AND matched.n = :task_count
+                   AND tasks.display_order IS DISTINCT FROM positions.display_order
+                   RETURNING tasks.id
+                """,
+                {"task_ids": task_ids, "org_id": req_user.org_id, "task_count": len(task_ids)},
+            ).fetchall()
+
+            if len(moved) == 0:
+                # nothing moving is either a no-op or some of the tasks don't exist
+                found = session.query(Task.id).filter(Task.org_id == req_user.org_id, Task.id.in_(task_ids)).all()
+                missing = set(task_ids) - {task_id for task_id, in found}
+                if len(missing) > 0:
+                    raise ResourceNotFoundError(f"Task {min(missing)} doesn't exist")
+                return "", 204
+
+            session.add_all(
+                [
+                    Log(
+                        org_id=req_user.org_id,
+                        user_id=req_user.id,
+                        operation=Operations.UPDATE,
+                        resource=Resources.TASK_POSITION,
+                        resource_id=task_id,
+                    )
+                    for task_id, in moved
+                ]
+            )
+
+        log.info(f"User {req_user.id} repositioned {len(moved)} tasks")
+
+        # send one event so reloads occur
+        Event(
+            org_id=req_user.org_id,
+            event=Events.task_repositioned,
+            event_id=moved[0].id,
+            event_friendly=f"Repositioned {len(moved)} tasks in dashboard.",
+            store_in_db=False,
+        ).publish()
+
         return "", 204
@@ -1,11 +1,13 @@
 import structlog
+from flask import request
 from flask_restx import Namespace, fields
 
 from app.Decorators import authorize, requires_jwt
 from app.Controllers.Base import RequestValidationController
 from app.Models import Subscription
+from app.Models.Activity import ACTIVITY_DEFAULT_LIMIT, ACTIVITY_MAX_LIMIT
 from app.Models.Enums import Operations, Resources
-from app.Utilities.All import get_task_by_id
+from app.Utilities.All import get_task_by_id, page_args
 
 api = Namespace(path="/task/activity", name="Task", description="Manage a task")
 log = structlog.getLogger()
@@ -13,20 +15,29 @@ log = structlog.getLogger()
 
 @api.route("/<int:task_id>")
 class TaskActivity(RequestValidationController):
-
     activity_dto = api.model(
         "Activity",
         {"activity": fields.String(), "activity_timestamp": fields.String(), "event_friendly": fields.String()},
     )
 
-    response_dto = api.model("Activity Model", {"activity": fields.List(fields.Nested(activity_dto))})
+    response_dto = api.model(
+        "Activity Model", {"activity": fields.List(fields.Nested(activity_dto)), "next_cursor": fields.String()}
+    )
 
     @requires_jwt
     @authorize(Operations.GET, Resources.TASK_ACTIVITY)
+    @api.doc(
+        params={
+            "limit": f"How much activity to return, up to {ACTIVITY_MAX_LIMIT}",
+            "cursor": "The next_cursor from the previous page",
+        }
+    )
     @api.marshal_with(response_dto, code=200)
     def get(self, task_id: int, **kwargs):
-        """Returns the activity for a task"""
+        """Returns the activity for a task, newest first"""
         req_user = kwargs["req_user"]
+        limit, cursor = page_args(request.args, ACTIVITY_MAX_LIMIT, ACTIVITY_DEFAULT_LIMIT)
+
         # check the subscription limitations
         subscription = Subscription(req_user.orgs.chargebee_subscription_id)
         activity_log_history_limit = subscription.task_activity_log_history()
@@ -34,4 +45,5 @@ class TaskActivity(RequestValidationController):
         task = get_task_by_id(task_id, req_user.org_id)
         req_user.log(Operations.GET, Resources.TASK_ACTIVITY, resource_id=task.id)
         log.info(f"Getting activity for task with id {task.id}")
-        return {"activity": task.activity(activity_log_history_limit)}, 200
+        activity, next_cursor = task.activity(activity_log_history_limit, limit, cursor)
+        return {"activity": activity, "next_cursor": next_cursor}, 200
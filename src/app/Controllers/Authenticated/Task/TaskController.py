@@ -1,25 +1,30 @@
 import datetime
-import pytz
+import typing
 
 import structlog
-from flask import request, current_app
+from flask import request
 from flask_restx import Namespace, fields
-from sqlalchemy import exists, and_
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import aliased
 
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
+from app.Extensions.Cache import VersionedCache
 from app.Extensions.Database import session_scope
+from app.Extensions.Encoders import format_datetime
 from app.Extensions.Errors import ResourceNotFoundError, ValidationError
 from app.Models import Event, Notification, NotificationAction
-from app.Models.Dao import Task, User, TaskTransitionEvent
+from app.Models.Dao import DelayedTask, Task, TaskLabel, TaskTransitionEvent, User
 from app.Models.Enums import Operations, Resources, Events, TaskStatuses
 from app.Models.Enums.Notifications import ClickActions, TargetTypes
 from app.Models.Enums.Notifications.NotificationIcons import NotificationIcons
+from app.Models.RBAC import Log
 from app.Utilities.All import get_all_user_ids, reindex_display_orders
 
 api = Namespace(path="/task", name="Task", description="Manage a task")
 log = structlog.getLogger()
 task_statuses = ["SCHEDULED", "READY", "IN_PROGRESS", "COMPLETED", "CANCELLED"]
+task_cache = VersionedCache(max_size=5000)
 
 
 class NullableDateTime(fields.DateTime):
@@ -87,74 +92,94 @@ class GetTask(RequestValidationController):
 
     @requires_jwt
     @authorize(Operations.GET, Resources.TASK)
+    @api.response(304, "Not Modified")
     @api.marshal_with(response_dto, code=200)
     def get(self, task_id: int, **kwargs):
-        """Get a single task"""
+        """Get a single task, its ETag can be sent as If-Match when updating it"""
         req_user: User = kwargs["req_user"]
 
         with session_scope() as session:
-            # return 404 if task not found in org
-            if not session.query(exists().where(and_(Task.id == task_id, Task.org_id == req_user.org_id))).scalar():
+            # the task document is cached per row version, which also tells us whether the task exists in the org.
+            # reordering doesn't change the version, so the display order is always read with it
+            version = (
+                session.query(Task.row_version, Task.display_order)
+                .filter_by(id=task_id, org_id=req_user.org_id)
+                .first()
+            )
+            if version is None:
                 raise ResourceNotFoundError(f"Task {task_id} doesn't exist")
+            row_version, display_order = version
 
-            # the aliases are named so that it's easier to split on later
-            qry = session.execute(
-                """ SELECT t.id AS task_id,
-                           t.org_id AS task_org_id,
-                           t.title AS task_title,
-                           t.description AS task_description,
-                           t.time_estimate AS task_time_estimate,
-                           t.scheduled_for AS task_scheduled_for,
-                           t.scheduled_notification_period AS task_scheduled_notification_period,
-                           t.scheduled_notification_sent AS task_scheduled_notification_sent,
-                           t.created_at AS task_created_at,
-                           t.started_at AS task_started_at,
-                           t.finished_at AS task_finished_at,
-                           t.status_changed_at AS task_status_changed_at,
-                           t.priority_changed_at AS task_priority_changed_at,
-                           t.custom_1 AS task_custom_1,
-                           t.custom_2 AS task_custom_2,
-                           t.custom_3 AS task_custom_3,
-                           t.display_order AS task_display_order,
-                           ts.status AS status_status,
-                           ts.label AS status_label,
-                           tp.priority AS priority_priority,
-                           tp.label AS priority_label,
-                           tl1.id AS label1_id,
-                           tl1.label AS label1_label,
-                           tl1.colour AS label1_colour,
-                           tl2.id AS label2_id,
-                           tl2.label AS label2_label,
-                           tl2.colour AS label2_colour,
-                           tl3.id AS label3_id,
-                           tl3.label AS label3_label,
-                           tl3.colour AS label3_colour,
-                           ta.id AS assignee_id,
-                           ta.first_name AS assignee_first_name,
-                           ta.uuid AS assignee_uuid,
-                           ta.last_name AS assignee_last_name,
-                           tcb.id AS created_by_id,
-                           tcb.first_name AS created_by_first_name,
-                           tcb.last_name AS created_by_last_name,
-                           tfb.id AS finished_by_id,
-                           tfb.first_name AS finished_by_first_name,
-                           tfb.last_name AS finished_by_last_name
-                    FROM tasks t INNER JOIN task_statuses ts ON t.status = ts.status
-                                 INNER JOIN task_priorities tp ON t.priority = tp.priority
-                                 LEFT JOIN task_labels tl1 ON t.label_1 = tl1.id
-                                 LEFT JOIN task_labels tl2 ON t.label_2 = tl2.id
-                                 LEFT JOIN task_labels tl3 ON t.label_3 = tl3.id
-                                 LEFT JOIN users ta ON t.assignee = ta.id
-                                 LEFT JOIN users tcb ON t.created_by = tcb.id
-                                 LEFT JOIN users tfb ON t.finished_by = tfb.id
-                    WHERE t.id = :task_id
-                    AND   t.org_id = :org_id
-                """,
-                {"task_id": task_id, "org_id": req_user.org_id},
-            )
+            if request.if_none_match.contains_weak(str(row_version)):
+                return None, 304, {"ETag": Task.etag(row_version)}
 
-        result = dict(qry.fetchone())
+            ret = task_cache.get((req_user.org_id, task_id, row_version))
+            if ret is None:
+                ret = self.get_task_documents(session, [task_id], req_user.org_id).get(task_id)
+                if ret is None:
+                    raise ResourceNotFoundError(f"Task {task_id} doesn't exist")
+                task_cache.set((req_user.org_id, task_id, ret["row_version"]), ret)
 
+        req_user.log(Operations.GET, Resources.TASK, resource_id=task_id)
+        return {**ret, "display_order": display_order}, 200, {"ETag": Task.etag(ret["row_version"])}
+
+    @staticmethod
+    def get_task_documents(session, task_ids: typing.List[int], org_id: int) -> typing.Dict[int, dict]:
+        """Queries and assembles the tasks in one query, returns them by id. Tasks that don't exist are omitted"""
+        # the aliases are named so that it's easier to split on later
+        qry = session.execute(
+            """ SELECT t.id AS task_id,
+                       t.org_id AS task_org_id,
+                       t.title AS task_title,
+                       t.description AS task_description,
+                       t.time_estimate AS task_time_estimate,
+                       t.scheduled_for AS task_scheduled_for,
+                       t.scheduled_notification_period AS task_scheduled_notification_period,
+                       t.scheduled_notification_sent AS task_scheduled_notification_sent,
+                       t.created_at AS task_created_at,
+                       t.started_at AS task_started_at,
+                       t.finished_at AS task_finished_at,
+                       t.status_changed_at AS task_status_changed_at,
+                       t.priority_changed_at AS task_priority_changed_at,
+                       t.custom_1 AS task_custom_1,
+                       t.custom_2 AS task_custom_2,
+                       t.custom_3 AS task_custom_3,
+                       t.display_order AS task_display_order,
+                       t.row_version AS task_row_version,
+                       ts.status AS status_status,
+                       ts.label AS status_label,
+                       tp.priority AS priority_priority,
+                       tp.label AS priority_label,
+                       (SELECT COALESCE(json_agg(json_build_object('id', tl.id, 'label', tl.label, 'colour', tl.colour)
+                                                 ORDER BY array_position(t.labels, tl.id)), '[]'::json)
+                        FROM task_labels tl
+                        WHERE tl.id = ANY(t.labels)) AS labels,
+                       ta.id AS assignee_id,
+                       ta.first_name AS assignee_first_name,
+                       ta.uuid AS assignee_uuid,
+                       ta.last_name AS assignee_last_name,
+                       tcb.id AS created_by_id,
+                       tcb.first_name AS created_by_first_name,
+                       tcb.last_name AS created_by_last_name,
+                       tfb.id AS finished_by_id,
+                       tfb.first_name AS finished_by_first_name,
+                       tfb.last_name AS finished_by_last_name
+                FROM tasks t INNER JOIN task_statuses ts ON t.status = ts.status
+                             INNER JOIN task_priorities tp ON t.priority = tp.priority
+                             LEFT JOIN users ta ON t.assignee = ta.id
+                             LEFT JOIN users tcb ON t.created_by = tcb.id
+                             LEFT JOIN users tfb ON t.finished_by = tfb.id
+                WHERE t.id = ANY(:task_ids)
+                AND   t.org_id = :org_id
+            """,
+            {"task_ids": list(task_ids), "org_id": org_id},
+        )
+
+        return {row["task_id"]: GetTask._task_document(dict(row)) for row in qry}
+
+    @staticmethod
+    def _task_document(result: dict) -> dict:
+        """Assembles a task from its row"""
         if result["assignee_id"] is None:
             assignee = None
         else:
@@ -189,31 +214,19 @@ class GetTask(RequestValidationController):
             "assignee": assignee,
             "created_by": created_by,
             "finished_by": finished_by,
-            "labels": [],
+            "labels": result["labels"],
         }
 
         for alias, value in result.items():
             if alias.startswith("task_"):
                 ret[alias[len("task_") :]] = value
 
-        # add the labels (at most 3)
-        for i in range(1, 4):
-            if result[f"label{i}_id"] is not None:
-                ret["labels"].append(
-                    {
-                        "id": result[f"label{i}_id"],
-                        "label": result[f"label{i}_label"],
-                        "colour": result[f"label{i}_colour"],
-                    }
-                )
-
         # convert to correct time format
         for k, v in ret.items():
             if isinstance(v, datetime.datetime):
-                ret[k] = pytz.utc.localize(v).strftime(current_app.config["RESPONSE_DATE_FORMAT"])
+                ret[k] = format_datetime(v)
 
-        req_user.log(Operations.GET, Resources.TASK, resource_id=task_id)
-        return ret, 200
+        return ret
 
 
 @api.route("/")
@@ -241,57 +254,85 @@ class ManageTask(RequestValidationController):
     @authorize(Operations.UPDATE, Resources.TASK)
     @api.expect(update_task_dto, validate=True)
     @api.response(204, "Success")
+    @api.response(412, "The task has changed since the If-Match version")
     def put(self, **kwargs):
         """Update a task"""
         req_user: User = kwargs["req_user"]
         request_body = request.get_json()
 
-        # validate
-        task_to_update = self.check_task_id(request_body["id"], kwargs["req_user"].org_id)
-        self.check_task_assignee(request_body.get("assignee"), **kwargs),
-        self.check_task_labels(request_body["labels"], kwargs["req_user"].org_id)
-
-        # if the assignee isn't the same as before then assign someone to it, if the new assignee is null or
-        # omitted from the request, then assign the task
-        assignee = request_body.get("assignee")
-        if task_to_update.assignee != assignee:
-            if assignee is None:
-                task_to_update.unassign(req_user)
-            else:
-                task_to_update.assign(
-                    assignee=assignee,
-                    req_user=req_user,
-                    notify=False if task_to_update.status == TaskStatuses.SCHEDULED else True,
-                )
-
-        # transition
-        task_status = request_body["status"]
-        if task_to_update.status != task_status:
-            task_to_update.transition(status=task_status, req_user=req_user)
-
-        # change priority
-        task_priority = request_body["priority"]
-        if task_to_update.priority != task_priority:
-            task_to_update.change_priority(priority=task_priority, notification_exclusions=[req_user.id])
-
-        # rescheduling
-        if task_to_update.status == TaskStatuses.SCHEDULED:
-            if request_body.get("scheduled_for") is None or request_body.get("scheduled_notification_period") is None:
-                raise ValidationError(
-                    "Task is scheduled so scheduled_for and scheduled_notification_period are required"
-                )
-            with session_scope():
-                task_to_update.scheduled_for = request_body.get("scheduled_for")
-                task_to_update.scheduled_notification_period = request_body.get("scheduled_notification_period")
-            # TODO do we want send task rescheduled notifications here?
+        assignee, status, priority = request_body.get("assignee"), request_body["status"], request_body["priority"]
 
-        # update remaining attributes
-        with session_scope():
-            labels = self._get_labels(request_body["labels"])
+        with session_scope() as session:
+            # load the task and everything the update refers to in one go. the task isn't locked, instead the update
+            # is only applied if the task's row_version is still the one that was loaded
+            valid_labels = (
+                select(func.array_agg(TaskLabel.id))
+                .where(TaskLabel.org_id == req_user.org_id, TaskLabel.id.in_(request_body["labels"]))
+                .scalar_subquery()
+            )
+            old_assignee = aliased(User)
+            qry = (
+                session.query(Task, old_assignee, User, DelayedTask, valid_labels)
+                .outerjoin(old_assignee, old_assignee.id == Task.assignee)
+                .outerjoin(User, User.id == assignee)
+                .outerjoin(DelayedTask, and_(DelayedTask.task_id == Task.id, DelayedTask.expired == None))  # noqa
+                .filter(Task.id == request_body["id"], Task.org_id == req_user.org_id)
+                .first()
+            )
+            if qry is None:
+                raise ResourceNotFoundError(f"Task {request_body['id']} doesn't exist")
+            task_to_update, unassigned_user, assigned_user, delayed_task, label_ids = qry
+            self.check_if_match(task_to_update)
+
+            # validate the whole update before changing anything
+            if assignee is not None:
+                if assigned_user is None:
+                    raise ResourceNotFoundError("User doesn't exist")
+                self.check_auth_scope(assigned_user, **kwargs)
+            for label_id in request_body["labels"]:
+                if label_id not in (label_ids or []):
+                    raise ResourceNotFoundError(f"Label {label_id} doesn't exist")
+            if status == TaskStatuses.SCHEDULED:
+                if (
+                    request_body.get("scheduled_for") is None
+                    or request_body.get("scheduled_notification_period") is None
+                ):
+                    raise ValidationError(
+                        "Task is scheduled so scheduled_for and scheduled_notification_period are required"
+                    )
+
+            changes = _TaskChanges(task_to_update, req_user)
+
+            # if the assignee isn't the same as before then assign someone to it, if the new assignee is null or
+            # omitted from the request, then unassign the task
+            if task_to_update.assignee != assignee:
+                changes.assigned(unassigned_user, assigned_user)
+                task_to_update.assignee = assignee
+
+            # transition
+            if task_to_update.status != status:
+                error = task_to_update.transition_error(status)
+                if error is not None:
+                    raise ValidationError(error)
+                changes.transitioned(status)
+                if task_to_update.status != TaskStatuses.DELAYED:
+                    delayed_task = None
+                session.add(task_to_update.apply_transition(status, req_user, delayed_task))
+
+            # change priority
+            if task_to_update.priority != priority:
+                changes.prioritised(priority)
+                task_to_update.priority = priority
+                task_to_update.priority_changed_at = datetime.datetime.utcnow()
+
+            # rescheduling
+            if status == TaskStatuses.SCHEDULED:
+                task_to_update.scheduled_for = request_body["scheduled_for"]
+                task_to_update.scheduled_notification_period = request_body["scheduled_notification_period"]
+
+            # update remaining attributes
             task_to_update.title = request_body["title"]
-            task_to_update.label_1 = labels["label_1"]
-            task_to_update.label_2 = labels["label_2"]
-            task_to_update.label_3 = labels["label_3"]
+            task_to_update.labels = request_body["labels"]
             task_to_update.custom_1 = request_body.get("custom_1")
             task_to_update.custom_2 = request_body.get("custom_2")
             task_to_update.custom_3 = request_body.get("custom_3")
@@ -301,16 +342,11 @@ class ManageTask(RequestValidationController):
             if request_body.get("time_estimate") is not None:
                 task_to_update.time_estimate = request_body["time_estimate"]
 
-        # publish event
-        Event(
-            org_id=task_to_update.org_id,
-            event=Events.task_updated,
-            event_id=task_to_update.id,
-            event_friendly=f"Updated by {req_user.name()}.",
-        ).publish()
+            session.add_all(changes.audit_logs())
 
-        req_user.log(Operations.UPDATE, Resources.TASK, resource_id=task_to_update.id)
-        return "", 204
+        changes.publish()
+        log.info(f"User {req_user.id} updated task {task_to_update.id}")
+        return "", 204, {"ETag": Task.etag(task_to_update.row_version)}
 
     create_task_dto = api.model(
         "Create Task Request",
@@ -339,9 +375,12 @@ class ManageTask(RequestValidationController):
         req_user: User = kwargs["req_user"]
         request_body = request.get_json()
 
-        self.check_task_template_id(request_body.get("template_id"))
-        self.check_task_assignee(request_body.get("assignee"), **kwargs)
-        self.check_task_labels(request_body.get("labels", []), req_user.org_id)
+        self.check_references(
+            assignee=request_body.get("assignee"),
+            template_id=request_body.get("template_id"),
+            labels=request_body.get("labels"),
+            **kwargs,
+        )
 
         reindex_display_orders(req_user.org_id)
 
@@ -357,7 +396,7 @@ class ManageTask(RequestValidationController):
                 custom_1=request_body.get("custom_1"),
                 custom_2=request_body.get("custom_2"),
                 custom_3=request_body.get("custom_3"),
-                **self._get_labels(request_body.get("labels", [])),
+                labels=request_body.get("labels", []),
             )
 
         if request_body.get("scheduled_for") is not None:
@@ -442,10 +481,142 @@ class ManageTask(RequestValidationController):
         if request_body.get("assignee") is not None:
             task.assign(assignee=request_body.get("assignee"), req_user=req_user, notify=False)
 
-    @staticmethod
-    def _get_labels(label_attrs: dict) -> dict:
-        """labels provided as a list, so map their index to the Task column"""
-        labels = {"label_1": None, "label_2": None, "label_3": None}
-        for i in range(1, len(label_attrs) + 1):
-            labels[f"label_{i}"] = label_attrs[i - 1]
-        return labels
+
+class _TaskChanges(object):
+    """Collects what an update changed so that a minimal set of events can be published once it's committed"""
+
+    def __init__(self, task: Task, req_user: User):
+        self.task = task
+        self.req_user = req_user
+        self.descriptions = []
+        self.old_status = None
+        self.unassigned_user = None
+        self.assigned_user = None
+        self.escalated = False
+
+    def assigned(self, unassigned_user: typing.Union[User, None], assigned_user: typing.Union[User, None]) -> None:
+        self.unassigned_user, self.assigned_user = unassigned_user, assigned_user
+        if assigned_user is None:
+            self.descriptions.append(f"{unassigned_user.name()} unassigned from task.")
+        else:
+            self.descriptions.append(f"{assigned_user.name()} assigned to task.")
+
+    def transitioned(self, status: str) -> None:
+        self.old_status = self.task.status
+        self.descriptions.append(
+            f"Transitioned from {Task.pretty_status_label(self.task.status)} to {Task.pretty_status_label(status)}."
+        )
+
+    def prioritised(self, priority: int) -> None:
+        self.descriptions.append(f"Priority changed from {self.task.priority} to {priority}.")
+        self.escalated = priority > self.task.priority
+
+    def audit_logs(self) -> typing.List[Log]:
+        """The audit logs for everything that was done to the task"""
+        operations = [Operations.UPDATE]
+        if self.unassigned_user is not None or self.assigned_user is not None:
+            operations.append(Operations.ASSIGN)
+        if self.old_status is not None:
+            operations.append(Operations.TRANSITION)
+        return [
+            Log(
+                org_id=self.req_user.org_id,
+                user_id=self.req_user.id,
+                operation=operation,
+                resource=Resources.TASK,
+                resource_id=self.task.id,
+            )
+            for operation in operations
+        ]
+
+    def publish(self) -> None:
+        """Publishes one event for the task, and one for each user whose activity includes the change"""
+        task, req_user = self.task, self.req_user
+        events = [
+            Event(
+                org_id=task.org_id,
+                event=f"task_transitioned_{task.status.lower()}" if self.old_status else Events.task_updated,
+                event_id=task.id,
+                event_friendly=" ".join(self.descriptions + [f"Updated by {req_user.name()}."]),
+            )
+        ]
+
+        # the same events as Task.unassign and Task.assign
+        if self.unassigned_user is not None:
+            unassigned_name = self.unassigned_user.name()
+            events += [
+                Event(
+                    org_id=task.org_id,
+                    event=Events.task_unassigned,
+                    event_id=task.id,
+                    event_friendly=f"{unassigned_name} unassigned from task by {req_user.name()}.",
+                ),
+                Event(
+                    org_id=req_user.org_id,
+                    event=Events.user_unassigned_task,
+                    event_id=req_user.id,
+                    event_friendly=f"Unassigned {unassigned_name} from {task.title}.",
+                ),
+                Event(
+                    org_id=task.org_id,
+                    event=Events.user_unassigned_from_task,
+                    event_id=self.unassigned_user.id,
+                    event_friendly=f"Unassigned from {task.title} by {req_user.name()}.",
+                ),
+            ]
+        if self.assigned_user is not None:
+            assigned_name = self.assigned_user.name()
+            events += [
+                Event(
+                    org_id=task.org_id,
+                    event=Events.task_assigned,
+                    event_id=task.id,
+                    event_friendly=f"{assigned_name} assigned to task by {req_user.name()}.",
+                ),
+                Event(
+                    org_id=req_user.org_id,
+                    event=Events.user_assigned_task,
+                    event_id=req_user.id,
+                    event_friendly=f"Assigned {assigned_name} to {task.title}.",
+                ),
+                Event(
+                    org_id=task.org_id,
+                    event=Events.user_assigned_to_task,
+                    event_id=self.assigned_user.id,
+                    event_friendly=f"Assigned to {task.title} by {req_user.name()}.",
+                ),
+            ]
+            # don't notify the assignee if they assigned themselves or the task is scheduled
+            if self.assigned_user.id != req_user.id and task.status != TaskStatuses.SCHEDULED:
+                Notification(
+                    title="You've been assigned a task!",
+                    event_name=Events.user_assigned_to_task,
+                    msg=f"{req_user.name()} assigned {task.title} to you.",
+                    target_id=task.id,
+                    target_type=TargetTypes.TASK,
+                    actions=[NotificationAction(ClickActions.VIEW_TASK, NotificationIcons.VIEW_TASK_ICON)],
+                    user_ids=[self.assigned_user.id],
+                ).push()
+        if self.old_status is not None and not req_user.is_service_account:
+            events.append(
+                Event(
+                    org_id=req_user.org_id,
+                    event=Events.user_transitioned_task,
+                    event_id=req_user.id,
+                    event_friendly=f"Transitioned {task.title} from {Task.pretty_status_label(self.old_status)} to "
+                    f"{Task.pretty_status_label(task.status)}.",
+                )
+            )
+
+        Event.publish_all(events)
+
+        if self.escalated:
+            Notification(
+                title="Task escalated",
+                event_name=Events.task_escalated,
+                msg=f"{task.title} task has been escalated.",
+                target_type=TargetTypes.TASK,
+                target_id=task.id,
+                actions=[NotificationAction(ClickActions.ASSIGN_TO_ME, NotificationIcons.VIEW_TASK_ICON)],
+                user_ids=get_all_user_ids(task.org_id, exclude=[req_user.id]),
+            ).push()
@@ -7,7 +7,7 @@ from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
 from app.Extensions.Database import session_scope
 from app.Extensions.Errors import ResourceNotFoundError
-from app.Models import Event
+from app.Models import Event, ReferenceData
 from app.Models.Dao import TaskTemplate, TaskTemplateEscalation
 from app.Models.Enums import Events, Operations, Resources
 
@@ -57,6 +57,7 @@ class EscalationPolicies(RequestValidationController):
                 to_priority=request_body["to_priority"],
             )
             session.add(new_policy)
+        ReferenceData.invalidate(req_user.org_id)
 
         Event(
             org_id=req_user.org_id,
@@ -110,6 +111,7 @@ class EscalationPolicies(RequestValidationController):
             escalation.delay = request_body["delay"]
             escalation.from_priority = request_body["from_priority"]
             escalation.to_priority = request_body["to_priority"]
+        ReferenceData.invalidate(req_user.org_id)
 
         Event(
             org_id=req_user.org_id,
@@ -156,6 +158,7 @@ class DeleteEscalationPolicies(RequestValidationController):
                     .delete(synchronize_session=False)
                 )
                 log.info(f"deleted escalation id={escalation_id}, template_id={template_id}")
+        ReferenceData.invalidate(req_user.org_id)
 
         Event(
             org_id=req_user.org_id,
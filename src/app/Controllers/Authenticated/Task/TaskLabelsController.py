@@ -1,11 +1,13 @@
 from flask import request
 from flask_restx import Namespace, fields
+from sqlalchemy import func
 
 from app.Controllers.Base import RequestValidationController
-from app.Decorators import requires_jwt, authorize
+from app.Decorators import requires_jwt, authorize, cache_reference_data
 from app.Extensions.Database import session_scope
 from app.Extensions.Errors import ResourceNotFoundError
-from app.Models.Dao import TaskLabel
+from app.Models import ReferenceData
+from app.Models.Dao import Task, TaskLabel
 from app.Models.Enums import Operations, Resources
 
 api = Namespace(path="/task-labels", name="Task Labels", description="Manage Task Labels")
@@ -21,16 +23,14 @@ class TaskLabels(RequestValidationController):
 
     @requires_jwt
     @authorize(Operations.GET, Resources.TASK_LABELS)
+    @cache_reference_data
+    @api.response(304, "Not Modified")
     @api.marshal_with(task_labels_response, code=200)
     def get(self, **kwargs):
         """Returns all task labels"""
         req_user = kwargs["req_user"]
-
-        with session_scope() as session:
-            task_labels_qry = session.query(TaskLabel).filter_by(org_id=req_user.org_id).order_by(TaskLabel.id).all()
-
         req_user.log(Operations.GET, Resources.TASK_LABELS)
-        return {"labels": [tl.as_dict() for tl in task_labels_qry]}, 200
+        return {"labels": ReferenceData.labels(req_user)}, 200
 
     create_label_dto = api.model(
         "Create Label Dto", {"label": fields.String(required=True), "colour": fields.String(required=True)}
@@ -48,6 +48,7 @@ class TaskLabels(RequestValidationController):
         with session_scope() as session:
             new_label = TaskLabel(req_user.org_id, request_body["label"], request_body["colour"])
             session.add(new_label)
+        ReferenceData.invalidate(req_user.org_id)
 
         req_user.log(Operations.CREATE, Resources.TASK_LABEL, new_label.id)
         return "", 204
@@ -68,6 +69,10 @@ class TaskLabels(RequestValidationController):
             else:
                 label.colour = request_body["colour"]
                 label.label = request_body["label"]
+        ReferenceData.invalidate(req_user.org_id)
+
+        # the label is shown on its tasks, so they've changed too
+        Task.bump_row_versions(req_user.org_id, Task.labels.contains([label.id]))
 
         req_user.log(Operations.UPDATE, Resources.TASK_LABEL, label.id)
         return "", 204
@@ -89,5 +94,11 @@ class DeleteTaskLabel(RequestValidationController):
                 raise ResourceNotFoundError(f"Label {label_id} doesn't exist")
             session.delete(label)
 
+            # remove the label from its tasks
+            session.query(Task).filter(Task.org_id == req_user.org_id, Task.labels.contains([label_id])).update(
+                {Task.labels: func.array_remove(Task.labels, label_id)}, synchronize_session=False
+            )
+        ReferenceData.invalidate(req_user.org_id)
+
         req_user.log(Operations.DELETE, Resources.TASK_LABEL, label_id)
         return "", 204
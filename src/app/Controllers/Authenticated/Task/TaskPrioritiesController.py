@@ -2,10 +2,10 @@ from flask import request
 from flask_restx import Namespace, fields
 
 from app.Controllers.Base import RequestValidationController
-from app.Decorators import requires_jwt, authorize
-from app.Extensions.Database import session_scope
+from app.Decorators import requires_jwt, authorize, cache_reference_data
 from app.Extensions.Errors import AuthorizationError
-from app.Models.Dao import TaskPriority, User
+from app.Models import ReferenceData
+from app.Models.Dao import User
 from app.Models.Enums import Operations, Resources
 from app.Utilities.All import get_task_by_id
 
@@ -20,17 +20,14 @@ class TaskPriorities(RequestValidationController):
 
     @requires_jwt
     @authorize(Operations.GET, Resources.TASK_PRIORITIES)
+    @cache_reference_data
+    @api.response(304, "Not Modified")
     @api.marshal_with(get_response, code=200)
     def get(self, **kwargs):
         """Returns all task priorities"""
         req_user = kwargs["req_user"]
-
-        with session_scope() as session:
-            qry = session.query(TaskPriority).all()
-
-        task_priorities = [tp.as_dict() for tp in qry]
         req_user.log(Operations.GET, Resources.TASK_PRIORITIES)
-        return {"priorities": task_priorities}, 200
+        return {"priorities": ReferenceData.priorities()}, 200
 
     update_dto = api.model(
         "Update Task Priority Request",
@@ -5,10 +5,10 @@ from flask_restx import Namespace, fields
 from sqlalchemy import func
 
 from app.Controllers.Base import RequestValidationController
-from app.Decorators import requires_jwt, authorize
+from app.Decorators import requires_jwt, authorize, cache_reference_data
 from app.Extensions.Database import session_scope
 from app.Extensions.Errors import ValidationError, ResourceNotFoundError
-from app.Models import Event
+from app.Models import Event, ReferenceData
 from app.Models.Dao import TaskTemplate
 from app.Models.Enums import Events, Operations, Resources
 
@@ -53,22 +53,14 @@ class TaskTypes(RequestValidationController):
 
     @requires_jwt
     @authorize(Operations.GET, Resources.TASK_TEMPLATES)
+    @cache_reference_data
+    @api.response(304, "Not Modified")
     @api.marshal_with(get_response_dto, code=200)
     def get(self, **kwargs):
         """Returns all task templates"""
         req_user = kwargs["req_user"]
-
-        with session_scope() as session:
-            task_template_qry = session.query(TaskTemplate).filter_by(org_id=req_user.org_id, disabled=None).all()
-
-            task_templates = []
-            for tt in task_template_qry:
-                tt_dict = tt.as_dict()
-                tt_dict["escalations"] = [e.as_dict() for e in tt.escalations]
-                task_templates.append(tt_dict)
-
         req_user.log(Operations.GET, Resources.TASK_TEMPLATES)
-        return {"templates": task_templates}, 200
+        return {"templates": ReferenceData.templates(req_user)}, 200
 
     create_request = api.model(
         "Create Task Template Request",
@@ -114,6 +106,7 @@ class TaskTypes(RequestValidationController):
                     **self._get_labels(request_body.get("labels", [])),
                 )
                 session.add(new_template)
+            ReferenceData.invalidate(req_user.org_id)
             tt_dict = new_template.as_dict()
             tt_dict["escalations"] = [e.as_dict() for e in new_template.escalations]
             req_user.log(Operations.CREATE, Resources.TASK_TEMPLATE, new_template.id)
@@ -123,6 +116,7 @@ class TaskTypes(RequestValidationController):
                 raise ValidationError(f"Template with title {request_body['title']} already exists.")
             with session_scope():
                 task_template.disabled = None
+            ReferenceData.invalidate(req_user.org_id)
             tt_dict = task_template.as_dict()
             tt_dict["escalations"] = [e.as_dict() for e in task_template.escalations]
             req_user.log(Operations.ENABLE, Resources.TASK_TEMPLATE, task_template.id)
@@ -171,6 +165,7 @@ class TaskTypes(RequestValidationController):
             task_template.label_1 = labels["label_1"]
             task_template.label_2 = labels["label_2"]
             task_template.label_3 = labels["label_3"]
+        ReferenceData.invalidate(req_user.org_id)
 
         return "", 204
 
@@ -201,6 +196,7 @@ class DeleteTaskType(RequestValidationController):
                 raise ResourceNotFoundError(f"Task template {template_id} doesn't exist.")
             else:
                 task_template.disabled = datetime.datetime.utcnow()
+        ReferenceData.invalidate(req_user.org_id)
 
         Event(
             org_id=req_user.org_id,
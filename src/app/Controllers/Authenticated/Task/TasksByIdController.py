@@ -0,0 +1,69 @@
+import structlog
+from flask import request
+from flask_restx import Namespace, fields
+
+from app.Controllers.Authenticated.Task.TaskController import GetTask, task_cache
+from app.Controllers.Base import RequestValidationController
+from app.Decorators import requires_jwt, authorize
+from app.Extensions.Database import session_scope
+from app.Extensions.Errors import ValidationError
+from app.Models.Dao import Task, User
+from app.Models.Enums import Operations, Resources
+
+api = Namespace(path="/tasks/by-id", name="Tasks", description="Manage tasks")
+log = structlog.getLogger()
+
+
+@api.route("/")
+class TasksById(RequestValidationController):
+    max_ids = 50
+
+    response_dto = api.model("Tasks By Id Response", {"tasks": fields.List(fields.Nested(GetTask.response_dto))})
+
+    @requires_jwt
+    @authorize(Operations.GET, Resources.TASK)
+    @api.doc(params={"ids": f"Comma separated task ids, up to {max_ids}"})
+    @api.marshal_with(response_dto, code=200)
+    def get(self, **kwargs):
+        """Get several tasks at once, in the same shape as getting a single task. Tasks that don't exist are omitted"""
+        req_user: User = kwargs["req_user"]
+        task_ids = self._parse_ids(request.args.get("ids"))
+
+        with session_scope() as session:
+            # the documents are cached per row version, so only the ones that have changed need to be queried.
+            # reordering doesn't change the version, so the display orders are always read with it
+            versions = (
+                session.query(Task.id, Task.row_version, Task.display_order)
+                .filter(Task.org_id == req_user.org_id, Task.id.in_(task_ids))
+                .all()
+            )
+            row_versions = {task_id: row_version for task_id, row_version, _ in versions}
+            display_orders = {task_id: display_order for task_id, _, display_order in versions}
+            tasks = {}
+            for task_id, row_version in row_versions.items():
+                cached = task_cache.get((req_user.org_id, task_id, row_version))
+                if cached is not None:
+                    tasks[task_id] = cached
+
+            missing = [task_id for task_id in row_versions if task_id not in tasks]
+            if len(missing) > 0:
+                for task_id, document in GetTask.get_task_documents(session, missing, req_user.org_id).items():
+                    task_cache.set((req_user.org_id, task_id, document["row_version"]), document)
+                    tasks[task_id] = document
+
+        log.info(f"Found {len(tasks)} of {len(task_ids)} tasks, {len(tasks) - len(missing)} were cached")
+        req_user.log(Operations.GET, Resources.TASK)
+        found = [task_id for task_id in task_ids if task_id in tasks]
+        return {"tasks": [{**tasks[task_id], "display_order": display_orders[task_id]} for task_id in found]}, 200
+
+    def _parse_ids(self, ids: str) -> list:
+        """Parses the comma separated ids, in the order they were given and without duplicates"""
+        if not ids:
+            raise ValidationError("ids is required")
+        try:
+            task_ids = list(dict.fromkeys(int(task_id) for task_id in ids.split(",")))
+        except ValueError:
+            raise ValidationError("ids must be a comma separated list of task ids")
+        if len(task_ids) > self.max_ids:
+            raise ValidationError(f"Can only get {self.max_ids} tasks at a time")
+        return task_ids
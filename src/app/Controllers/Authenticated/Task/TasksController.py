@@ -1,20 +1,20 @@
 import datetime
-import pytz
+import typing
 
 import structlog
-from flask import current_app, request
+from flask import request
 from flask_restx import Namespace, fields
-from sqlalchemy import or_, func, cast, Date
+from sqlalchemy import func, cast, distinct, true, tuple_, Date, Float
 from sqlalchemy.orm import aliased
 
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
 from app.Extensions.Database import session_scope
 from app.Extensions.Errors import ValidationError
-from app.Models import GetTasksFilters, GetTasksFiltersSchema, get_tasks_schema_docs
-from app.Models.Dao import User, Task, TaskLabel, TaskStatus, DelayedTask, TaskPriority
+from app.Models import GetTasksFilters, ReferenceData, SparseFields, get_tasks_filters_schema, get_tasks_schema_docs
+from app.Models.Dao import User, Task, DelayedTask, TaskPriority
 from app.Models.Enums import Operations, Resources, TaskStatuses
-from app.Utilities.All import format_date
+from app.Utilities.All import decode_cursor, encode_cursor, format_date, page_args
 
 api = Namespace(path="/tasks", name="Tasks", description="Manage tasks")
 log = structlog.getLogger()
@@ -68,120 +68,95 @@ class Tasks(RequestValidationController):
     )
     response_dto = api.model("Tasks Response", {"tasks": fields.List(fields.Nested(task_dto))})
 
+    # the fields which are a column on the task
+    task_columns = [
+        "id",
+        "title",
+        "description",
+        "priority",
+        "scheduled_for",
+        "status",
+        "display_order",
+        "time_estimate",
+        "scheduled_notification_period",
+        "scheduled_notification_sent",
+    ]
+
     @requires_jwt
     @authorize(Operations.GET, Resources.TASKS)
-    @api.doc(params=get_tasks_schema_docs)
-    @api.marshal_with(response_dto, code=200)
+    @api.doc(params={**get_tasks_schema_docs, **SparseFields.docs(task_dto)})
+    @api.response(200, "Success", response_dto)
     def get(self, **kwargs):
         """Get all tasks"""
         req_user = kwargs["req_user"]
 
-        # validate the filtering arguments
-        arg_errors = GetTasksFiltersSchema().validate(request.args)
-        if arg_errors:
-            raise ValidationError(arg_errors)
-
-        task_filters = GetTasksFilters(request.args)
-        log.info("Parsed request filters", filters=task_filters)
+        task_filters = self.parse_filters()
+        task_fields = SparseFields(request.args, self.task_dto)
+        log.info("Parsed request filters", filters=task_filters, fields=task_fields)
 
         with session_scope() as session:
-            label1, label2, label3 = aliased(TaskLabel), aliased(TaskLabel), aliased(TaskLabel)
+            tasks = self.get_task_dicts(session, task_filters.filters(req_user.org_id), task_fields)
 
-            filters = task_filters.filters(req_user.org_id, label1, label2, label3)
+        log.info(f"Found {len(tasks)} tasks matching filters")
+        return task_fields.marshal({"tasks": tasks}, self.response_dto, "tasks"), 200
 
-            tasks_qry = (
-                session.query(
-                    Task.id,
-                    Task.title,
-                    Task.description,
-                    Task.priority,
-                    Task.scheduled_for,
-                    Task.status,
-                    Task.display_order,
-                    Task.time_estimate,
-                    Task.scheduled_notification_period,
-                    Task.scheduled_notification_sent,
-                    User.id,
-                    User.uuid,
-                    User.first_name,
-                    User.last_name,
-                    label1,
-                    label2,
-                    label3,
-                )
-                .outerjoin(User, User.id == Task.assignee)
-                .outerjoin(label1, label1.id == Task.label_1)
-                .outerjoin(label2, label2.id == Task.label_2)
-                .outerjoin(label3, label3.id == Task.label_3)
-                .filter(*filters)
-                .order_by(Task.display_order)
-                .all()
+    @staticmethod
+    def parse_filters() -> GetTasksFilters:
+        """Validates and parses the filtering arguments, fields is validated separately"""
+        arg_errors = get_tasks_filters_schema.validate({k: v for k, v in request.args.items() if k != "fields"})
+        if arg_errors:
+            raise ValidationError(arg_errors)
+        return GetTasksFilters(request.args)
+
+    @classmethod
+    def get_task_dicts(cls, session, filters: list, task_fields: SparseFields) -> typing.List[dict]:
+        """Queries the tasks matching the filters in display order, with only the selected fields"""
+        # only select what was asked for, so the description isn't read unless it's going to be returned
+        columns = [getattr(Task, field).label(field) for field in task_fields.fields if field in cls.task_columns]
+        if "assignee" in task_fields:
+            columns.extend(
+                [
+                    User.id.label("assignee_id"),
+                    User.uuid.label("assignee_uuid"),
+                    User.first_name.label("assignee_fn"),
+                    User.last_name.label("assignee_ln"),
+                ]
             )
+        if "labels" in task_fields:
+            columns.append(Task.labels_json().label("labels"))
+
+        tasks_qry = session.query(*columns)
+        if "assignee" in task_fields:
+            tasks_qry = tasks_qry.outerjoin(User, User.id == Task.assignee)
+        tasks_qry = tasks_qry.filter(*filters).order_by(Task.display_order).all()
 
         tasks = []
 
         for task in tasks_qry:
-            (
-                id_,
-                title,
-                description,
-                priority,
-                scheduled_for,
-                status,
-                display_order,
-                time_estimate,
-                scheduled_noti_period,
-                scheduled_noti_sent,
-                assignee_id,
-                assignee_uuid,
-                assignee_fn,
-                assignee_ln,
-                label_1,
-                label_2,
-                label_3,
-            ) = task
-
-            # convert labels to a list
-            labels = [label.as_dict() for label in [label_1, label_2, label_3] if label is not None]
+            task_dict = {field: getattr(task, field) for field in task_fields.fields if field in cls.task_columns}
 
             # convert dates
-            if scheduled_for is not None:
-                scheduled_for = pytz.utc.localize(scheduled_for)
-                scheduled_for = scheduled_for.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
+            for date_field in ("scheduled_for", "scheduled_notification_sent"):
+                if task_dict.get(date_field) is not None:
+                    task_dict[date_field] = format_date(task_dict[date_field])
 
-            if scheduled_noti_sent is not None:
-                scheduled_noti_sent = pytz.utc.localize(scheduled_noti_sent)
-                scheduled_noti_sent = scheduled_noti_sent.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
+            if "assignee" in task_fields:
+                if task.assignee_id is None:
+                    task_dict["assignee"] = None
+                else:
+                    task_dict["assignee"] = {
+                        "id": task.assignee_id,
+                        "uuid": task.assignee_uuid,
+                        "first_name": task.assignee_fn,
+                        "last_name": task.assignee_ln,
+                    }
 
-            if assignee_id is None:
-                assignee = None
-            else:
-                assignee = {
-                    "id": assignee_id,
-                    "uuid": assignee_uuid,
-                    "first_name": assignee_fn,
-                    "last_name": assignee_ln,
-                }
+            if "labels" in task_fields:
+                task_dict["labels"] = task.labels
 
-            tasks.append(
-                {
-                    "id": id_,
-                    "title": title,
-                    "description": description,
-                    "priority": priority,
-                    "status": status,
-                    "display_order": display_order,
-                    "assignee": assignee,
-                    "labels": labels,
-                    "scheduled_for": scheduled_for,
-                    "scheduled_notification_period": scheduled_noti_period,
-                    "scheduled_notification_sent": scheduled_noti_sent,
-                    "time_estimate": time_estimate,
-                }
-            )
+            tasks.append(task_dict)
 
-        log.info(f"Found {len(tasks)} tasks matching filters")
-        return {"tasks": tasks}, 200
+        return tasks
 
 
 @api.route("/completed")
@@ -242,73 +217,24 @@ class CompletedTasks(RequestValidationController):
         {"count": fields.Integer(), "tasks": fields.List(fields.Nested(completed_task_dto))},
     )
 
+    # the fields which are a user joined to the task
+    user_fields = ["assignee", "created_by", "finished_by"]
+
     @requires_jwt
     @authorize(Operations.GET, Resources.TASKS)
     @api.expect(request_dto, validate=True)
-    @api.marshal_with(response_dto, code=200)
+    @api.doc(params=SparseFields.docs(completed_task_dto))
+    @api.response(200, "Success", response_dto)
     def post(self, **kwargs):
         """Get all completed tasks"""
         req_user = kwargs["req_user"]
         request_body = request.get_json()
+        task_fields = SparseFields(request.args, self.completed_task_dto)
 
-        log.info("Getting completed tasks with filters", **request_body)
+        log.info("Getting completed tasks with filters", fields=task_fields, **request_body)
 
         with session_scope() as session:
-            label1, label2, label3 = aliased(TaskLabel), aliased(TaskLabel), aliased(TaskLabel)
-            assignee, created_by, finished_by = aliased(User), aliased(User), aliased(User)
-
-            # do some filtering
-            filters = [Task.org_id == req_user.org_id]
-
-            # filter by status
-            if request_body["filters"].get("status") is None:
-                status_filter = [TaskStatuses.COMPLETED, TaskStatuses.CANCELLED]
-            else:
-                status_filter = [request_body["filters"]["status"]]
-
-            filters.append(TaskStatus.status.in_(status_filter))
-
-            # filter by assignee
-            assignee_filter = request_body["filters"].get("assignee")
-            if assignee_filter is not None:
-                filters.append(assignee.id == assignee_filter)
-
-            # filter by labels
-            label_filter = request_body["filters"].get("labels")
-            if label_filter is not None:
-                for label_id in label_filter:
-                    filters.append(or_(label1.id == label_id, label2.id == label_id, label3.id == label_id))
-
-            qry = (
-                session.query(
-                    Task.id,
-                    Task.title,
-                    Task.started_at,
-                    Task.finished_at,
-                    TaskStatus,
-                    assignee.id,
-                    assignee.first_name,
-                    assignee.last_name,
-                    created_by.id,
-                    created_by.first_name,
-                    created_by.last_name,
-                    finished_by.id,
-                    finished_by.first_name,
-                    finished_by.last_name,
-                    label1,
-                    label2,
-                    label3,
-                )
-                .select_from(Task)
-                .join(TaskStatus, TaskStatus.status == Task.status)
-                .outerjoin(assignee, assignee.id == Task.assignee)
-                .outerjoin(created_by, created_by.id == Task.created_by)
-                .outerjoin(finished_by, finished_by.id == Task.finished_by)
-                .outerjoin(label1, label1.id == Task.label_1)
-                .outerjoin(label2, label2.id == Task.label_2)
-                .outerjoin(label3, label3.id == Task.label_3)
-                .filter(*filters)
-            )
+            qry = self._query(session, task_fields).filter(*self._filters(req_user, request_body["filters"]))
 
             # work out count efficiently
             count_qry = qry.statement.with_only_columns([func.count()]).order_by(None)
@@ -329,96 +255,131 @@ class CompletedTasks(RequestValidationController):
                 per_page=request_body["page_size"],
             )
 
-        tasks = []
+            time_spent_delayed = None
+            if "time_spent_delayed" in task_fields:
+                time_spent_delayed = self._calc_time_spent_delayed([task.id for task in task_paginator.items])
 
-        for task in task_paginator.items:
-            (
-                id_,
-                title,
-                started_at,
-                finished_at,
-                status,
-                assignee_id,
-                assignee_first_name,
-                assignee_last_name,
-                created_by_id,
-                created_by_first_name,
-                created_by_last_name,
-                finished_by_id,
-                finished_by_first_name,
-                finished_by_last_name,
-                label_1,
-                label_2,
-                label_3,
-            ) = task
-
-            # calc time to finish
-            if started_at is None:
-                time_to_finish_min = 0
-            else:
-                time_to_finish_date = finished_at - started_at
-                time_to_finish_min = time_to_finish_date.total_seconds() // 60
+        statuses = ReferenceData.statuses() if "status" in task_fields else None
+        tasks = [self._task_dict(task, task_fields, statuses, time_spent_delayed) for task in task_paginator.items]
 
-            # convert labels to a list
-            labels = [label.as_dict() for label in [label_1, label_2, label_3] if label is not None]
+        # we need to sort by time_to_finish or time_spent_delayed in place
+        if request_body["sort_by"] == "timeToFinish" and "time_to_finish" in task_fields:
+            tasks.sort(key=lambda x: x["time_to_finish"], reverse=(request_body["sort_direction"] == "desc"))
+        elif request_body["sort_by"] == "timeSpentDelayed" and "time_spent_delayed" in task_fields:
+            tasks.sort(key=lambda x: x["time_spent_delayed"], reverse=(request_body["sort_direction"] == "desc"))
 
-            finished_at = pytz.utc.localize(finished_at)
-            finished_at = finished_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
+        return task_fields.marshal({"count": count, "tasks": tasks}, self.response_dto, "tasks"), 200
 
-            tasks.append(
-                {
-                    "id": id_,
-                    "title": title,
-                    "finished_at": finished_at,
-                    "status": status.as_dict(),
-                    "assignee": {
-                        "id": assignee_id,
-                        "first_name": assignee_first_name,
-                        "last_name": assignee_last_name,
-                    },
-                    "created_by": {
-                        "id": created_by_id,
-                        "first_name": created_by_first_name,
-                        "last_name": created_by_last_name,
-                    },
-                    "finished_by": {
-                        "id": finished_by_id,
-                        "first_name": finished_by_first_name,
-                        "last_name": finished_by_last_name,
-                    },
-                    "labels": labels,
-                    "time_to_finish": time_to_finish_min,
-                    "time_spent_delayed": self._calc_time_spent_delayed(id_),
-                }
+    @staticmethod
+    def _filters(req_user: User, request_filters: dict) -> list:
+        """The filters for the tasks in the request"""
+        filters = [Task.org_id == req_user.org_id]
+
+        # filter by status
+        if request_filters.get("status") is None:
+            status_filter = [TaskStatuses.COMPLETED, TaskStatuses.CANCELLED]
+        else:
+            status_filter = [request_filters["status"]]
+
+        filters.append(Task.status.in_(status_filter))
+
+        # filter by assignee
+        assignee_filter = request_filters.get("assignee")
+        if assignee_filter is not None:
+            filters.append(Task.assignee == assignee_filter)
+
+        # filter by labels, the task must have all of them
+        label_filter = request_filters.get("labels")
+        if label_filter:
+            filters.append(Task.labels.contains(label_filter))
+
+        return filters
+
+    @classmethod
+    def _query(cls, session, task_fields: SparseFields):
+        """The query for the tasks, which only selects and joins what was asked for"""
+        columns = [Task.id, Task.title.label("title")]
+        if "finished_at" in task_fields or "time_to_finish" in task_fields:
+            columns.extend([Task.started_at.label("started_at"), Task.finished_at.label("finished_at")])
+        if "status" in task_fields:
+            columns.append(Task.status.label("status"))
+        users = [(field, aliased(User)) for field in cls.user_fields if field in task_fields]
+        for field, user in users:
+            columns.extend(
+                [
+                    user.id.label(f"{field}_id"),
+                    user.first_name.label(f"{field}_fn"),
+                    user.last_name.label(f"{field}_ln"),
+                ]
             )
+        if "labels" in task_fields:
+            columns.append(Task.labels_json().label("labels"))
+
+        qry = session.query(*columns).select_from(Task)
+        for field, user in users:
+            qry = qry.outerjoin(user, user.id == getattr(Task, field))
+        return qry
+
+    @classmethod
+    def _task_dict(
+        cls,
+        task,
+        task_fields: SparseFields,
+        statuses: typing.Union[dict, None],
+        time_spent_delayed: typing.Union[typing.Dict[int, int], None],
+    ) -> dict:
+        """Builds the task from its row, with only the selected fields"""
+        task_dict = {"id": task.id, "title": task.title}
+
+        if "finished_at" in task_fields:
+            task_dict["finished_at"] = format_date(task.finished_at)
+
+        # calc time to finish
+        if "time_to_finish" in task_fields:
+            if task.started_at is None:
+                task_dict["time_to_finish"] = 0
+            else:
+                time_to_finish_date = task.finished_at - task.started_at
+                task_dict["time_to_finish"] = time_to_finish_date.total_seconds() // 60
+
+        if "status" in task_fields:
+            task_dict["status"] = statuses[task.status]
+
+        for field in cls.user_fields:
+            if field in task_fields:
+                task_dict[field] = {
+                    "id": getattr(task, f"{field}_id"),
+                    "first_name": getattr(task, f"{field}_fn"),
+                    "last_name": getattr(task, f"{field}_ln"),
+                }
 
-        # we need to sort by time_to_finish or time_spent_delayed in place
-        if request_body["sort_by"] == "timeToFinish":
-            tasks.sort(key=lambda x: x["time_to_finish"], reverse=(request_body["sort_direction"] == "desc"))
-        elif request_body["sort_by"] == "timeSpentDelayed":
-            tasks.sort(key=lambda x: x["time_spent_delayed"], reverse=(request_body["sort_direction"] == "desc"))
+        if "labels" in task_fields:
+            task_dict["labels"] = task.labels
 
-        return {"count": count, "tasks": tasks}, 200
+        if "time_spent_delayed" in task_fields:
+            task_dict["time_spent_delayed"] = time_spent_delayed.get(task.id, 0)
+
+        return task_dict
 
     @staticmethod
-    def _calc_time_spent_delayed(task_id: int) -> int:
-        """Calculate how long a task was spent delayed"""
-        time_spent_delayed = 0
+    def _calc_time_spent_delayed(task_ids: typing.List[int]) -> typing.Dict[int, int]:
+        """Calculate how long each task was spent delayed, in minutes"""
+        if len(task_ids) == 0:
+            return {}
 
         with session_scope() as session:
             qry = (
-                session.query(DelayedTask.delayed_at, DelayedTask.expired)
-                .filter(DelayedTask.task_id == task_id, DelayedTask.expired != None)  # noqa
+                session.query(
+                    DelayedTask.task_id,
+                    func.sum(func.extract("epoch", DelayedTask.expired - DelayedTask.delayed_at)),
+                )
+                .filter(DelayedTask.task_id.in_(task_ids), DelayedTask.expired != None)  # noqa
+                .group_by(DelayedTask.task_id)
                 .all()
             )
 
-        for task in qry:
-            delayed_at, expired = task
-            # get the seconds it was delayed for
-            time_spent_delayed += (expired - delayed_at).total_seconds()
-
         # return as minutes
-        return time_spent_delayed // 60
+        return {task_id: int(seconds) // 60 for task_id, seconds in qry}
 
 
 @api.route("/scheduled")
@@ -500,3 +461,164 @@ class ScheduledTasks(RequestValidationController):
             )
 
         return {"tasks": tasks}, 200
+
+
+@api.route("/facets")
+class TaskFacets(RequestValidationController):
+    facet_dto = api.model("Task Facet Dto", {"value": fields.Raw(), "count": fields.Integer()})
+    response_dto = api.model(
+        "Task Facets Response",
+        {
+            "total": fields.Integer(),
+            "status": fields.List(fields.Nested(facet_dto)),
+            "assignee": fields.List(fields.Nested(facet_dto)),
+            "priority": fields.List(fields.Nested(facet_dto)),
+            "labels": fields.List(fields.Nested(facet_dto)),
+        },
+    )
+
+    @requires_jwt
+    @authorize(Operations.GET, Resources.TASKS)
+    @api.doc(params=get_tasks_schema_docs)
+    @api.marshal_with(response_dto, code=200)
+    def get(self, **kwargs):
+        """Get the number of tasks matching the filters by status, assignee, priority and label.
+        Unassigned tasks are counted under an assignee of null."""
+        req_user = kwargs["req_user"]
+
+        task_filters = Tasks.parse_filters()
+        log.info("Parsed request filters", filters=task_filters)
+
+        # a task is counted once under each of its labels, so everything else counts distinct tasks
+        label = func.unnest(Task.labels).table_valued("label_id").render_derived().lateral("task_label")
+        grouped = [Task.status, Task.assignee, Task.priority, label.c.label_id]
+
+        with session_scope() as session:
+            qry = (
+                session.query(func.grouping(*grouped).label("grouping_id"), *grouped, func.count(distinct(Task.id)))
+                .select_from(Task)
+                .outerjoin(label, true())
+                .filter(*task_filters.filters(req_user.org_id))
+                .group_by(func.grouping_sets(*[tuple_(column) for column in grouped], tuple_()))
+                .all()
+            )
+
+        # grouping() has a bit set for each column that isn't part of the row's grouping set
+        facets = {"total": 0, "status": [], "assignee": [], "priority": [], "labels": []}
+        for grouping_id, status, assignee, priority, label_id, count in qry:
+            if grouping_id == 0b0111:
+                facets["status"].append({"value": status, "count": count})
+            elif grouping_id == 0b1011:
+                facets["assignee"].append({"value": assignee, "count": count})
+            elif grouping_id == 0b1101:
+                facets["priority"].append({"value": priority, "count": count})
+            elif grouping_id == 0b1110 and label_id is not None:
+                facets["labels"].append({"value": label_id, "count": count})
+            elif grouping_id == 0b1111:
+                facets["total"] = count
+
+        for facet in ("status", "assignee", "priority", "labels"):
+            facets[facet].sort(key=lambda x: -x["count"])
+
+        log.info(f"Counted {facets['total']} tasks matching filters")
+        return facets, 200
+
+
+@api.route("/search")
+class SearchTasks(RequestValidationController):
+    max_limit = 50
+
+    search_result_dto = api.model(
+        "Search Tasks Result Dto",
+        {
+            "id": fields.Integer(),
+            "title": fields.String(),
+            "status": fields.String(),
+            "priority": fields.Integer(),
+            "assignee": fields.Nested(Tasks.user_dto, allow_null=True),
+            "rank": fields.Float(),
+        },
+    )
+    response_dto = api.model(
+        "Search Tasks Response",
+        {"tasks": fields.List(fields.Nested(search_result_dto)), "next_cursor": fields.String()},
+    )
+
+    @requires_jwt
+    @authorize(Operations.GET, Resources.TASKS)
+    @api.doc(
+        params={
+            "q": "The search, which supports quoted phrases, OR and - to exclude a word",
+            "limit": f"How many tasks to return, up to {max_limit}",
+            "cursor": "The next_cursor from the previous page",
+        }
+    )
+    @api.marshal_with(response_dto, code=200)
+    def get(self, **kwargs):
+        """Search the tasks' title, description and custom fields, best matches first"""
+        req_user = kwargs["req_user"]
+
+        q = request.args.get("q", "").strip()
+        if len(q) == 0:
+            raise ValidationError("q is required")
+        limit, cursor = page_args(request.args, self.max_limit, 20)
+
+        query = func.websearch_to_tsquery("english", q)
+        # ts_rank_cd is a real, which is compared with the float in the cursor as a double. casting it means that the
+        # rank in the cursor is exactly the one that was sorted on, otherwise tied ranks can repeat or skip rows
+        rank = cast(func.ts_rank_cd(Task.search_document(), query), Float(53))
+
+        with session_scope() as session:
+            qry = (
+                session.query(
+                    Task.id,
+                    Task.title,
+                    Task.status,
+                    Task.priority,
+                    User.id.label("assignee_id"),
+                    User.uuid.label("assignee_uuid"),
+                    User.first_name.label("assignee_fn"),
+                    User.last_name.label("assignee_ln"),
+                    rank.label("rank"),
+                )
+                .outerjoin(User, User.id == Task.assignee)
+                .filter(Task.org_id == req_user.org_id, Task.search_document().op("@@")(query))
+            )
+
+            # keyset pagination, so a later page is as cheap as the first
+            if cursor is not None:
+                try:
+                    last_rank, last_id = decode_cursor(cursor)
+                    qry = qry.filter(tuple_(rank, Task.id) < tuple_(float(last_rank), int(last_id)))
+                except (TypeError, ValueError):
+                    raise ValidationError("Invalid cursor")
+
+            # one extra to know if there's another page
+            results = qry.order_by(rank.desc(), Task.id.desc()).limit(limit + 1).all()
+
+        tasks = []
+        for task in results[:limit]:
+            if task.assignee_id is None:
+                assignee = None
+            else:
+                assignee = {
+                    "id": task.assignee_id,
+                    "uuid": task.assignee_uuid,
+                    "first_name": task.assignee_fn,
+                    "last_name": task.assignee_ln,
+                }
+            tasks.append(
+                {
+                    "id": task.id,
+                    "title": task.title,
+                    "status": task.status,
+                    "priority": task.priority,
+                    "assignee": assignee,
+                    "rank": task.rank,
+                }
+            )
+
+        next_cursor = encode_cursor([tasks[-1]["rank"], tasks[-1]["id"]]) if len(results) > limit else None
+
+        log.info(f"Found {len(tasks)} tasks matching the search")
+        return {"tasks": tasks, "next_cursor": next_cursor}, 200
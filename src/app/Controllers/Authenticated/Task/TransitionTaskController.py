@@ -1,15 +1,16 @@
+import typing
+
 from flask import request
 from flask_restx import Namespace, fields
 
 import structlog
-from sqlalchemy.orm import aliased
 
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
 from app.Extensions.Database import session_scope
 from app.Extensions.Errors import ValidationError
-from app.Models import GetTasksFilters, GetTasksFiltersSchema, get_tasks_schema_docs
-from app.Models.Dao import TaskLabel, Task, User
+from app.Models import GetTasksFilters, get_tasks_filters_schema, get_tasks_schema_docs
+from app.Models.Dao import Task, User
 from app.Models.Enums import TaskStatuses, Operations, Resources, Roles
 from app.Utilities.All import reindex_display_orders, get_task_by_id
 
@@ -33,6 +34,7 @@ class TransitionTask(RequestValidationController):
     @authorize(Operations.TRANSITION, Resources.TASK)
     @api.expect(request_dto, validate=True)
     @api.response(204, "Success")
+    @api.response(412, "The task has changed since the If-Match version")
     def put(self, **kwargs):
         """Transitions a task to another status"""
         req_user: User = kwargs["req_user"]
@@ -45,16 +47,17 @@ class TransitionTask(RequestValidationController):
             log.info("Transition request from user")
             task = self.validate_transition_task(**kwargs)
 
+        self.check_if_match(task)
         task.transition(request_body["task_status"], kwargs["req_user"])
 
         # update the display order
         display_order = request_body.get("display_order", 0)
-        reindex_display_orders(task.org_id, new_position=display_order)
+        reindex_display_orders(task.org_id, new_position=display_order, exclude_task_id=task.id)
         with session_scope():
             log.info("Changing task display order", old=task.display_order, new=display_order)
             task.display_order = display_order
 
-        return "", 204
+        return "", 204, {"ETag": Task.etag(task.row_version)}
 
     task_transition_dto = api.model(
         "Get Task Transitions Dto",
@@ -70,48 +73,49 @@ class TransitionTask(RequestValidationController):
         req_user: User = kwargs["req_user"]
 
         # validate the filtering arguments
-        arg_errors = GetTasksFiltersSchema().validate(request.args)
+        arg_errors = get_tasks_filters_schema.validate(request.args)
         if arg_errors:
             raise ValidationError(arg_errors)
 
         task_filters = GetTasksFilters(request.args)
         log.info("Parsed request filters", filters=task_filters)
 
-        valid_unassigned_transitions = {
-            TaskStatuses.READY: [TaskStatuses.READY],
-            TaskStatuses.SCHEDULED: [TaskStatuses.READY],
-        }
-        valid_assigned_transitions = {
-            TaskStatuses.READY: [TaskStatuses.READY, TaskStatuses.IN_PROGRESS, TaskStatuses.CANCELLED],
-            TaskStatuses.IN_PROGRESS: [
-                TaskStatuses.IN_PROGRESS,
-                TaskStatuses.DELAYED,
-                TaskStatuses.COMPLETED,
-                TaskStatuses.CANCELLED,
-            ],
-            TaskStatuses.DELAYED: [TaskStatuses.DELAYED, TaskStatuses.IN_PROGRESS, TaskStatuses.CANCELLED],
-            TaskStatuses.SCHEDULED: [TaskStatuses.READY],
-        }
-
         with session_scope() as session:
-            label1, label2, label3 = aliased(TaskLabel), aliased(TaskLabel), aliased(TaskLabel)
-            filters = task_filters.filters(req_user.org_id, label1, label2, label3)
+            filters = task_filters.filters(req_user.org_id)
             tasks = session.query(Task.id, Task.status, Task.assignee).filter(*filters).all()
 
-        # handle case where no-one is assigned to the task
-        all_task_transitions = []
-        for task_id, task_status, task_assignee in tasks:
-            this_task_transitions = {"task_id": task_id, "valid_transitions": []}
-
-            if task_assignee is None:
-                this_task_transitions["valid_transitions"] += valid_unassigned_transitions.get(task_status, [])
-            elif req_user.role == Roles.USER and task_assignee != req_user.id:
-                # USERs can only transition their own tasks
-                this_task_transitions["valid_transitions"] += [task_status]
-            else:
-                this_task_transitions["valid_transitions"] += valid_assigned_transitions.get(task_status, [])
-
-            all_task_transitions.append(this_task_transitions)
+        all_task_transitions = [
+            {"task_id": task_id, "valid_transitions": self.valid_transitions(req_user, task_status, task_assignee)}
+            for task_id, task_status, task_assignee in tasks
+        ]
 
         log.info(f"Found {len(all_task_transitions)} task transitions matching filters")
         return all_task_transitions, 200
+
+    valid_unassigned_transitions = {
+        TaskStatuses.READY: [TaskStatuses.READY],
+        TaskStatuses.SCHEDULED: [TaskStatuses.READY],
+    }
+    valid_assigned_transitions = {
+        TaskStatuses.READY: [TaskStatuses.READY, TaskStatuses.IN_PROGRESS, TaskStatuses.CANCELLED],
+        TaskStatuses.IN_PROGRESS: [
+            TaskStatuses.IN_PROGRESS,
+            TaskStatuses.DELAYED,
+            TaskStatuses.COMPLETED,
+            TaskStatuses.CANCELLED,
+        ],
+        TaskStatuses.DELAYED: [TaskStatuses.DELAYED, TaskStatuses.IN_PROGRESS, TaskStatuses.CANCELLED],
+        TaskStatuses.SCHEDULED: [TaskStatuses.READY],
+    }
+
+    @classmethod
+    def valid_transitions(cls, req_user: User, task_status: str, task_assignee: typing.Union[int, None]) -> list:
+        """Returns the statuses that the user can transition a task to"""
+        if task_assignee is None:
+            # handle case where no-one is assigned to the task
+            return list(cls.valid_unassigned_transitions.get(task_status, []))
+        elif req_user.role == Roles.USER and task_assignee != req_user.id:
+            # USERs can only transition their own tasks
+            return [task_status]
+        else:
+            return list(cls.valid_assigned_transitions.get(task_status, []))
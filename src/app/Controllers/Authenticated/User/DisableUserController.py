@@ -27,13 +27,10 @@ class DisableUserController(RequestValidationController):
         if user_to_disable.disabled is not None:
             raise ValidationError("User is already disabled.")
 
-        with session_scope() as session:
+        with session_scope():
             user_to_disable.disabled = datetime.datetime.utcnow()
-            users_tasks = session.query(Task).filter_by(assignee=user_to_disable.id).all()
 
-        # drop tasks
-        for task in users_tasks:
-            task.drop(req_user)
+        Task.drop_all(user_to_disable, req_user)
 
         Event(
             org_id=req_user.org_id,
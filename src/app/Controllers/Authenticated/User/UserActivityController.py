@@ -1,9 +1,12 @@
 import structlog
+from flask import current_app, request
 from flask_restx import Namespace, fields
 
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
+from app.Models.Activity import ACTIVITY_DEFAULT_LIMIT, ACTIVITY_MAX_LIMIT
 from app.Models.Enums import Operations, Resources
+from app.Utilities.All import page_args
 
 api = Namespace(path="/user/activity", name="User", description="Manage a user")
 log = structlog.getLogger()
@@ -11,19 +14,27 @@ log = structlog.getLogger()
 
 @api.route("/<int:user_id>")
 class UserActivityController(RequestValidationController):
-
     activity_dto = api.model(
         "Activity",
         {"activity": fields.String(), "activity_timestamp": fields.String(), "event_friendly": fields.String()},
     )
-    activity_response_dto = api.model("Activity Model", {"activity": fields.List(fields.Nested(activity_dto))})
+    activity_response_dto = api.model(
+        "Activity Model", {"activity": fields.List(fields.Nested(activity_dto)), "next_cursor": fields.String()}
+    )
 
     @requires_jwt
     @authorize(Operations.GET, Resources.USER_ACTIVITY)
+    @api.doc(
+        params={
+            "limit": f"How much activity to return, up to {ACTIVITY_MAX_LIMIT}",
+            "cursor": "The next_cursor from the previous page",
+        }
+    )
     @api.marshal_with(activity_response_dto, code=200)
     def get(self, user_id: int, **kwargs):
-        """Returns the activity for a user"""
+        """Returns the activity for a user, newest first"""
         req_user = kwargs["req_user"]
+        limit, cursor = page_args(request.args, ACTIVITY_MAX_LIMIT, ACTIVITY_DEFAULT_LIMIT)
 
         # TODO limit the history based on plan
         # subscription = Subscription(req_user.orgs.chargebee_subscription_id)
@@ -31,4 +42,5 @@ class UserActivityController(RequestValidationController):
         user = self.validate_get_user_activity(user_id, **kwargs)
         req_user.log(Operations.GET, Resources.USER_ACTIVITY, resource_id=user.id)
         log.info(f"getting activity for user with id {user.id}")
-        return {"activity": user.activity()}, 200
+        activity, next_cursor = user.activity(current_app.config["USER_ACTIVITY_HISTORY_DAYS"], limit, cursor)
+        return {"activity": activity, "next_cursor": next_cursor}, 200
@@ -0,0 +1,257 @@
+import csv
+import io
+import typing
+
+import structlog
+from email_validator import validate_email, EmailNotValidError
+from flask import request, current_app
+from flask_restx import Namespace, fields
+from sqlalchemy import func
+
+from app.Controllers.Base import RequestValidationController
+from app.Decorators import requires_jwt, authorize
+from app.Extensions.Database import session_scope, after_commit
+from app.Extensions.Errors import AuthorizationError, ValidationError
+from app.Models import Event, Email, ReferenceData, Subscription, UserSetting
+from app.Models.Dao import User, UserPasswordToken
+from app.Models.Enums import Operations, Resources, Events
+from app.Models.RBAC import Log
+
+api = Namespace(path="/users/import", name="Users", description="Manage a user or users")
+log = structlog.getLogger()
+
+
+class NullableString(fields.String):
+    __schema_type__ = ["string", "null"]
+    __schema_example__ = "nullable string"
+
+
+@api.route("/")
+class UserImport(RequestValidationController):
+    max_users = 500
+    roles = ["ORG_ADMIN", "DELEGATOR", "USER"]
+    columns = ["email", "role_id", "first_name", "last_name", "job_title"]
+
+    import_user_dto = api.model(
+        "Import User",
+        {
+            "email": fields.String(required=True),
+            "role_id": fields.String(enum=roles, required=True),
+            "first_name": fields.String(required=True),
+            "last_name": fields.String(required=True),
+            "job_title": NullableString(),
+        },
+    )
+    import_users_request = api.model(
+        "Import Users Request",
+        {"users": fields.List(fields.Nested(import_user_dto), required=True, min_items=1, max_items=max_users)},
+    )
+    imported_user_dto = api.model(
+        "Imported User",
+        {
+            "id": fields.Integer(),
+            "uuid": fields.String(),
+            "email": fields.String(),
+            "first_name": fields.String(),
+            "last_name": fields.String(),
+            "role": fields.String(),
+            "job_title": fields.String(),
+        },
+    )
+    import_users_response = api.model("Import Users Response", {"users": fields.List(fields.Nested(imported_user_dto))})
+
+    @requires_jwt
+    @authorize(Operations.CREATE, Resources.USER)
+    @api.expect(import_users_request)
+    @api.response(400, "The rows that are invalid")
+    @api.marshal_with(import_users_response, code=200)
+    def post(self, **kwargs):
+        """Create users from a JSON body or a CSV upload with the columns email,role_id,first_name,last_name,job_title.
+        Either every user is created or none are."""
+        req_user: User = kwargs["req_user"]
+
+        if req_user.is_service_account:
+            raise AuthorizationError("Invalid requester - users can only be imported by users")
+
+        rows = self._read_rows()
+        self._validate_rows(req_user, rows)
+
+        with session_scope() as session:
+            users = [
+                User(
+                    org_id=req_user.org_id,
+                    email=row["email"],
+                    first_name=row["first_name"],
+                    last_name=row["last_name"],
+                    role=row["role_id"],
+                    job_title=row.get("job_title"),
+                    created_by=req_user.id,
+                )
+                for row in rows
+            ]
+            session.add_all(users)
+            session.flush()
+
+            password_tokens = [UserPasswordToken(user.id) for user in users]
+            session.add_all(password_tokens)
+            session.add_all(
+                [
+                    Log(
+                        org_id=req_user.org_id,
+                        user_id=req_user.id,
+                        operation=Operations.CREATE,
+                        resource=Resources.USER,
+                        resource_id=user.id,
+                    )
+                    for user in users
+                ]
+            )
+            imported = [
+                {
+                    "id": user.id,
+                    "uuid": user.uuid,
+                    "email": user.email,
+                    "first_name": user.first_name,
+                    "last_name": user.last_name,
+                    "role": user.role,
+                    "job_title": user.job_title,
+                }
+                for user in users
+            ]
+
+            setup_link = current_app.config["PUBLIC_WEB_URL"] + "/account-setup?token="
+            Email.send_welcome_new_users(
+                [(user, setup_link + token.token) for user, token in zip(users, password_tokens)], inviter=req_user
+            )
+
+        # S3 and DynamoDB aren't transactional so they're only written to once the users exist
+        after_commit(User.create_default_avatars, [user["uuid"] for user in imported])
+        after_commit(UserSetting.batch_update, [UserSetting(user["id"]) for user in imported])
+
+        for user in imported:
+            Event(
+                org_id=req_user.org_id,
+                event=Events.user_created,
+                event_id=user["id"],
+                event_friendly=f"Created by {req_user.name()}.",
+            ).publish()
+        Event(
+            org_id=req_user.org_id,
+            event=Events.user_created_user,
+            event_id=req_user.id,
+            event_friendly=f"Imported {len(imported)} users.",
+        ).publish()
+
+        # one change to the chargebee subscription plan_quantity for all of the users
+        subscription = Subscription(req_user.orgs.chargebee_subscription_id)
+        subscription.increment_subscription(req_user, quantity=len(imported))
+
+        log.info(f"User {req_user.id} imported {len(imported)} users")
+        return {"users": imported}, 200
+
+    def _read_rows(self) -> typing.List[dict]:
+        """Reads the users from a CSV upload, a CSV body or a JSON body"""
+        if "file" in request.files or request.mimetype == "text/csv":
+            if "file" in request.files:
+                content = request.files["file"].read()
+            else:
+                content = request.get_data()
+            try:
+                # utf-8-sig since spreadsheets like to start their CSVs with a BOM
+                reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+                missing = {"email", "role_id", "first_name", "last_name"} - set(reader.fieldnames or [])
+                if len(missing) > 0:
+                    raise ValidationError(f"CSV is missing the columns {', '.join(sorted(missing))}")
+                rows = [{k: (row.get(k) or "").strip() or None for k in self.columns} for row in reader]
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise ValidationError(f"Couldn't read the CSV - {e}")
+        else:
+            request_body = request.get_json(silent=True)
+            if not isinstance(request_body, dict) or not isinstance(request_body.get("users"), list):
+                raise ValidationError("Expected a list of users or a CSV file")
+            rows = list(request_body["users"])
+
+        if len(rows) == 0:
+            raise ValidationError("There are no users to import")
+        if len(rows) > self.max_users:
+            raise ValidationError(f"Can only import {self.max_users} users at a time")
+        return rows
+
+    def _validate_rows(self, req_user: User, rows: typing.List[dict]) -> None:
+        """Validates every row at once and raises a ValidationError listing each invalid row"""
+        # only the first error for each row is reported
+        errors = {}
+        seen = self._validate_fields(rows, errors)
+        self._validate_domains(rows, seen, errors)
+        self._validate_unique(seen, errors)
+        self._validate_roles(req_user, rows, errors)
+
+        if len(errors) > 0:
+            raise ValidationError(
+                f"{len(errors)} of {len(rows)} users are invalid",
+                payload={
+                    "errors": [
+                        {"row": i + 1, "email": rows[i].get("email"), "msg": msg} for i, msg in sorted(errors.items())
+                    ]
+                },
+            )
+
+    def _validate_fields(self, rows: typing.List[dict], errors: dict) -> dict:
+        """Checks each row's fields, returns the row of each valid email without duplicates"""
+        seen = {}
+        for i, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors.setdefault(i, "Expected a user")
+                rows[i] = {}
+                continue
+            for field in ("email", "role_id", "first_name", "last_name"):
+                if not isinstance(row.get(field), str) or len(row[field]) == 0:
+                    errors.setdefault(i, f"{field} is required")
+            if row.get("role_id") not in self.roles:
+                errors.setdefault(i, f"role_id must be one of {', '.join(self.roles)}")
+            if i in errors:
+                continue
+            try:
+                # deliverability is checked once per domain rather than once per email
+                validate_email(row["email"], check_deliverability=False)
+            except EmailNotValidError as e:
+                errors.setdefault(i, str(e))
+                continue
+            email = row["email"].lower()
+            if email in seen:
+                errors.setdefault(i, f"{row['email']} is the same as row {seen[email] + 1}")
+            seen.setdefault(email, i)
+        return seen
+
+    @staticmethod
+    def _validate_domains(rows: typing.List[dict], seen: dict, errors: dict) -> None:
+        """Checks that each domain can receive email"""
+        domains = {}
+        for email, i in seen.items():
+            domains.setdefault(email.rsplit("@", 1)[1], []).append(i)
+        for rows_in_domain in domains.values():
+            try:
+                validate_email(rows[rows_in_domain[0]]["email"])
+            except EmailNotValidError as e:
+                for i in rows_in_domain:
+                    errors.setdefault(i, str(e))
+
+    @staticmethod
+    def _validate_unique(seen: dict, errors: dict) -> None:
+        """Checks that none of the users exist already"""
+        with session_scope() as session:
+            existing = {
+                email.lower() for email, in session.query(User.email).filter(func.lower(User.email).in_(list(seen)))
+            }
+        for email in existing:
+            errors.setdefault(seen[email], "User already exists")
+
+    @staticmethod
+    def _validate_roles(req_user: User, rows: typing.List[dict], errors: dict) -> None:
+        """Checks that the requester can give each role"""
+        roles = ReferenceData.roles()
+        req_user_rank = roles[req_user.role]["rank"]
+        for i, row in enumerate(rows):
+            role = row.get("role_id")
+            if role in roles and roles[role]["rank"] < req_user_rank:
+                errors.setdefault(i, f"No permissions to pass the role {role} on")
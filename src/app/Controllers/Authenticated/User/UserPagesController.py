@@ -2,7 +2,7 @@ import structlog
 from flask_restx import Namespace, fields
 
 from app.Controllers.Base import RequestValidationController
-from app.Decorators import requires_jwt, authorize
+from app.Decorators import requires_jwt, authorize, cache_reference_data
 from app.Extensions.Database import session_scope
 from app.Models.Enums import Operations, Resources
 from app.Models.RBAC import Permission
@@ -15,6 +15,8 @@ log = structlog.getLogger()
 class UserPagesController(RequestValidationController):
     @requires_jwt
     @authorize(Operations.GET, Resources.PAGES)
+    @cache_reference_data
+    @api.response(304, "Not Modified")
     @api.response(200, "Success", fields.List(fields.String()))
     def get(self, **kwargs):
         """Returns the pages a user can access"""
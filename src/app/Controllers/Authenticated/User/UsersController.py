@@ -1,20 +1,21 @@
 import datetime
-import pytz
+import typing
 
 import structlog
 from flask import request, current_app
 from flask_restx import Namespace, fields
-from sqlalchemy import and_
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import aliased
 
 from app.Extensions.Database import session_scope
-from app.Extensions.Errors import AuthorizationError
+from app.Extensions.Errors import AuthorizationError, ValidationError
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt, authorize
-from app.Models import Event, Email, Subscription
-from app.Models.Dao import User, UserPasswordToken, ActiveUser
+from app.Models import Event, Email, SparseFields, Subscription
+from app.Models.Dao import User, UserPasswordToken, ActiveUser, Task
 from app.Models.Enums import Operations, Resources, Events, Roles
 from app.Models.RBAC import Role
+from app.Utilities.All import format_date, page_args
 
 api = Namespace(path="/users", name="Users", description="Manage a user or users")
 log = structlog.getLogger()
@@ -49,33 +50,79 @@ class MinimalUsers(RequestValidationController):
 
     @requires_jwt
     @authorize(Operations.GET, Resources.USERS)
-    @api.marshal_with(get_min_users_response, code=200)
+    @api.doc(params=SparseFields.docs(min_user_response))
+    @api.response(200, "Success", get_min_users_response)
     def get(self, **kwargs):
         """Get all users with minimal dto"""
         req_user = kwargs["req_user"]
+        user_fields = SparseFields(request.args, self.min_user_response)
 
         with session_scope() as session:
             users_qry = (
-                session.query(User.id, User.uuid, User.email, User.first_name, User.last_name, User.job_title)
+                session.query(*[getattr(User, field).label(field) for field in user_fields.fields])
                 .filter(and_(User.org_id == req_user.org_id, User.deleted == None))  # noqa
                 .all()
             )
 
-        users = []
+        users = [user._asdict() for user in users_qry]
 
-        for user in users_qry:
-            id_, uuid_, email, first_name, last_name, job_title = user
-            users.append(
+        req_user.log(Operations.GET, Resources.USERS)
+        return user_fields.marshal({"users": users}, self.get_min_users_response, "users"), 200
+
+
+@api.route("/search")
+class SearchUsers(RequestValidationController):
+    max_limit = 50
+
+    @requires_jwt
+    @authorize(Operations.GET, Resources.USERS)
+    @api.doc(
+        params={
+            "q": "Matched anywhere in the user's name, email or job title",
+            "limit": f"How many users to return, up to {max_limit}",
+        }
+    )
+    @api.marshal_with(MinimalUsers.get_min_users_response, code=200)
+    def get(self, **kwargs):
+        """Search users for a typeahead, users whose name or email starts with the search come first"""
+        req_user = kwargs["req_user"]
+
+        q = request.args.get("q", "").strip().lower()
+        if len(q) == 0:
+            raise ValidationError("q is required")
+        limit, _ = page_args(request.args, self.max_limit, 10)
+
+        # the search text has to be the same expression as users_search_trgm_idx
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with session_scope() as session:
+            users_qry = session.execute(
+                """ SELECT id, uuid, email, first_name, last_name, job_title
+                    FROM users
+                    WHERE org_id = :org_id
+                    AND deleted IS NULL
+                    AND lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' ||
+                              coalesce(email, '') || ' ' || coalesce(job_title, '')) LIKE :contains
+                    ORDER BY (lower(first_name) LIKE :prefix
+                              OR lower(last_name) LIKE :prefix
+                              OR lower(first_name || ' ' || last_name) LIKE :prefix
+                              OR lower(email) LIKE :prefix) DESC,
+                             similarity(lower(first_name || ' ' || last_name), :q) DESC,
+                             first_name,
+                             last_name,
+                             id
+                    LIMIT :limit
+                """,
                 {
-                    "id": id_,
-                    "uuid": uuid_,
-                    "email": email,
-                    "first_name": first_name,
-                    "last_name": last_name,
-                    "job_title": job_title,
-                }
+                    "org_id": req_user.org_id,
+                    "q": q,
+                    "contains": f"%{escaped}%",
+                    "prefix": f"{escaped}%",
+                    "limit": limit,
+                },
             )
+            users = [dict(user) for user in users_qry]
 
+        log.info(f"Found {len(users)} users matching the search")
         req_user.log(Operations.GET, Resources.USERS)
         return {"users": users}, 200
 
@@ -114,63 +161,155 @@ class UserController(RequestValidationController):
             "invite_expires_in": NullableInteger,
         },
     )
-    get_users_response = api.model("Get Users Response", {"users": fields.List(fields.Nested(user_response))})
+    get_users_response = api.model(
+        "Get Users Response", {"count": fields.Integer(), "users": fields.List(fields.Nested(user_response))}
+    )
+    max_page_size = 100
+    get_users_params = {
+        "page_index": {"description": "The page to return, starting from 0", "in": "query", "type": "int"},
+        "page_size": {
+            "description": f"How many users to return per page, up to {max_page_size}. All users are returned if "
+            "this isn't given.",
+            "in": "query",
+            "type": "int",
+        },
+        "role": {
+            "description": "Filter users by their role. The value is a comma separated list of roles: e.g. USER,LOCKED",
+            "in": "query",
+            "type": "str",
+        },
+        "disabled": {"description": "Filter users by whether they're disabled: true or false", "in": "query"},
+    }
+
+    # the fields which are looked up separately to the user
+    joined_fields = ["role", "created_by", "updated_by", "last_active", "invite_expires_in"]
 
     @requires_jwt
     @authorize(Operations.GET, Resources.USERS)
-    @api.marshal_with(get_users_response, code=200)
+    @api.doc(params={**get_users_params, **SparseFields.docs(user_response)})
+    @api.response(200, "Success", get_users_response)
     def get(self, **kwargs):
-        """Get all users"""
+        """Get all users, or a page of them, ordered by name"""
         req_user = kwargs["req_user"]
+        user_fields = SparseFields(request.args, self.user_response)
+        page_index, page_size, roles, disabled = self._parse_args()
 
-        # query for all users in the requesting user's organisation
         with session_scope() as session:
-            this_user, created_by, updated_by = aliased(User), aliased(User), aliased(User)
-            users_qry = (
-                session.query(
-                    this_user,
-                    Role,
-                    created_by.first_name,
-                    created_by.last_name,
-                    updated_by.first_name,
-                    updated_by.last_name,
-                    ActiveUser.last_active,
-                )
-                .join(Role, Role.id == this_user.role)
-                .join(created_by, created_by.id == this_user.created_by)
-                .outerjoin(updated_by, updated_by.id == this_user.updated_by)
-                .outerjoin(ActiveUser, ActiveUser.user_id == this_user.id)
-                .filter(and_(this_user.org_id == req_user.org_id, this_user.deleted == None))  # noqa
-                .all()
-            )
-
-        users = []
+            users_qry = self._query(session, user_fields, req_user.org_id, roles, disabled)
 
-        for user in users_qry:
-            (user_, role, created_by_fn, created_by_ln, updated_by_fn, updated_by_ln, last_active) = user
-
-            created_by = created_by_fn + " " + created_by_ln
-
-            if updated_by_fn is not None and updated_by_ln is not None:
-                updated_by = updated_by_fn + " " + updated_by_ln
+            if page_size is None:
+                users_qry = users_qry.all()
+                count = len(users_qry)
             else:
-                updated_by = None
+                count_qry = users_qry.statement.with_only_columns([func.count()]).order_by(None)
+                count = session.execute(count_qry).scalar()
+                users_qry = users_qry.limit(page_size).offset(page_index * page_size).all()
 
-            if last_active is not None:
-                last_active = pytz.utc.localize(last_active)
-                last_active = last_active.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
+        users = [self._user_dict(user, user_fields) for user in users_qry]
 
-            user_dict = user_.as_dict()
-            user_dict["created_by"] = created_by
-            user_dict["updated_by"] = updated_by
-            user_dict["last_active"] = last_active
-            user_dict["role"] = role.as_dict()
+        log.info(f"found {len(users)} of {count} users.")
+        req_user.log(Operations.GET, Resources.USERS)
+        return user_fields.marshal({"count": count, "users": users}, self.get_users_response, "users"), 200
+
+    @staticmethod
+    def _query(
+        session,
+        user_fields: SparseFields,
+        org_id: int,
+        roles: typing.Union[list, None],
+        disabled: typing.Union[bool, None],
+    ):
+        """Queries for the users in the requesting user's organisation, only joining what was asked for"""
+        this_user, created_by, updated_by = aliased(User), aliased(User), aliased(User)
+        columns = [this_user]
+        if "role" in user_fields:
+            columns.append(Role)
+        if "created_by" in user_fields:
+            columns.extend([created_by.first_name.label("created_by_fn"), created_by.last_name.label("created_by_ln")])
+        if "updated_by" in user_fields:
+            columns.extend([updated_by.first_name.label("updated_by_fn"), updated_by.last_name.label("updated_by_ln")])
+        if "last_active" in user_fields:
+            columns.append(ActiveUser.last_active.label("last_active"))
+        if "invite_expires_in" in user_fields:
+            columns.append((UserPasswordToken.created_at + UserPasswordToken.expire_after).label("invite_expires_at"))
+
+        users_qry = session.query(*columns).select_from(this_user)
+        if "role" in user_fields:
+            users_qry = users_qry.join(Role, Role.id == this_user.role)
+        if "created_by" in user_fields:
+            users_qry = users_qry.join(created_by, created_by.id == this_user.created_by)
+        if "updated_by" in user_fields:
+            users_qry = users_qry.outerjoin(updated_by, updated_by.id == this_user.updated_by)
+        if "last_active" in user_fields:
+            users_qry = users_qry.outerjoin(ActiveUser, ActiveUser.user_id == this_user.id)
+        if "invite_expires_in" in user_fields:
+            users_qry = users_qry.outerjoin(UserPasswordToken, UserPasswordToken.user_id == this_user.id)
+        users_qry = users_qry.filter(this_user.org_id == org_id, this_user.deleted == None)  # noqa
+        if roles is not None:
+            users_qry = users_qry.filter(this_user.role.in_(roles))
+        if disabled is True:
+            users_qry = users_qry.filter(this_user.disabled != None)  # noqa
+        elif disabled is False:
+            users_qry = users_qry.filter(this_user.disabled == None)  # noqa
+        return users_qry.order_by(this_user.first_name, this_user.last_name, this_user.id)
+
+    def _user_dict(self, user, user_fields: SparseFields) -> dict:
+        """Builds the user from its row, with only the selected fields"""
+        # the user is the only entity when nothing is joined
+        user_ = user if isinstance(user, User) else user[0]
+        user_dict = user_.as_dict(fields=[f for f in user_fields.fields if f not in self.joined_fields])
+
+        if "created_by" in user_fields:
+            user_dict["created_by"] = user.created_by_fn + " " + user.created_by_ln
+
+        if "updated_by" in user_fields:
+            if user.updated_by_fn is not None and user.updated_by_ln is not None:
+                user_dict["updated_by"] = user.updated_by_fn + " " + user.updated_by_ln
+            else:
+                user_dict["updated_by"] = None
 
-            users.append(user_dict)
+        if "last_active" in user_fields:
+            user_dict["last_active"] = format_date(user.last_active)
 
-        log.info(f"found {len(users)} users.")
-        req_user.log(Operations.GET, Resources.USERS)
-        return {"users": users}, 200
+        if "invite_expires_in" in user_fields:
+            if user_.invite_accepted():
+                user_dict["invite_expires_in"] = None
+            else:
+                user_dict["invite_expires_in"] = User.minutes_until(user.invite_expires_at)
+
+        if "role" in user_fields:
+            user_dict["role"] = user.Role.as_dict()
+
+        return user_dict
+
+    def _parse_args(self) -> tuple:
+        """Parses the pagination and filtering arguments"""
+        try:
+            page_index = int(request.args.get("page_index", 0))
+            page_size = request.args.get("page_size")
+            page_size = None if page_size is None else int(page_size)
+        except ValueError:
+            raise ValidationError("page_index and page_size must be integers")
+        if page_index < 0:
+            raise ValidationError("page_index can't be negative")
+        if page_size is not None and not 1 <= page_size <= self.max_page_size:
+            raise ValidationError(f"page_size must be between 1 and {self.max_page_size}")
+
+        roles = request.args.get("role")
+        if roles:
+            roles = roles.split(",")
+            invalid = [r for r in roles if r not in Roles.all]
+            if len(invalid) > 0:
+                raise ValidationError(f"{', '.join(invalid)} aren't roles, role must be some of {', '.join(Roles.all)}")
+        else:
+            roles = None
+
+        disabled = request.args.get("disabled")
+        if disabled not in [None, "true", "false"]:
+            raise ValidationError("disabled must be true or false")
+        disabled = None if disabled is None else disabled == "true"
+
+        return page_index, page_size, roles, disabled
 
     create_user_request = api.model(
         "Create User Request",
@@ -286,6 +425,11 @@ class UserController(RequestValidationController):
             with session_scope():
                 user_to_update.email = request_body["email"]
 
+        name_changed = (user_to_update.first_name, user_to_update.last_name) != (
+            request_body["first_name"],
+            request_body["last_name"],
+        )
+
         with session_scope():
             user_to_update.role = request_body["role_id"]
             user_to_update.first_name = request_body["first_name"]
@@ -294,6 +438,17 @@ class UserController(RequestValidationController):
             user_to_update.updated_at = datetime.datetime.utcnow()
             user_to_update.updated_by = req_user.id
 
+        # the user's name is shown on the tasks they're involved in
+        if name_changed:
+            Task.bump_row_versions(
+                user_to_update.org_id,
+                or_(
+                    Task.assignee == user_to_update.id,
+                    Task.created_by == user_to_update.id,
+                    Task.finished_by == user_to_update.id,
+                ),
+            )
+
         Event(
             org_id=user_to_update.org_id,
             event=Events.user_updated,
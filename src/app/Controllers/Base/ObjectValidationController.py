@@ -1,22 +1,55 @@
 import datetime
 import typing
 import uuid
+from dataclasses import dataclass, field
 
 import jwt
 import structlog
 from flask_restx import Resource
-from flask import current_app
-from sqlalchemy import exists, and_, func
+from flask_restx.model import ModelBase
+from flask import current_app, request
+from sqlalchemy import Integer, func, literal, select
+from sqlalchemy.orm import joinedload
 
 from app.Extensions.Database import session_scope
-from app.Extensions.Errors import AuthorizationError, ValidationError, ResourceNotFoundError
+from app.Extensions.Errors import AuthorizationError, ValidationError, ResourceNotFoundError, PreconditionFailedError
+from app.Extensions.Validators import validate_payload
+from app.Models import ReferenceData
 from app.Models.Dao import User, TaskTemplate, Task, TaskLabel, UserPasswordToken
-from app.Models.RBAC import Role
 
 log = structlog.getLogger()
 
 
+@dataclass
+class References:
+    """What a request refers to, as loaded by check_references()"""
+
+    task: typing.Optional[Task] = None
+    assignee: typing.Optional[User] = None
+    template: typing.Optional[TaskTemplate] = None
+    labels: typing.List[int] = field(default_factory=list)
+    role: typing.Optional[dict] = None
+
+
 class ObjectValidationController(Resource):
+    def validate_payload(self, func):
+        """Validates the request body against the models the method expects, like flask-restx does but with the
+        validators that were compiled for the models when the app started"""
+        doc = getattr(func, "__apidoc__", False)
+        if doc is False:
+            return
+        validate = doc.get("validate")
+        if not (validate if validate is not None else self.api._validate):
+            return
+
+        for expect in doc.get("expect", []):
+            if isinstance(expect, list) and len(expect) == 1 and isinstance(expect[0], ModelBase):
+                data = request.get_json()
+                for obj in data if isinstance(data, list) else [data]:
+                    validate_payload(expect[0], obj, self.api)
+            if isinstance(expect, ModelBase):
+                validate_payload(expect, request.get_json(), self.api)
+
     @staticmethod
     def create_service_account_jwt() -> str:
         """Create a JWT token to make requests to other services"""
@@ -58,12 +91,80 @@ class ObjectValidationController(Resource):
             raise ValidationError(f"Password requires more than {min_caps} capital letter(s).")
         return True
 
+    def check_references(
+        self,
+        task_id: int = None,
+        assignee: int = None,
+        template_id: int = None,
+        labels: typing.List[int] = None,
+        role: str = None,
+        **kwargs,
+    ) -> References:
+        """Checks that everything a request refers to exists, with one query rather than one for each, and returns
+        what it loaded so that it isn't loaded again. The task, template and labels must be in the requester's org,
+        the assignee must be within their auth scope and they must be able to pass the role on."""
+        req_user: User = kwargs["req_user"]
+        references = References()
+        if role is not None:
+            references.role = ReferenceData.role(self.check_user_role(req_user, role))
+
+        # the ids are selected as a single row which each reference is outer joined to, so the result is also a
+        # single row with a null for anything that doesn't exist
+        ids = {"org_id": req_user.org_id, "task_id": task_id, "assignee": assignee, "template_id": template_id}
+        refs = select(*[literal(v, Integer).label(k) for k, v in ids.items() if v is not None]).subquery("refs")
+        entities, joins = [], []
+        if task_id is not None:
+            entities.append(Task)
+            joins.append((Task, (Task.id == refs.c.task_id) & (Task.org_id == refs.c.org_id)))
+        if assignee is not None:
+            entities.append(User)
+            joins.append((User, User.id == refs.c.assignee))
+        if template_id is not None:
+            entities.append(TaskTemplate)
+            joins.append(
+                (TaskTemplate, (TaskTemplate.id == refs.c.template_id) & (TaskTemplate.org_id == refs.c.org_id))
+            )
+        if labels:
+            entities.append(
+                select(func.array_agg(TaskLabel.id))
+                .where(TaskLabel.org_id == req_user.org_id, TaskLabel.id.in_(labels))
+                .scalar_subquery()
+            )
+        if not entities:
+            return references
+
+        with session_scope() as session:
+            qry = session.query(refs.c.org_id, *entities).select_from(refs)
+            for entity, onclause in joins:
+                qry = qry.outerjoin(entity, onclause)
+            row = list(qry.one())[1:]
+
+        if task_id is not None:
+            references.task = row.pop(0)
+            if references.task is None:
+                raise ResourceNotFoundError(f"Task {task_id} doesn't exist")
+        if assignee is not None:
+            references.assignee = row.pop(0)
+            if references.assignee is None:
+                raise ResourceNotFoundError("User doesn't exist")
+            self.check_auth_scope(references.assignee, **kwargs)
+        if template_id is not None:
+            references.template = row.pop(0)
+            if references.template is None:
+                raise ResourceNotFoundError("Task template doesn't exist")
+        if labels:
+            label_ids = row.pop(0) or []
+            for label_id in labels:
+                if label_id not in label_ids:
+                    raise ResourceNotFoundError(f"Label {label_id} doesn't exist")
+            references.labels = labels
+
+        return references
+
     def check_task_assignee(self, assignee: typing.Optional[int], **kwargs) -> typing.Union[int, None]:
         """Check if the user has permissions to assign this person to a task."""
         if assignee is not None:
-            user = self.check_user_id(assignee, should_exist=True)
-            self.check_auth_scope(user, **kwargs)
-            return user.id
+            return self.check_references(assignee=assignee, **kwargs).assignee.id
         else:
             return None
 
@@ -71,8 +172,10 @@ class ObjectValidationController(Resource):
     def check_task_id(task_id: int, org_id: int) -> Task:
         """Check that the task exist and return it if it does."""
         with session_scope() as session:
-            # filter with the org so that's scoped to the requesting user
-            task = session.query(Task).filter_by(id=task_id, org_id=org_id).first()
+            # filter with the org so that's scoped to the requesting user, the assignee is usually checked next
+            task = (
+                session.query(Task).options(joinedload(Task.assigned_user)).filter_by(id=task_id, org_id=org_id).first()
+            )
 
         if task is None:
             raise ResourceNotFoundError(f"Task {task_id} doesn't exist")
@@ -80,23 +183,10 @@ class ObjectValidationController(Resource):
             return task
 
     @staticmethod
-    def check_task_template_id(template_id: int):
-        """Check if a task type exists."""
-        if template_id is None:
-            return
-        with session_scope() as session:
-            if not session.query(exists().where(TaskTemplate.id == template_id)).scalar():
-                raise ResourceNotFoundError("Task template doesn't exist")
-
-    @staticmethod
-    def check_task_labels(labels: typing.List[int], org_id: int) -> None:
-        """Check to make sure that the labels are valid"""
-        with session_scope() as session:
-            for label_id in labels:
-                if not session.query(
-                    exists().where(and_(TaskLabel.id == label_id, TaskLabel.org_id == org_id))
-                ).scalar():
-                    raise ResourceNotFoundError(f"Label {label_id} doesn't exist")
+    def check_if_match(task: Task) -> None:
+        """If the client sent an If-Match header, check that the task hasn't changed since they read it"""
+        if request.if_match and str(task.row_version) not in request.if_match:
+            raise PreconditionFailedError(f"Task {task.id} has been changed by someone else, reload it and try again.")
 
     @staticmethod
     def check_user_id(
@@ -125,20 +215,20 @@ class ObjectValidationController(Resource):
     @staticmethod
     def check_user_role(req_user: User, role: str, user_to_update: User = None) -> str:
         """Given a users role, check that it exist and that the user can pass the role on to the recipient."""
-        with session_scope() as session:
-            _role = session.query(Role).filter_by(id=role).first()
+        _role = ReferenceData.role(role)
+        req_user_rank = ReferenceData.role(req_user.role)["rank"]
         if _role is None:
             raise ResourceNotFoundError(f"Role {role} doesn't exist")
-        elif _role.rank < req_user.roles.rank:
+        elif _role["rank"] < req_user_rank:
             raise AuthorizationError(f"No permissions to pass the role {role} on")
         elif user_to_update is None:
-            return _role.id
-        elif user_to_update is not None and user_to_update.roles.rank < req_user.roles.rank:
+            return _role["id"]
+        elif user_to_update is not None and ReferenceData.role(user_to_update.role)["rank"] < req_user_rank:
             raise AuthorizationError(f"No permissions to pass the role {role} on")
         elif user_to_update.role != role and user_to_update.is_only_org_admin():
             raise ValidationError("Can't demote the only remaining Administrator's role")
         else:
-            return _role.id
+            return _role["id"]
 
     @staticmethod
     def validate_password_token(token: str) -> UserPasswordToken:
@@ -10,10 +10,11 @@ import structlog
 from flask import request, current_app
 from flask_restx import Namespace, fields
 from sqlalchemy import func, exists
+from sqlalchemy.orm import joinedload
 
 from app.Controllers.Base import RequestValidationController
 from app.Decorators import requires_jwt
-from app.Extensions.Database import session_scope
+from app.Extensions.Database import session_scope, UnitOfWork
 from app.Extensions.Errors import ValidationError
 from app.Models import Event, Email
 from app.Models.Dao import User, Organisation, FailedLogin
@@ -103,6 +104,9 @@ class AccountController(RequestValidationController):
                 organisation.chargebee_subscription_id = "mock_customer_id"
                 return {"url": "https://app.delegator.com.au/login"}, 200
 
+        # the account is kept even if the subscription can't be set up below
+        UnitOfWork.commit_now()
+
         try:
             r = requests.post(
                 url=f"{current_app.config['SUBSCRIPTION_API_PUBLIC_URL']}/customer/",
@@ -161,7 +165,7 @@ class AccountController(RequestValidationController):
         self.validate_password(password)
 
         with session_scope() as session:
-            user: User = session.query(User).filter_by(email=email).first()
+            user: User = session.query(User).options(joinedload(User.orgs)).filter_by(email=email).first()
 
             if user is None:
                 self._failed_login_attempt(email)
@@ -265,6 +269,8 @@ class AccountController(RequestValidationController):
                 log.info(f"Incorrect password attempt for user {user.id}.")
                 user.failed_login_attempts += 1
                 user.failed_login_time = datetime.datetime.utcnow()
+                # the attempt has to be counted even though the request fails, otherwise it never locks
+                UnitOfWork.commit_now()
                 raise ValidationError("Email or password incorrect")
 
     @requires_jwt
@@ -310,6 +316,7 @@ class AccountController(RequestValidationController):
                             f"Timeout is {current_app.config['FAILED_LOGIN_ATTEMPTS_TIMEOUT']}s, resetting timeout."
                         )
                         session.delete(failed_email)
+                        UnitOfWork.commit_now()
                         raise ValidationError("Email incorrect.")
                 else:
                     # increment failed attempts
@@ -318,12 +325,14 @@ class AccountController(RequestValidationController):
                     log.info(
                         f"Incorrect email attempt for user, " f"total failed attempts: {failed_email.failed_attempts}"
                     )
+                    UnitOfWork.commit_now()
                     raise ValidationError("Email incorrect.")
             else:
                 # hasn't failed before, so create it
                 log.info("User failed to log in.")
                 new_failure = FailedLogin(email=email)
                 session.add(new_failure)
+                UnitOfWork.commit_now()
                 raise ValidationError("Email incorrect.")
 
     @staticmethod
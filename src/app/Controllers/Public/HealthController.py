@@ -1,5 +1,11 @@
+from flask import current_app
 from flask_restx import Namespace, Resource, fields
 
+from app.Decorators import requires_jwt
+from app.Extensions.Database import db, replica_lag
+from app.Extensions.Errors import AuthorizationError
+from app.Models.Dao import User
+
 api = Namespace(path="/health", name="Health", description="Check API health")
 
 
@@ -9,3 +15,48 @@ class Health(Resource):
     def get(self, **kwargs):
         """Returns a 200 if the API is healthy"""
         return {"msg": "I return, therefore I am healthy"}, 200
+
+
+@api.route("/db-pool")
+class DatabasePool(Resource):
+    pool_dto = api.model(
+        "Database Pool Stats",
+        {
+            "pid": fields.Integer(),
+            "pool": fields.String(),
+            "checkouts": fields.Integer(),
+            "connects": fields.Integer(),
+            "invalidations": fields.Integer(),
+            "wait_time_avg_ms": fields.Float(),
+            "wait_time_max_ms": fields.Float(),
+            "size": fields.Integer(),
+            "max_overflow": fields.Integer(),
+            "checked_in": fields.Integer(),
+            "checked_out": fields.Integer(),
+            "overflow": fields.Integer(),
+        },
+    )
+
+    @requires_jwt
+    @api.marshal_with(
+        api.model(
+            "Database Pools Response",
+            {
+                "primary": fields.Nested(pool_dto),
+                "replica": fields.Nested(pool_dto, allow_null=True),
+                "replica_lag": fields.Float(),
+            },
+        ),
+        code=200,
+    )
+    def get(self, **kwargs):
+        """Returns the connection pool saturation for the worker that handled the request, for service accounts"""
+        req_user: User = kwargs["req_user"]
+        if not req_user.is_service_account:
+            raise AuthorizationError("Invalid requester - the connection pools can only be seen by service accounts")
+
+        ret = {"primary": db.get_engine().pool.stats()}
+        if current_app.config["DB_REPLICA_URI"]:
+            ret["replica"] = db.get_engine(bind="replica").pool.stats()
+            ret["replica_lag"] = replica_lag()
+        return ret, 200
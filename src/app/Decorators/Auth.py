@@ -1,12 +1,14 @@
+import typing
 from functools import wraps
 
 import jwt
 import structlog
 from flask import request, current_app
 from sentry_sdk import configure_scope
+from sqlalchemy.orm import joinedload
 
-from app.Extensions.Database import session_scope
-from app.Extensions.Errors import ResourceNotFoundError, AuthenticationError
+from app.Extensions.Database import session_scope, route_reads
+from app.Extensions.Errors import ResourceNotFoundError, AuthenticationError, AuthorizationError
 from app.Models.Dao import User
 
 log = structlog.getLogger()
@@ -32,8 +34,7 @@ def authorize(operation: str, resource: str):
         @wraps(f)
         def wrapped_func(*args, **kwargs):
             req_user: User = kwargs["req_user"]
-            if not req_user.is_service_account:
-                req_user.is_active()
+            _track_activity(req_user)
             auth_scope = req_user.can(operation, resource)
             return f(auth_scope=auth_scope, *args, **kwargs)
 
@@ -42,6 +43,39 @@ def authorize(operation: str, resource: str):
     return decorator
 
 
+def authorize_each(permissions: typing.Dict[str, typing.Tuple[str, str]]):
+    """
+    Like authorize, for endpoints which do several things that each have their own permission, e.g. bulk operations.
+    The scope for each is passed on in auth_scopes, or None if the requester isn't allowed to do it, so that the
+    endpoint can refuse only those parts of the request.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def wrapped_func(*args, **kwargs):
+            req_user: User = kwargs["req_user"]
+            _track_activity(req_user)
+            auth_scopes = {}
+            for key, (operation, resource) in permissions.items():
+                try:
+                    auth_scopes[key] = req_user.can(operation, resource)
+                except AuthorizationError:
+                    auth_scopes[key] = None
+            return f(auth_scopes=auth_scopes, *args, **kwargs)
+
+        return wrapped_func
+
+    return decorator
+
+
+def _track_activity(req_user: User) -> None:
+    """Marks the user as active and routes the request's reads"""
+    # service accounts always use the primary since they usually act on something that just changed
+    if not req_user.is_service_account:
+        active_user = req_user.is_active(writing=request.method not in ["GET", "HEAD", "OPTIONS"])
+        route_reads(active_user.last_write)
+
+
 def _get_requester_details() -> User:
     """Determine the requester and return their object"""
     try:
@@ -75,7 +109,12 @@ def _get_user(user_id: int) -> User:
     """Get the user object that is claimed in the JWT payload."""
     # return user in claim or 404 if they are disabled
     with session_scope() as session:
-        user = session.query(User).filter_by(id=user_id, deleted=None, is_service_account=False).first()
+        user = (
+            session.query(User)
+            .options(User.with_reference_version(), joinedload(User.orgs))
+            .filter_by(id=user_id, deleted=None, is_service_account=False)
+            .first()
+        )
         if user is None:
             raise ResourceNotFoundError("User in JWT claim either doesn't exist or is deleted.")
         else:
@@ -85,7 +124,12 @@ def _get_user(user_id: int) -> User:
 def _get_service_account(role: str) -> User:
     """Get the user object for an SA based on the role"""
     with session_scope() as session:
-        user = session.query(User).filter_by(role=role, is_service_account=True).first()
+        user = (
+            session.query(User)
+            .options(User.with_reference_version())
+            .filter_by(role=role, is_service_account=True)
+            .first()
+        )
         if user is None:
             raise ResourceNotFoundError(f"Service account {role} doesn't exist.")
         else:
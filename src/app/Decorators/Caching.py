@@ -0,0 +1,39 @@
+from functools import wraps
+
+from flask import request, current_app
+from flask_restx.utils import unpack
+
+from app.Models import ReferenceData
+from app.Models.Dao import User
+
+
+def cache_reference_data(f):
+    """
+    Decorator for endpoints which return reference data that only changes when the org's reference version is
+    bumped, or with the requester's role. The response has a strong ETag and can be kept by the browser for
+    REFERENCE_DATA_MAX_AGE seconds, then it's revalidated. A request with a matching If-None-Match gets a 304
+    before the endpoint runs, so it must come after requires_jwt and authorize.
+    """
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        req_user: User = kwargs["req_user"]
+        if req_user.reference_version is None:
+            return f(*args, **kwargs)
+
+        etag = ReferenceData.etag(req_user)
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": f"private, max-age={current_app.config['REFERENCE_DATA_MAX_AGE']}, must-revalidate",
+            # the same url returns another org's data when someone else logs in on the browser
+            "Vary": "Authorization",
+        }
+        if request.if_none_match.contains_weak(etag):
+            return None, 304, headers
+
+        data, code, resp_headers = unpack(f(*args, **kwargs))
+        if code != 200:
+            return data, code, resp_headers
+        return data, code, {**headers, **resp_headers}
+
+    return decorated
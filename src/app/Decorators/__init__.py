@@ -1,3 +1,4 @@
-from app.Decorators.Auth import requires_jwt, authorize
+from app.Decorators.Auth import requires_jwt, authorize, authorize_each
+from app.Decorators.Caching import cache_reference_data
 
-__all__ = [authorize, requires_jwt]
+__all__ = [authorize, authorize_each, cache_reference_data, requires_jwt]
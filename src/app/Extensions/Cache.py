@@ -0,0 +1,41 @@
+import threading
+import typing
+from collections import OrderedDict
+
+
+class VersionedCache(object):
+    """A small in-process LRU cache, one per gunicorn worker.
+
+    Entries aren't invalidated directly, instead the version of the thing being cached is part of the key so a
+    change to it means the old entry is never read again and eventually falls out of the cache. This keeps the
+    workers consistent with each other without them having to share anything.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> typing.Union[typing.Any, None]:
+        """Returns the cached value or None if it isn't cached"""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: tuple, value: typing.Any) -> None:
+        """Caches a value, evicting the least recently used entry if the cache is full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
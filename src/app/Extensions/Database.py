@@ -1,16 +1,242 @@
+import datetime
+import math
+import threading
+import time
+import typing
 from contextlib import contextmanager
 
-from flask_sqlalchemy import SQLAlchemy
+import structlog
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, get_state
+from sqlalchemy import event, orm, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.sql.expression import CompoundSelect, Select, TextClause
 
-db = SQLAlchemy()
+from app.Extensions.Errors import PreconditionFailedError
+
+log = structlog.getLogger()
+
+
+class RoutingSession(SignallingSession):
+    """Sends reads to the replica when the request has been routed there, everything else goes to the primary.
+
+    The decision is made per statement rather than per request because even GET requests write (e.g. marking
+    the user as active), so flushes and SELECT ... FOR UPDATE always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if g.get("db_route") == "replica" and not self._flushing and _is_read(clause):
+            return get_state(self.app).db.get_engine(self.app, bind="replica")
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
+
+
+class UnitOfWork(object):
+    """A single transaction that spans an entire request.
+
+    While a unit of work is open, session_scope() only flushes its changes rather than committing them. The
+    transaction is committed once when the request finishes and any side effects (events, notifications, emails)
+    that were registered with after_commit() are only run after that commit has succeeded.
+    """
+
+    def __init__(self):
+        self.failed = False
+        self.callbacks = []
+
+    @staticmethod
+    def begin() -> None:
+        """Opens a unit of work for the current request"""
+        g.unit_of_work = UnitOfWork()
+
+    @staticmethod
+    def current() -> typing.Union["UnitOfWork", None]:
+        """Returns the unit of work for the current request, if there is one"""
+        if not has_app_context():
+            return None
+        return g.get("unit_of_work")
+
+    @staticmethod
+    def end(commit: bool) -> None:
+        """Commit or rollback the unit of work for the current request, then run the deferred side effects"""
+        uow = g.pop("unit_of_work", None)
+        if uow is None:
+            return
+
+        if not commit or uow.failed:
+            db.session.rollback()
+            log.info(f"Rolled back unit of work, discarding {len(uow.callbacks)} side effects")
+            return
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+        _run_callbacks(uow.callbacks)
+
+    @staticmethod
+    def commit_now() -> None:
+        """Commits what the request has changed so far, for writes that must be kept even though the request goes on
+        to fail, e.g. counting a failed login. Whatever comes after is still committed or rolled back with the request.
+        """
+        db.session.commit()
+        uow = UnitOfWork.current()
+        if uow is not None:
+            callbacks, uow.callbacks = uow.callbacks, []
+            _run_callbacks(callbacks)
+
+    @staticmethod
+    def discard() -> None:
+        """Rolls back a unit of work which was never ended, e.g. because of an unhandled exception"""
+        if g.pop("unit_of_work", None) is not None:
+            db.session.rollback()
+
+
+def _run_callbacks(callbacks: list) -> None:
+    """Runs side effects which were deferred until their changes were committed"""
+    for fn, args, kwargs in callbacks:
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            log.error(f"Side effect {fn.__qualname__} failed after commit - {e}")
 
 
 @contextmanager
 def session_scope():
     """Provide a transactional scope around a series of operations."""
+    uow = UnitOfWork.current()
+    if uow is not None:
+        # the request owns the transaction so just send the changes to the database
+        try:
+            yield db.session
+            db.session.flush()
+        except StaleDataError as e:
+            uow.failed = True
+            raise _precondition_failed(e)
+        except Exception as e:
+            uow.failed = True
+            raise e
+        return
+
     try:
         yield db.session
         db.session.commit()
+    except StaleDataError as e:
+        db.session.rollback()
+        raise _precondition_failed(e)
     except Exception as e:
         db.session.rollback()
         raise e
+
+
+def _precondition_failed(e: StaleDataError) -> PreconditionFailedError:
+    """A versioned row was changed by someone else between being read and written"""
+    log.info(f"Optimistic concurrency conflict - {e}")
+    return PreconditionFailedError("This has been changed by someone else, reload it and try again.")
+
+
+def after_commit(fn: typing.Callable, *args, **kwargs) -> None:
+    """Run a side effect once the current unit of work has been committed, or now if there isn't one."""
+    uow = UnitOfWork.current()
+    if uow is None:
+        fn(*args, **kwargs)
+    else:
+        uow.callbacks.append((fn, args, kwargs))
+
+
+def route_reads(last_write: typing.Union[datetime.datetime, None]) -> None:
+    """Route the rest of the request's reads to the replica if it's safe to do so.
+
+    Only GET requests are routed. A client who wrote within the last DB_REPLICA_READ_YOUR_WRITES seconds stays on
+    the primary so that they see their own changes, and everyone stays on the primary while the replica is lagging
+    by more than DB_REPLICA_MAX_LAG seconds.
+    """
+    config = current_app.config
+    if not config["DB_REPLICA_URI"] or request.method != "GET":
+        return
+
+    window = datetime.timedelta(seconds=int(config["DB_REPLICA_READ_YOUR_WRITES"]))
+    if last_write is not None and datetime.datetime.utcnow() - last_write < window:
+        return
+
+    if replica_lag() > float(config["DB_REPLICA_MAX_LAG"]):
+        return
+
+    g.db_route = "replica"
+
+
+_replica_lag_lock = threading.Lock()
+_replica_lag = {"lag": 0.0, "checked_at": 0.0, "checking": False}
+_REPLICA_LAG_CHECK_INTERVAL = 5
+
+
+def replica_lag() -> float:
+    """Returns how many seconds the replica is behind the primary, checked at most every few seconds per worker.
+    If the replica can't be reached then the lag is infinite so that requests fall back to the primary.
+
+    The lock is only held to read the cached lag or claim the next check, so while one thread checks the replica
+    the others carry on with the last lag rather than waiting for it.
+    """
+    with _replica_lag_lock:
+        fresh = time.monotonic() - _replica_lag["checked_at"] < _REPLICA_LAG_CHECK_INTERVAL
+        if fresh or _replica_lag["checking"]:
+            return _replica_lag["lag"]
+        _replica_lag["checking"] = True
+
+    lag = math.inf
+    try:
+        lag = _check_replica_lag()
+    finally:
+        with _replica_lag_lock:
+            _replica_lag.update({"lag": lag, "checked_at": time.monotonic(), "checking": False})
+    return lag
+
+
+def _check_replica_lag() -> float:
+    try:
+        with db.get_engine(bind="replica").connect() as conn:
+            # no wal to replay means the replica is caught up, and a server that isn't a standby has no lag
+            lag = conn.execute(
+                text(
+                    "SELECT COALESCE(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END, 0)"
+                )
+            ).scalar()
+        lag = float(lag)
+    except Exception as e:
+        log.error(f"Couldn't check the replica lag, reads will go to the primary - {e}")
+        return math.inf
+
+    if lag > float(current_app.config["DB_REPLICA_MAX_LAG"]):
+        log.warning(f"Replica is {lag}s behind the primary, reads will go to the primary")
+    return lag
+
+
+def _is_read(clause) -> bool:
+    """Whether a statement is a plain read that's safe to run on the replica"""
+    if isinstance(clause, (Select, CompoundSelect)):
+        return clause._for_update_arg is None
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().lower().startswith("select")
+    return False
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context():
+        g.db_statements = g.get("db_statements", 0) + 1
+
+
+@event.listens_for(Engine, "commit")
+def _count_commit(conn):
+    if has_app_context():
+        g.db_commits = g.get("db_commits", 0) + 1
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class PoolMetrics(object):
+    """Counters for a single connection pool, these are per gunicorn worker since each worker has its own pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "wait_time_avg_ms": round(self.wait_time_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+class _MeasuredPool(object):
+    """Records how long it takes to get a connection out of the pool and how often connections are invalidated.
+    Pre-ping failures invalidate the connection, so they're included in the invalidations."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        # a recreated pool is given the old pool's listeners, which count into the metrics that it carries over
+        if kwargs.get("_dispatch") is None:
+            event.listen(self, "checkout", lambda *_: self.metrics.increment("checkouts"))
+            event.listen(self, "connect", lambda *_: self.metrics.increment("connects"))
+            event.listen(self, "invalidate", lambda *_: self.metrics.increment("invalidations"))
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # the pool is recreated after a disconnect, carry the metrics over to the new pool
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+    def stats(self) -> dict:
+        """Returns the pool's saturation and metrics"""
+        ret = {"pid": os.getpid(), "pool": type(self).__name__, **self.metrics.as_dict()}
+        if isinstance(self, QueuePool):
+            ret.update(
+                {
+                    "size": self.size(),
+                    "max_overflow": self._max_overflow,
+                    "checked_in": self.checkedin(),
+                    "checked_out": self.checkedout(),
+                    "overflow": max(self.overflow(), 0),
+                }
+            )
+        return ret
+
+
+class MeasuredQueuePool(_MeasuredPool, QueuePool):
+    pass
+
+
+class MeasuredNullPool(_MeasuredPool, NullPool):
+    pass
+
+
+def engine_options(config: dict) -> dict:
+    """Build the SQLAlchemy engine options from the app config.
+
+    In PgBouncer mode PgBouncer does the pooling, so a connection is opened per checkout and handed back straight
+    away. psycopg2 doesn't use server side prepared statements so it's safe to use with transaction pooling.
+    """
+    options = {"pool_pre_ping": _bool(config["DB_POOL_PRE_PING"])}
+
+    if _bool(config["DB_PGBOUNCER"]):
+        options["poolclass"] = MeasuredNullPool
+    else:
+        options.update(
+            {
+                "poolclass": MeasuredQueuePool,
+                "pool_size": int(config["DB_POOL_SIZE"]),
+                "max_overflow": int(config["DB_POOL_MAX_OVERFLOW"]),
+                "pool_timeout": int(config["DB_POOL_TIMEOUT"]),
+                "pool_recycle": int(config["DB_POOL_RECYCLE"]),
+            }
+        )
+
+    return options
+
+
+def replica_uri(config: dict) -> str:
+    """Build the replica's URI with short connect and statement timeouts, so that a replica which stops answering
+    is treated as unhealthy rather than holding up requests. Flask-SQLAlchemy only takes a URI for a bind, so
+    they're passed to psycopg2 as query parameters rather than engine options.
+    """
+    timeout = int(config["DB_REPLICA_TIMEOUT"])
+    url = make_url(config["DB_REPLICA_URI"])
+    return str(
+        url.update_query_dict(
+            {"connect_timeout": str(timeout), "options": f"-c statement_timeout={timeout * 1000}"}, append=True
+        )
+    )
+
+
+def _bool(value) -> bool:
+    """Values from parameter store are strings"""
+    if isinstance(value, str):
+        return value.lower() in ("true", "1", "yes")
+    return bool(value)
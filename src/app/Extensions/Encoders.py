@@ -0,0 +1,197 @@
+import datetime
+import decimal
+import functools
+import json
+import typing
+
+import pytz
+from flask import current_app, make_response
+from flask_restx import Mask, Model, fields
+from flask_restx.representations import output_json as restx_output_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+def format_datetime(date: typing.Union[datetime.datetime, None]) -> typing.Union[str, None]:
+    """Formats a naive UTC datetime in the RESPONSE_DATE_FORMAT. The default format is built from isoformat, which is
+    several times quicker than localizing the datetime and calling strftime"""
+    if date is None:
+        return None
+    date_format = _response_date_format()
+    if date_format == DEFAULT_DATE_FORMAT and date.tzinfo is None and date.year >= 1000:
+        return date.isoformat(timespec="seconds") + "+0000"
+    return pytz.utc.localize(date).strftime(date_format)
+
+
+@functools.lru_cache(maxsize=1)
+def _response_date_format() -> str:
+    """The format is set by the config class, so it's only read from the app config once per worker"""
+    return current_app.config["RESPONSE_DATE_FORMAT"]
+
+
+def output_json(data, code: int, headers: dict = None):
+    """Serialises a response with orjson when it's installed. Otherwise, and when debugging so that responses are
+    indented, it's left to flask-restx"""
+    if orjson is None or current_app.debug:
+        return restx_output_json(data, code, headers)
+
+    resp = make_response(orjson.dumps(data, default=_default, option=orjson.OPT_APPEND_NEWLINE), code)
+    resp.headers.extend(headers or {})
+    resp.mimetype = "application/json"
+    return resp
+
+
+def dumps(data) -> str:
+    """Serialises to a JSON str, with orjson if it's installed"""
+    if orjson is None:
+        return json.dumps(data, default=_default, separators=(",", ":"))
+    return orjson.dumps(data, default=_default).decode("utf-8")
+
+
+def _default(obj):
+    """Serialises the types that JSON doesn't have, DynamoDB returns numbers as Decimals"""
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def marshal(data, model: Model, mask: str = None):
+    """The same as flask-restx's marshal, but with an encoder for the model that's built once and then reused"""
+    encoder = compile_encoder(model, mask)
+    if isinstance(data, (list, tuple)):
+        return [encoder(item) for item in data]
+    return encoder(data)
+
+
+# sparse fieldsets are masks chosen by the client, so there's a limit on how many encoders are kept
+_ENCODER_CACHE_SIZE = 256
+_encoders = {}
+
+
+def compile_encoder(model: Model, mask: str = None) -> typing.Callable[[typing.Any], dict]:
+    """Returns a function that marshals an object to a dict with the fields of the model, the same way that
+    flask-restx's marshal does but without walking the model each time. It's built once per model and mask, and
+    fields which don't have a fast path use the field's own output()."""
+    # models are defined once when the app starts, so they're cached by identity and kept alive by the cache
+    cache_key = (id(model), mask)
+    cached = _encoders.get(cache_key)
+    if cached is not None:
+        return cached[1]
+
+    encode = _build_encoder(Mask(mask).apply(model) if mask else model)
+    if len(_encoders) >= _ENCODER_CACHE_SIZE:
+        _encoders.clear()
+    _encoders[cache_key] = (model, encode)
+    return encode
+
+
+def _build_encoder(model: dict) -> typing.Callable[[typing.Any], dict]:
+    outputs = [(key, *_compile_field(key, field)) for key, field in model.items()]
+
+    def encode(obj) -> dict:
+        get = obj.get if type(obj) is dict else functools.partial(_getattr, obj)
+        return {key: slow(obj) if convert is None else convert(get(key)) for key, convert, slow in outputs}
+
+    return encode
+
+
+def _getattr(obj, key: str):
+    return getattr(obj, key, None)
+
+
+def _compile_field(key: str, field) -> tuple:
+    """Returns a function which formats the value of a field, or the field's own output() when it doesn't have a
+    fast path"""
+    if isinstance(field, type):
+        field = field()
+    slow = functools.partial(field.output, key)
+
+    # anything that isn't a plain field of a plain key goes the slow way
+    if field.attribute is not None or field.default is not None or "." in key:
+        return None, slow
+
+    convert = _compile_value(field)
+    return (None, slow) if convert is None else (convert, None)
+
+
+def _compile_value(field) -> typing.Union[typing.Callable[[typing.Any], typing.Any], None]:
+    """Returns a function which formats a value, or None if the field doesn't have a fast path"""
+    if isinstance(field, type):
+        field = field()
+    if field.attribute is not None or field.default is not None:
+        return None
+
+    if isinstance(field, fields.Nested):
+        if field.as_list or field.skip_none:
+            return None
+        encode = _build_encoder(field.nested)
+        # a missing nested model is marshalled as a model of nulls unless it's allowed to be null
+        missing = None if field.allow_null else encode({})
+        return lambda value: missing if value is None else encode(value)
+
+    if isinstance(field, fields.List):
+        convert = _compile_value(field.container)
+        if convert is None:
+            return None
+        return lambda value: (
+            None
+            if value is None
+            else [convert(item) for item in value]
+            if isinstance(value, (list, tuple))
+            else field.format(value)
+        )
+
+    # the nullable fields subclass these without changing how they format
+    format_ = type(field).format
+    if format_ is fields.Integer.format:
+        return _format_integer
+    if format_ is fields.String.format:
+        return _format_string
+    if format_ is fields.Boolean.format:
+        return _format_boolean
+    if format_ is fields.Float.format:
+        return _format_float
+    if (
+        format_ is fields.DateTime.format
+        and type(field).parse is fields.DateTime.parse
+        and type(field).format_iso8601 is fields.DateTime.format_iso8601
+        and field.dt_format == "iso8601"
+    ):
+        return _format_iso8601
+    if type(field) is fields.Raw:
+        return _identity
+    return None
+
+
+def _identity(value):
+    return value
+
+
+def _format_integer(value) -> typing.Union[int, None]:
+    return value if value is None or type(value) is int else int(value)
+
+
+def _format_string(value) -> typing.Union[str, None]:
+    return value if value is None or type(value) is str else str(value)
+
+
+def _format_float(value) -> typing.Union[float, None]:
+    return None if value is None else float(value)
+
+
+def _format_boolean(value) -> typing.Union[bool, None]:
+    return value if value is None or type(value) is bool else fields.Boolean().format(value)
+
+
+def _format_iso8601(value) -> typing.Union[str, None]:
+    """Formats a datetime field, dates that were formatted by format_datetime only need their offset changed"""
+    if value is None:
+        return None
+    if type(value) is str and len(value) == 24 and value.endswith("+0000"):
+        return value[:19] + "+00:00"
+    return fields.DateTime(dt_format="iso8601").format(value)
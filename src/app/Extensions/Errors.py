@@ -86,3 +86,21 @@ class InternalServerError(Exception):
         rv = dict(self.payload or ())
         rv["msg"] = self.message
         return rv
+
+
+class PreconditionFailedError(Exception):
+    """Error when a resource has changed since the client last read it"""
+
+    status_code = 412
+
+    def __init__(self, message, status_code=None, payload=None):
+        Exception.__init__(self)
+        self.message = message
+        if status_code is not None:
+            self.status_code = status_code
+        self.payload = payload
+
+    def to_dict(self):
+        rv = dict(self.payload or ())
+        rv["msg"] = self.message
+        return rv
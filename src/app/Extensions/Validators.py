@@ -0,0 +1,218 @@
+import re
+import typing
+
+from flask_restx import Api
+from flask_restx.model import ModelBase
+
+# the Draft 4 keywords which aren't checked here, jsonschema ignores any keywords it doesn't know, e.g. description
+_UNSUPPORTED = {"additionalItems", "additionalProperties", "allOf", "anyOf", "dependencies", "maxProperties"}
+_UNSUPPORTED |= {"minProperties", "multipleOf", "not", "oneOf", "patternProperties", "uniqueItems"}
+
+# the types that request.get_json() returns, anything else is left to jsonschema
+_JSON_TYPES = {dict, list, str, int, float, bool, type(None)}
+_TYPES = {
+    "array": {list},
+    "boolean": {bool},
+    "integer": {int},
+    "null": {type(None)},
+    "number": {int, float},
+    "object": {dict},
+    "string": {str},
+}
+
+_validators = {}
+
+
+def validate_payload(model: ModelBase, data, api: Api) -> None:
+    """Validates a request body against a model with its compiled validator. Only a body that might be invalid is
+    validated by flask-restx as well, so that the errors in the response are exactly the same as they were."""
+    if not compile_validator(model, api)(data):
+        model.validate(data, api.refresolver, api.format_checker)
+
+
+def compile_validators(api: Api) -> int:
+    """Compiles the validators for the request models of the api's resources, so that it's done once when the app
+    starts rather than on the first request. Returns how many models have a validator."""
+    for namespace in api.namespaces:
+        for route in namespace.resources:
+            for method in route.resource.methods or []:
+                doc = getattr(getattr(route.resource, method.lower(), None), "__apidoc__", {})
+                for expect in doc.get("expect", []):
+                    if isinstance(expect, list) and len(expect) == 1:
+                        expect = expect[0]
+                    if isinstance(expect, ModelBase):
+                        compile_validator(expect, api)
+    return len(_validators)
+
+
+def compile_validator(model: ModelBase, api: Api) -> typing.Callable[[typing.Any], bool]:
+    """Returns a function which checks a request body against the model's JSON schema the same way that jsonschema's
+    Draft 4 validator does, but without building a validator from the schema for each request. It returns True when
+    the body is valid and False when it might not be, in which case jsonschema has the final say and describes the
+    errors. Schemas with keywords that aren't supported always go to jsonschema."""
+    cached = _validators.get(id(model))
+    if cached is not None:
+        return cached[1]
+
+    definitions = {name: definition for namespace in api.namespaces for name, definition in namespace.models.items()}
+    definitions.update(api.models)
+    check = _compile_schema(model.__schema__, definitions, api.format_checker, (model.name,))
+    if check is None:
+        check = _unsure
+
+    # models are defined once when the app starts, so they're cached by identity and kept alive by the cache
+    _validators[id(model)] = (model, check)
+    return check
+
+
+def _unsure(value) -> bool:
+    return False
+
+
+def _compile_schema(schema: dict, definitions: dict, format_checker, seen: tuple):
+    """Returns a function which checks a value against the schema, or None if the schema isn't supported"""
+    if "$ref" in schema:
+        # like jsonschema, anything next to a $ref is ignored
+        name = schema["$ref"][len("#/definitions/") :] if schema["$ref"].startswith("#/definitions/") else None
+        if name not in definitions or name in seen:
+            return None
+        return _compile_schema(definitions[name].__schema__, definitions, format_checker, seen + (name,))
+
+    if _UNSUPPORTED & schema.keys() or ("format" in schema and format_checker is not None):
+        return None
+
+    checks = []
+    for keyword_checks in (
+        _type_checks,
+        _enum_checks,
+        _limit_checks,
+        _length_checks,
+        _pattern_checks,
+        _required_checks,
+    ):
+        compiled = keyword_checks(schema)
+        if compiled is None:
+            return None
+        checks += compiled
+    for keyword_checks in (_items_checks, _properties_checks):
+        compiled = keyword_checks(schema, definitions, format_checker, seen)
+        if compiled is None:
+            return None
+        checks += compiled
+
+    def check(value) -> bool:
+        if type(value) not in _JSON_TYPES:
+            return False
+        for keyword_check in checks:
+            if not keyword_check(value):
+                return False
+        return True
+
+    return check
+
+
+# each of these compiles the checks for some of a schema's keywords, or returns None if they aren't supported
+
+
+def _type_checks(schema: dict) -> typing.Optional[list]:
+    if "type" not in schema:
+        return []
+    types = [schema["type"]] if isinstance(schema["type"], str) else schema["type"]
+    if any(t not in _TYPES for t in types):
+        return None
+    of_types = frozenset().union(*[_TYPES[t] for t in types])
+    return [lambda value: type(value) in of_types]
+
+
+def _enum_checks(schema: dict) -> typing.Optional[list]:
+    if "enum" not in schema:
+        return []
+    enum = schema["enum"]
+    # jsonschema treats booleans and numbers specially, so only strings and nulls are checked here
+    return [lambda value: (type(value) is str or value is None) and value in enum]
+
+
+def _limit_checks(schema: dict) -> typing.Optional[list]:
+    checks = []
+    for keyword, compare in [("minimum", _at_least), ("maximum", _at_most)]:
+        if keyword in schema:
+            limit = schema[keyword]
+            exclusive = bool(schema.get(f"exclusive{keyword.title()}"))
+            checks.append(
+                lambda value, limit=limit, exclusive=exclusive, compare=compare: (
+                    type(value) not in (int, float) or compare(value, limit, exclusive)
+                )
+            )
+    return checks
+
+
+def _length_checks(schema: dict) -> typing.Optional[list]:
+    checks = []
+    for keyword, of_type, compare in [
+        ("minLength", str, _at_least),
+        ("maxLength", str, _at_most),
+        ("minItems", list, _at_least),
+        ("maxItems", list, _at_most),
+    ]:
+        if keyword in schema:
+            limit = schema[keyword]
+            checks.append(
+                lambda value, limit=limit, of_type=of_type, compare=compare: (
+                    type(value) is not of_type or compare(len(value), limit, False)
+                )
+            )
+    return checks
+
+
+def _pattern_checks(schema: dict) -> typing.Optional[list]:
+    if "pattern" not in schema:
+        return []
+    pattern = re.compile(schema["pattern"])
+    return [lambda value: type(value) is not str or pattern.search(value) is not None]
+
+
+def _required_checks(schema: dict) -> typing.Optional[list]:
+    if "required" not in schema:
+        return []
+    required = frozenset(schema["required"])
+    return [lambda value: type(value) is not dict or required <= value.keys()]
+
+
+def _items_checks(schema: dict, definitions: dict, format_checker, seen: tuple) -> typing.Optional[list]:
+    if "items" not in schema:
+        return []
+    if not isinstance(schema["items"], dict):
+        return None
+    item_check = _compile_schema(schema["items"], definitions, format_checker, seen)
+    if item_check is None:
+        return None
+    return [lambda value: type(value) is not list or all(item_check(item) for item in value)]
+
+
+def _properties_checks(schema: dict, definitions: dict, format_checker, seen: tuple) -> typing.Optional[list]:
+    if "properties" not in schema:
+        return []
+    properties = []
+    for name, property_schema in schema["properties"].items():
+        property_check = _compile_schema(property_schema, definitions, format_checker, seen)
+        if property_check is None:
+            return None
+        properties.append((name, property_check))
+
+    def check_properties(value) -> bool:
+        if type(value) is not dict:
+            return True
+        for name, property_check in properties:
+            if name in value and not property_check(value[name]):
+                return False
+        return True
+
+    return [check_properties]
+
+
+def _at_least(value, limit, exclusive: bool) -> bool:
+    return value > limit if exclusive else value >= limit
+
+
+def _at_most(value, limit, exclusive: bool) -> bool:
+    return value < limit if exclusive else value <= limit
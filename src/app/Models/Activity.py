@@ -0,0 +1,70 @@
+import datetime
+import typing
+from os import getenv
+
+import boto3
+import structlog
+from boto3.dynamodb.conditions import Key
+from flask import current_app
+
+from app.Extensions.Encoders import format_datetime
+from app.Extensions.Errors import ValidationError
+from app.Models.LocalMockData import MockActivity
+from app.Utilities.All import decode_cursor, encode_cursor
+
+# DYNAMODB_ENDPOINT points at DynamoDB Local when testing, e.g. http://localhost:8000
+dyn_db = boto3.resource("dynamodb", endpoint_url=getenv("DYNAMODB_ENDPOINT"))
+log = structlog.getLogger()
+
+# the page size for task and user activity
+ACTIVITY_MAX_LIMIT = 100
+ACTIVITY_DEFAULT_LIMIT = 50
+
+# only the attributes that are in the response are read
+_PROJECTION = {"#a": "activity", "#t": "activity_timestamp", "#e": "event_friendly"}
+
+
+def query_activity(
+    table_name: str, item_id: int, start_of_history: datetime.datetime, limit: int, cursor: str = None
+) -> typing.Tuple[typing.List[dict], typing.Union[str, None]]:
+    """Returns a page of the activity of a task or user since the start of its history, newest first, and the cursor
+    for the next page or None if it's the last one. The cursor wraps the timestamp of the last item in the page, and
+    the id always comes from the request so that a cursor can't be used to read someone else's activity."""
+    if getenv("MOCK_AWS"):
+        return MockActivity().data[:limit], None
+
+    date_format = current_app.config["DYN_DB_ACTIVITY_DATE_FORMAT"]
+    query = {
+        "KeyConditionExpression": Key("id").eq(item_id)
+        & Key("activity_timestamp").gte(start_of_history.strftime(date_format)),
+        "ProjectionExpression": ", ".join(_PROJECTION),
+        "ExpressionAttributeNames": _PROJECTION,
+        "ScanIndexForward": False,
+    }
+    if cursor is not None:
+        last_timestamp = decode_cursor(cursor)
+        try:
+            last_activity = datetime.datetime.strptime(last_timestamp, date_format)
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid cursor")
+        if last_activity < start_of_history:
+            raise ValidationError("Invalid cursor")
+        query["ExclusiveStartKey"] = {"id": item_id, "activity_timestamp": last_timestamp}
+
+    # a query stops at 1MB, so it keeps going until the page is full or there isn't any more
+    table = dyn_db.Table(table_name)
+    items = []
+    while True:
+        page = table.query(Limit=limit - len(items), **query)
+        items.extend(page["Items"])
+        last_key = page.get("LastEvaluatedKey")
+        if last_key is None or len(items) >= limit:
+            break
+        query["ExclusiveStartKey"] = last_key
+
+    for item in items:
+        timestamp = datetime.datetime.strptime(item["activity_timestamp"], date_format)
+        item["activity_timestamp"] = format_datetime(timestamp)
+
+    log.info(f"Found {len(items)} activity items for id {item_id} in {table_name}")
+    return items, None if last_key is None else encode_cursor(last_key["activity_timestamp"])
@@ -11,6 +11,7 @@ class ActiveUser(db.Model):
     first_name = db.Column("first_name", db.String)
     last_name = db.Column("last_name", db.String)
     last_active = db.Column("last_active", db.DateTime, default=datetime.datetime.utcnow)
+    last_write = db.Column("last_write", db.DateTime)
 
     users = db.relationship("User")
     organisations = db.relationship("Organisation")
@@ -1,10 +1,8 @@
 import datetime
-import pytz
 import typing
 
-from flask import current_app
-
 from app.Extensions.Database import db
+from app.Extensions.Encoders import format_datetime
 
 
 class DelayedTask(db.Model):
@@ -41,26 +39,12 @@ class DelayedTask(db.Model):
         self.expired = expired
 
     def as_dict(self):
-        if self.snoozed is None:
-            snoozed = None
-        else:
-            snoozed = pytz.utc.localize(self.snoozed)
-            snoozed = snoozed.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.expired is None:
-            expired = None
-        else:
-            expired = pytz.utc.localize(self.expired)
-            expired = expired.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        delayed_at = pytz.utc.localize(self.delayed_at)
-
         return {
             "task_id": self.task_id,
             "delay_for": self.delay_for,
-            "delayed_at": delayed_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"]),
+            "delayed_at": format_datetime(self.delayed_at),
             "delayed_by": self.delayed_by,
             "reason": self.reason,
-            "snoozed": snoozed,
-            "expired": expired,
+            "snoozed": format_datetime(self.snoozed),
+            "expired": format_datetime(self.expired),
         }
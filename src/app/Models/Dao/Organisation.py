@@ -2,6 +2,7 @@ import datetime
 import pytz
 
 from flask import current_app
+from sqlalchemy import FetchedValue
 
 from app.Extensions.Database import db
 
@@ -18,6 +19,8 @@ class Organisation(db.Model):
     locked = db.Column("locked", db.DateTime)
     locked_reason = db.Column("locked_reason", db.String, default=None)
     created_at = db.Column("created_at", db.DateTime, default=datetime.datetime.utcnow)
+    # bumped whenever the org's labels, templates or escalations change, see ReferenceData
+    reference_version = db.Column("reference_version", db.Integer, server_default=FetchedValue())
 
     def __init__(
         self,
@@ -1,24 +1,22 @@
 import datetime
-import pytz
-from os import getenv
+import typing
 
-import boto3
 import structlog
-from boto3.dynamodb.conditions import Key
 from flask import current_app
-from sqlalchemy import desc
+from sqlalchemy import any_, case, cast, desc, extract, func, literal_column, select, FetchedValue
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, aggregate_order_by
 
 from app.Extensions.Database import db, session_scope
+from app.Extensions.Encoders import format_datetime
 from app.Extensions.Errors import ValidationError
 from app.Models import Event
+from app.Models.Activity import query_activity
 from app.Models.Notification import NotificationAction, Notification
 from app.Models.Dao import DelayedTask, User
 from app.Models.Enums import Events, Operations, Resources, TaskStatuses
 from app.Models.Enums.Notifications import ClickActions, TargetTypes, NotificationIcons
-from app.Models.LocalMockData import MockActivity
 from app.Utilities.All import get_all_user_ids
 
-dyn_db = boto3.resource("dynamodb")
 log = structlog.getLogger()
 
 
@@ -39,9 +37,8 @@ class Task(db.Model):
     scheduled_notification_period = db.Column("scheduled_notification_period", db.Integer, default=None)
     scheduled_notification_sent = db.Column("scheduled_notification_sent", db.DateTime, default=None)
 
-    label_1 = db.Column("label_1", db.Integer, default=None)
-    label_2 = db.Column("label_2", db.Integer, default=None)
-    label_3 = db.Column("label_3", db.Integer, default=None)
+    # the task_labels ids in the order they were added, GIN indexed for filtering
+    labels = db.Column("labels", ARRAY(db.Integer), default=list)
 
     custom_1 = db.Column("custom_1", db.String, default=None)
     custom_2 = db.Column("custom_2", db.String, default=None)
@@ -58,6 +55,13 @@ class Task(db.Model):
     status_changed_at = db.Column("status_changed_at", db.DateTime)
     priority_changed_at = db.Column("priority_changed_at", db.DateTime)
 
+    # incremented by a trigger on every update, including ones made outside of the api, apart from reordering
+    row_version = db.Column("row_version", db.Integer, server_default=FetchedValue(), server_onupdate=FetchedValue())
+
+    # updates are made WHERE row_version is the version that was read, so concurrent writes can't overwrite each
+    # other, and the new version is returned by the update
+    __mapper_args__ = {"version_id_col": row_version, "version_id_generator": False, "eager_defaults": True}
+
     # to be deprecated
     time_estimate = db.Column("time_estimate", db.Integer, default=0)
     scheduled_for = db.Column("scheduled_for", db.DateTime, default=None)
@@ -85,9 +89,7 @@ class Task(db.Model):
         finished_by: int = None,
         status_changed_at: datetime = None,
         priority_changed_at: datetime = None,
-        label_1: int = None,
-        label_2: int = None,
-        label_3: int = None,
+        labels: list = None,
         custom_1: str = None,
         custom_2: str = None,
         custom_3: str = None,
@@ -110,9 +112,7 @@ class Task(db.Model):
         self.finished_at = finished_at
         self.status_changed_at = status_changed_at
         self.priority_changed_at = priority_changed_at
-        self.label_1 = label_1
-        self.label_2 = label_2
-        self.label_3 = label_3
+        self.labels = labels or []
         self.custom_1 = custom_1
         self.custom_2 = custom_2
         self.custom_3 = custom_3
@@ -122,50 +122,6 @@ class Task(db.Model):
         """
         :return: dict repr of a Task object
         """
-        if self.created_at is None:
-            created_at = None
-        else:
-            created_at = pytz.utc.localize(self.created_at)
-            created_at = created_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.started_at is None:
-            started_at = None
-        else:
-            started_at = pytz.utc.localize(self.started_at)
-            started_at = started_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.finished_at is None:
-            finished_at = None
-        else:
-            finished_at = pytz.utc.localize(self.finished_at)
-            finished_at = finished_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.status_changed_at is None:
-            status_changed_at = None
-        else:
-            status_changed_at = pytz.utc.localize(self.status_changed_at)
-            status_changed_at = status_changed_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.priority_changed_at is None:
-            priority_changed_at = None
-        else:
-            priority_changed_at = pytz.utc.localize(self.priority_changed_at)
-            priority_changed_at = priority_changed_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.scheduled_for is None:
-            scheduled_for = None
-        else:
-            scheduled_for = pytz.utc.localize(self.scheduled_for)
-            scheduled_for = scheduled_for.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.scheduled_notification_sent is None:
-            scheduled_notification_sent = None
-        else:
-            scheduled_notification_sent = pytz.utc.localize(self.scheduled_notification_sent)
-            scheduled_notification_sent = scheduled_notification_sent.strftime(
-                current_app.config["RESPONSE_DATE_FORMAT"]
-            )
-
         return {
             "id": self.id,
             "org_id": self.org_id,
@@ -173,63 +129,71 @@ class Task(db.Model):
             "description": self.description,
             "status": self.status,
             "time_estimate": self.time_estimate,
-            "scheduled_for": scheduled_for,
+            "scheduled_for": format_datetime(self.scheduled_for),
             "scheduled_notification_period": self.scheduled_notification_period,
-            "scheduled_notification_sent": scheduled_notification_sent,
+            "scheduled_notification_sent": format_datetime(self.scheduled_notification_sent),
             "assignee": self.assignee,
             "priority": self.priority,
             "created_by": self.created_by,
-            "created_at": created_at,
-            "started_at": started_at,
+            "created_at": format_datetime(self.created_at),
+            "started_at": format_datetime(self.started_at),
             "finished_by": self.finished_by,
-            "finished_at": finished_at,
-            "status_changed_at": status_changed_at,
-            "priority_changed_at": priority_changed_at,
-            "labels": [_ for _ in [self.label_1, self.label_2, self.label_3] if _ is not None],
+            "finished_at": format_datetime(self.finished_at),
+            "status_changed_at": format_datetime(self.status_changed_at),
+            "priority_changed_at": format_datetime(self.priority_changed_at),
+            "labels": self.labels,
             "display_order": self.display_order,
         }
 
-    def activity(self, max_days_of_history: int) -> list:
-        """Returns the activity of a task."""
+    @staticmethod
+    def labels_json():
+        """A column of the task's labels as a list of TaskLabel dicts, in the order they were added"""
+        from app.Models.Dao import TaskLabel
+
+        label = func.json_build_object("id", TaskLabel.id, "label", TaskLabel.label, "colour", TaskLabel.colour)
+        return (
+            select(
+                func.coalesce(
+                    func.json_agg(aggregate_order_by(label, func.array_position(Task.labels, TaskLabel.id))),
+                    literal_column("'[]'::json"),
+                )
+            )
+            .where(TaskLabel.id == any_(Task.labels))
+            .correlate(Task)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def search_document():
+        """The generated tsvector of the task's title, description and custom fields, GIN indexed for searching.
+        It isn't mapped as a column since it's only ever used in a search's WHERE and ORDER BY"""
+        return literal_column("tasks.search", type_=TSVECTOR)
+
+    @staticmethod
+    def bump_row_versions(org_id: int, *criteria) -> None:
+        """Increments the row version of the tasks that match the criteria, for when something they display changes"""
+        with session_scope() as session:
+            session.query(Task).filter(Task.org_id == org_id, *criteria).update(
+                {Task.row_version: Task.row_version + 1}, synchronize_session=False
+            )
+
+    def activity(
+        self, max_days_of_history: int, limit: int, cursor: str = None
+    ) -> typing.Tuple[typing.List[dict], typing.Union[str, None]]:
+        """Returns a page of the activity of a task, and the cursor for the next page."""
         if max_days_of_history == -1:
             # all time, THE TIME OF THIS ORIGINAL COMMIT
             start_of_history = datetime.datetime(2019, 12, 6, 22, 51, 7, 856186)
         else:
             start_of_history = datetime.datetime.utcnow() - datetime.timedelta(days=max_days_of_history)
 
-        start_of_history_str = start_of_history.strftime(current_app.config["DYN_DB_ACTIVITY_DATE_FORMAT"])
-
         log.info(
             f"Retrieving {max_days_of_history} days of history "
             f"({start_of_history.strftime('%Y-%m-%d %H:%M:%S')} "
             f"to {datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}) for task {self.id}. "
         )
 
-        if getenv("MOCK_AWS"):
-            activity = MockActivity()
-            return activity.data
-
-        task_activity_table = dyn_db.Table(current_app.config["TASK_ACTIVITY_TABLE"])
-
-        activity = task_activity_table.query(
-            Select="ALL_ATTRIBUTES",
-            KeyConditionExpression=Key("id").eq(self.id) & Key("activity_timestamp").gte(start_of_history_str),
-            ScanIndexForward=False,
-        )
-
-        log.info(f"Found {activity.get('Count')} activity items for task id {self.id}")
-
-        activity_log = []
-
-        for item in activity.get("Items"):
-            activity_timestamp = datetime.datetime.strptime(
-                item["activity_timestamp"], current_app.config["DYN_DB_ACTIVITY_DATE_FORMAT"]
-            )
-            activity_timestamp = pytz.utc.localize(activity_timestamp)
-            item["activity_timestamp"] = activity_timestamp.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-            activity_log.append(item)
-
-        return activity_log
+        return query_activity(current_app.config["TASK_ACTIVITY_TABLE"], self.id, start_of_history, limit, cursor)
 
     def delayed_info(self) -> dict:
         """Gets the latest delayed information about a task"""
@@ -273,12 +237,141 @@ class Task(db.Model):
         req_user.log(Operations.DROP, Resources.TASK, resource_id=self.id)
         log.info(f"User {req_user.id} dropped task {self.id} which was assigned to {old_assignee}.")
 
+    @staticmethod
+    def drop_all(assignee: User, req_user: User) -> int:
+        """Drops all of the open tasks assigned to a user, e.g. when they're disabled or deleted. The tasks are
+        released with one UPDATE and the events are coalesced, returns how many tasks were dropped."""
+        from app.Models.Dao import TaskTransitionEvent
+        from app.Models.RBAC import Log
+
+        now = datetime.datetime.utcnow()
+        tasks = Task.__table__
+
+        with session_scope() as session:
+            # lock the rows so that the old statuses returned are the ones that were replaced
+            old = (
+                select(tasks.c.id, tasks.c.status)
+                .where(
+                    tasks.c.org_id == assignee.org_id,
+                    tasks.c.assignee == assignee.id,
+                    tasks.c.status.notin_([TaskStatuses.COMPLETED, TaskStatuses.CANCELLED]),
+                )
+                .with_for_update()
+                .subquery()
+            )
+            dropped = session.execute(
+                tasks.update()
+                .where(tasks.c.id == old.c.id)
+                .values(
+                    assignee=None,
+                    status=TaskStatuses.READY,
+                    status_changed_at=case((old.c.status == TaskStatuses.READY, tasks.c.status_changed_at), else_=now),
+                )
+                .returning(tasks.c.id, tasks.c.title, old.c.status)
+            ).fetchall()
+
+            if len(dropped) == 0:
+                return 0
+
+            transitioned = [(task_id, status) for task_id, _, status in dropped if status != TaskStatuses.READY]
+            delayed = [task_id for task_id, status in transitioned if status == TaskStatuses.DELAYED]
+            if len(delayed) > 0:
+                session.query(DelayedTask).filter(
+                    DelayedTask.task_id.in_(delayed), DelayedTask.expired == None  # noqa
+                ).update(
+                    {
+                        DelayedTask.expired: now,
+                        DelayedTask.delay_for: cast(extract("epoch", now - DelayedTask.delayed_at), db.Integer),
+                    },
+                    synchronize_session=False,
+                )
+            session.add_all(
+                [
+                    TaskTransitionEvent(
+                        task_id=task_id,
+                        transitioned_by=req_user.id,
+                        new_status=TaskStatuses.READY,
+                        old_status=status,
+                    )
+                    for task_id, status in transitioned
+                ]
+            )
+            session.add_all(
+                [
+                    Log(
+                        org_id=req_user.org_id,
+                        user_id=req_user.id,
+                        operation=Operations.DROP,
+                        resource=Resources.TASK,
+                        resource_id=task_id,
+                    )
+                    for task_id, _, _ in dropped
+                ]
+            )
+
+            # any tasks already in the session still have their old values
+            for obj in list(session.identity_map.values()):
+                if isinstance(obj, Task):
+                    session.expire(obj)
+
+        events = []
+        for task_id, title, status in dropped:
+            friendly = f"{assignee.name()} unassigned from task by {req_user.name()}."
+            if status != TaskStatuses.READY:
+                friendly += (
+                    f" Transitioned from {Task.pretty_status_label(status)} to "
+                    f"{Task.pretty_status_label(TaskStatuses.READY)}."
+                )
+            events.append(
+                Event(
+                    org_id=assignee.org_id,
+                    event=Events.task_transitioned_ready if status != TaskStatuses.READY else Events.task_unassigned,
+                    event_id=task_id,
+                    event_friendly=friendly,
+                )
+            )
+        tasks_friendly = dropped[0].title if len(dropped) == 1 else f"{len(dropped)} tasks"
+        events.append(
+            Event(
+                org_id=req_user.org_id,
+                event=Events.user_unassigned_task,
+                event_id=req_user.id,
+                event_friendly=f"Unassigned {assignee.name()} from {tasks_friendly}.",
+            )
+        )
+        events.append(
+            Event(
+                org_id=assignee.org_id,
+                event=Events.user_unassigned_from_task,
+                event_id=assignee.id,
+                event_friendly=f"Unassigned from {tasks_friendly} by {req_user.name()}.",
+            )
+        )
+        Event.publish_all(events)
+
+        dropped_notification = Notification(
+            title="Task dropped" if len(dropped) == 1 else "Tasks dropped",
+            event_name=Events.task_transitioned_ready,
+            msg=f"{tasks_friendly} {'has' if len(dropped) == 1 else 'have'} been dropped by {req_user.name()}.",
+            target_type=TargetTypes.TASK,
+            target_id=dropped[0].id,
+            actions=[NotificationAction(ClickActions.ASSIGN_TO_ME, NotificationIcons.ASSIGN_TO_ME_ICON)],
+            user_ids=get_all_user_ids(req_user.org_id, exclude=[req_user.id, assignee.id]),
+        )
+        dropped_notification.push()
+
+        log.info(f"User {req_user.id} dropped {len(dropped)} tasks which were assigned to {assignee.id}.")
+        return len(dropped)
+
     def assign(self, assignee: int, req_user: User, notify: bool = True) -> None:
         """Common function for assigning a task"""
         # set the task assignee
         with session_scope():
             self.assignee = assignee
 
+        # a flush doesn't refresh a relationship that was already loaded, so make sure it's reloaded
+        db.session.expire(self, ["assigned_user"])
+
         # get the assigned user
         assigned_user = self.assigned_user
 
@@ -370,8 +463,6 @@ class Task(db.Model):
 
     def transition(self, status: str, req_user: User = None) -> None:
         """Common function for transitioning a task"""
-        from app.Models.Dao import TaskTransitionEvent
-
         with session_scope() as session:
             old_status = self.status
 
@@ -379,41 +470,20 @@ class Task(db.Model):
             if status == old_status:
                 return
 
-            # don't transition a task if it's not assigned to anyone - unless it's being cancelled
-            if old_status == TaskStatuses.READY and self.assignee is None and status != TaskStatuses.CANCELLED:
-                raise ValidationError("Cannot move task out of ready because it's not assigned to anyone.")
+            error = self.transition_error(status)
+            if error is not None:
+                raise ValidationError(error)
 
             # remove delayed task if the new status isn't DELAYED
+            delayed_task = None
             if old_status == TaskStatuses.DELAYED and status != TaskStatuses.DELAYED:
                 delayed_task = session.query(DelayedTask).filter_by(task_id=self.id, expired=None).first()
-                delayed_task.expired = datetime.datetime.utcnow()
-                delayed_task.delay_for = (datetime.datetime.utcnow() - delayed_task.delayed_at).seconds
-
-            # assign finished_by and _at if the task is being completed
-            if status in (TaskStatuses.COMPLETED, TaskStatuses.CANCELLED):
-                self.finished_by = req_user.id
-                self.finished_at = datetime.datetime.utcnow()
-
-            # assign started_at if the task is being started for the first time
-            if status == TaskStatuses.IN_PROGRESS and self.started_at is None:
-                self.started_at = datetime.datetime.utcnow()
-
-            # update task status and status_changed_at
-            self.status = status
-            self.status_changed_at = datetime.datetime.utcnow()
-
-            # create the transition event
-            transition_event = TaskTransitionEvent(
-                task_id=self.id,
-                transitioned_by=req_user.id,
-                new_status=status,
-                old_status=old_status,
-            )
-            session.add(transition_event)
+
+            session.add(self.apply_transition(status, req_user, delayed_task))
 
         # get the pretty labels for the old and new status
-        old_status_label = self._pretty_status_label(old_status)
-        new_status_label = self._pretty_status_label(status)
+        old_status_label = self.pretty_status_label(old_status)
+        new_status_label = self.pretty_status_label(status)
 
         Event(
             org_id=self.org_id,
@@ -435,8 +505,54 @@ class Task(db.Model):
         req_user.log(Operations.TRANSITION, Resources.TASK, resource_id=self.id)
         log.info(f"User {req_user.id} transitioned task {self.id} from {old_status} to {status}")
 
+    def transition_error(self, status: str) -> typing.Union[str, None]:
+        """Returns why the task can't be transitioned to the status, or None if it can"""
+        # don't transition a task if it's not assigned to anyone - unless it's being cancelled
+        if self.status == TaskStatuses.READY and self.assignee is None and status != TaskStatuses.CANCELLED:
+            return "Cannot move task out of ready because it's not assigned to anyone."
+        return None
+
+    def apply_transition(self, status: str, req_user: User, delayed_task: DelayedTask = None):
+        """Updates the task to its new status and returns the transition event to store, doesn't validate or
+        publish anything. The delayed task is the task's current delay, if it's being moved out of DELAYED"""
+        from app.Models.Dao import TaskTransitionEvent
+
+        old_status = self.status
+        now = datetime.datetime.utcnow()
+
+        # remove delayed task if the new status isn't DELAYED
+        if delayed_task is not None:
+            delayed_task.expired = now
+            delayed_task.delay_for = (now - delayed_task.delayed_at).seconds
+
+        # assign finished_by and _at if the task is being completed
+        if status in (TaskStatuses.COMPLETED, TaskStatuses.CANCELLED):
+            self.finished_by = req_user.id
+            self.finished_at = now
+
+        # assign started_at if the task is being started for the first time
+        if status == TaskStatuses.IN_PROGRESS and self.started_at is None:
+            self.started_at = now
+
+        # update task status and status_changed_at
+        self.status = status
+        self.status_changed_at = now
+
+        # create the transition event
+        return TaskTransitionEvent(
+            task_id=self.id,
+            transitioned_by=req_user.id,
+            new_status=status,
+            old_status=old_status,
+        )
+
+    @staticmethod
+    def etag(row_version: int) -> str:
+        """The ETag for a version of a task"""
+        return f'"{row_version}"'
+
     @staticmethod
-    def _pretty_status_label(status: str) -> str:
+    def pretty_status_label(status: str) -> str:
         """Converts a task status from IN_PROGRESS to 'In Progress'"""
         if "_" in status:
             words = status.lower().split("_")
@@ -2,27 +2,25 @@ import binascii
 import datetime
 import hashlib
 import os
-import pytz
 import typing
 import uuid
-from os import getenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import boto3
 import structlog
-from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 from flask import current_app
-from sqlalchemy import exists, func
+from sqlalchemy import exists, func, select
+from sqlalchemy.orm import query_expression, with_expression
 
 from app.Extensions.Database import db, session_scope
+from app.Extensions.Encoders import format_datetime
 from app.Extensions.Errors import AuthorizationError
 from app.Models.Dao import ActiveUser
 from app.Models.RBAC import Log, Permission, ServiceAccountLog
 from app.Models.Enums import Roles
-from app.Models.LocalMockData import MockActivity
 
 
-dyn_db = boto3.resource("dynamodb")
 s3 = boto3.client("s3")
 cloudfront = boto3.client("cloudfront")
 log = structlog.getLogger()
@@ -69,6 +67,8 @@ class User(db.Model):
     updated_by = db.Column("updated_by", db.Integer, db.ForeignKey("users.id"))
     password_last_changed = db.Column("password_last_changed", db.DateTime, default=datetime.datetime.utcnow)
     is_service_account = db.Column("is_service_account", db.Boolean, default=False)
+    # the version of the org's reference data, only loaded by with_reference_version()
+    reference_version = query_expression()
 
     orgs = db.relationship("Organisation", backref="users")
     roles = db.relationship("Role", backref="rbac_roles", foreign_keys=[role])
@@ -101,6 +101,16 @@ class User(db.Model):
         self.disabled = disabled
         self.deleted = deleted
 
+    @staticmethod
+    def with_reference_version():
+        """A query option that loads the version of the org's reference data in the same query as the user"""
+        from app.Models.Dao import Organisation
+
+        return with_expression(
+            User.reference_version,
+            select(Organisation.reference_version).where(Organisation.id == User.org_id).scalar_subquery(),
+        )
+
     def can(self, operation: str, resource: str) -> typing.Union[bool, str]:
         """
         Checks if user can perform {operation} on {resource} with their {role}.
@@ -172,23 +182,28 @@ class User(db.Model):
         """
         self.password = _hash_password(password)
 
-    def is_active(self) -> None:
-        """Marks user as active if they are not active already. If they're already active then update them."""
+    def is_active(self, writing: bool = False) -> ActiveUser:
+        """Marks user as active if they are not active already. If they're already active then update them.
+        If the user is making a change then it's recorded so that their reads can be sent to the primary."""
+        now = datetime.datetime.utcnow()
         with session_scope() as session:
-            already_active = session.query(ActiveUser).filter_by(user_id=self.id).first()
-            if already_active is None:
+            active_user = session.query(ActiveUser).filter_by(user_id=self.id).first()
+            if active_user is None:
                 # user is not active, so create
                 active_user = ActiveUser(
                     user_id=self.id,
                     org_id=self.org_id,
                     first_name=self.first_name,
                     last_name=self.last_name,
-                    last_active=datetime.datetime.utcnow(),
+                    last_active=now,
                 )
                 session.add(active_user)
             else:
                 # user is active, so update
-                already_active.last_active = datetime.datetime.utcnow()
+                active_user.last_active = now
+            if writing:
+                active_user.last_write = now
+        return active_user
 
     def is_inactive(self) -> None:
         """Mark user as inactive by deleting their record in the active users table"""
@@ -202,8 +217,7 @@ class User(db.Model):
             if qry is None:
                 return None
             else:
-                last_active = pytz.utc.localize(qry.last_active)
-                return last_active.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
+                return format_datetime(qry.last_active)
 
     def clear_failed_logins(self) -> None:
         """Clears a user's failed login attempts"""
@@ -227,11 +241,7 @@ class User(db.Model):
             subscription.decrement_subscription(req_user)
 
         # drop their tasks
-        with session_scope() as session:
-            users_tasks = session.query(Task).filter_by(assignee=self.id).all()
-
-        for task in users_tasks:
-            task.drop(req_user)
+        Task.drop_all(self, req_user)
 
         # delete their avatar
         self.previous_email = self.email
@@ -240,26 +250,12 @@ class User(db.Model):
         self.deleted = datetime.datetime.utcnow()
         self._delete_avatar()
 
-    def as_dict(self) -> dict:
+    def as_dict(self, fields: typing.Container[str] = None) -> dict:
         """
+        :param fields: Only include these fields, which saves looking up the ones that aren't needed
         :return: The dict repr of a User object
         """
-        if self.disabled is None:
-            disabled = None
-        else:
-            disabled = pytz.utc.localize(self.disabled)
-            disabled = disabled.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        if self.deleted is None:
-            deleted = None
-        else:
-            deleted = pytz.utc.localize(self.deleted)
-            deleted = deleted.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-
-        created_at = pytz.utc.localize(self.created_at)
-        updated_at = pytz.utc.localize(self.updated_at)
-
-        return {
+        user_dict = {
             "id": self.id,
             "uuid": self.uuid,
             "org_id": self.org_id,
@@ -268,55 +264,48 @@ class User(db.Model):
             "last_name": self.last_name,
             "role": self.role,
             "role_before_locked": self.role_before_locked,
-            "disabled": disabled,
+            "disabled": format_datetime(self.disabled),
             "job_title": self.job_title,
-            "deleted": deleted,
-            "created_at": created_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"]),
+            "deleted": format_datetime(self.deleted),
+            "created_at": format_datetime(self.created_at),
             "created_by": self.created_by,
-            "updated_at": updated_at.strftime(current_app.config["RESPONSE_DATE_FORMAT"]),
+            "updated_at": format_datetime(self.updated_at),
             "updated_by": self.updated_by,
-            "invite_accepted": self.invite_accepted(),
-            "invite_expires_in": None if self.invite_accepted() else self.invite_expires_in(),
-            "last_active": self.last_active(),
         }
+        if fields is None or "invite_accepted" in fields:
+            user_dict["invite_accepted"] = self.invite_accepted()
+        if fields is None or "invite_expires_in" in fields:
+            user_dict["invite_expires_in"] = None if self.invite_accepted() else self.invite_expires_in()
+        if fields is None or "last_active" in fields:
+            user_dict["last_active"] = self.last_active()
+
+        if fields is None:
+            return user_dict
+        return {field: value for field, value in user_dict.items() if field in fields}
 
     def fat_dict(self) -> dict:
         """Returns a full user dict with all of its FK's joined."""
+        from app.Models import ReferenceData
+
         with session_scope() as session:
             created_by = session.query(User.first_name, User.last_name).filter_by(id=self.created_by).first()
             updated_by = session.query(User.first_name, User.last_name).filter_by(id=self.updated_by).first()
 
         user_dict = self.as_dict()
-        user_dict["role"] = self.roles.as_dict()
+        user_dict["role"] = ReferenceData.role(self.role)
         user_dict["created_by"] = created_by[0] + " " + created_by[1]
         user_dict["updated_by"] = updated_by[0] + " " + updated_by[1] if updated_by is not None else None
 
         return user_dict
 
-    def activity(self) -> list:
-        """Returns the activity of a user"""
-        if getenv("MOCK_AWS"):
-            activity = MockActivity()
-            return activity.data
+    def activity(
+        self, max_days_of_history: int, limit: int, cursor: str = None
+    ) -> typing.Tuple[typing.List[dict], typing.Union[str, None]]:
+        """Returns a page of the activity of a user, and the cursor for the next page"""
+        from app.Models.Activity import query_activity
 
-        user_activity_table = dyn_db.Table(current_app.config["USER_ACTIVITY_TABLE"])
-
-        activity = user_activity_table.query(
-            Select="ALL_ATTRIBUTES", KeyConditionExpression=Key("id").eq(self.id), ScanIndexForward=False
-        )
-        log.info(f"Found {activity.get('Count')} activity items for user id {self.id}")
-
-        activity_log = []
-
-        for item in activity.get("Items"):
-            activity_timestamp = datetime.datetime.strptime(
-                item["activity_timestamp"], current_app.config["DYN_DB_ACTIVITY_DATE_FORMAT"]
-            )
-            activity_timestamp = pytz.utc.localize(activity_timestamp)
-            item["activity_timestamp"] = activity_timestamp.strftime(current_app.config["RESPONSE_DATE_FORMAT"])
-            activity_log.append(item)
-
-        return activity_log
+        start_of_history = datetime.datetime.utcnow() - datetime.timedelta(days=max_days_of_history)
+        return query_activity(current_app.config["USER_ACTIVITY_TABLE"], self.id, start_of_history, limit, cursor)
 
     def name(self) -> str:
         """Returns their full name"""
@@ -351,7 +340,15 @@ class User(db.Model):
         if token is None:
             return
 
-        minutes = int(token.created_at + token.expire_after - datetime.datetime.utcnow().timestamp()) // 60
+        return self.minutes_until(token.created_at + token.expire_after)
+
+    @staticmethod
+    def minutes_until(expires_at: typing.Union[int, None]) -> typing.Union[int, None]:
+        """Return how many minutes until an invite expires at a unix timestamp, or None if it has expired"""
+        if expires_at is None:
+            return
+
+        minutes = int(expires_at - datetime.datetime.utcnow().timestamp()) // 60
         if minutes < 0:
             return
 
@@ -408,6 +405,28 @@ class User(db.Model):
         except ClientError as e:
             log.error(f"Error resetting user avatar - {e}")
 
+    @staticmethod
+    def create_default_avatars(user_uuids: typing.List[str]) -> None:
+        """Copies the default.jpg avatar to each of the user uuids. S3 has no batch copy so the copies are made
+        concurrently."""
+        bucket = current_app.config["ASSETS_BUCKET"]
+
+        def copy(user_uuid: str) -> None:
+            s3.copy_object(
+                Bucket=bucket,
+                CopySource={"Bucket": bucket, "Key": "user/avatar/default.jpg"},
+                Key=f"user/avatar/{user_uuid}.jpg",
+            )
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = [executor.submit(copy, user_uuid) for user_uuid in user_uuids]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except ClientError as e:
+                    log.error(f"Error creating user avatar - {e}")
+        log.info(f"Created {len(user_uuids)} default avatars")
+
     def _delete_avatar(self):
         """Tag avatar for deletion"""
         bucket = current_app.config["ASSETS_BUCKET"]
@@ -1,10 +1,12 @@
 import json
+import typing
 from os import getenv
 
 import boto3
 import structlog
 from flask import current_app
 
+from app.Extensions.Database import after_commit
 from app.Models.Dao import User
 from app.Models.Enums import EmailTemplates
 
@@ -53,7 +55,19 @@ class Email(object):
 
     def send_welcome_new_user(self, first_name: str, link: str, inviter: User):
         """Sends a welcome email to a new user"""
-        dto = {
+        dto = self._welcome_new_user_dto(first_name, link, inviter)
+        log.info(f"Sending welcome email to {self.recipient} from {inviter.email}")
+        self._publish(dto)
+
+    @staticmethod
+    def send_welcome_new_users(invites: typing.List[typing.Tuple[User, str]], inviter: User):
+        """Sends a welcome email to each new user and their invite link, in batches"""
+        dtos = [Email(user.email)._welcome_new_user_dto(user.first_name, link, inviter) for user, link in invites]
+        log.info(f"Sending welcome email to {len(dtos)} users from {inviter.email}")
+        after_commit(Email._send_batch, dtos)
+
+    def _welcome_new_user_dto(self, first_name: str, link: str, inviter: User) -> dict:
+        return {
             "recipient": self.recipient,
             "template": EmailTemplates.WELCOME_NEW_USER,
             "template_data": {
@@ -67,8 +81,6 @@ class Email(object):
                 "website_link": f"https://{self.web_url}",
             },
         }
-        log.info(f"Sending welcome email to {self.recipient} from {inviter.email}")
-        self._publish(dto)
 
     def send_contact_us(self, first_name: str, last_name: str, email: str, lead: str, question: str):
         """Sends a contact us email to Delegator"""
@@ -88,6 +100,11 @@ class Email(object):
 
     @staticmethod
     def _publish(dto: dict) -> None:
+        """Queues the email to be sent once the request has been committed"""
+        after_commit(Email._send, dto)
+
+    @staticmethod
+    def _send(dto: dict) -> None:
         """Publishes an email to SNS"""
         if getenv("MOCK_AWS"):
             log.info(f"WOULD have sent email message {dto}")
@@ -99,3 +116,21 @@ class Email(object):
             email_queue.send_message(MessageBody=json.dumps(dto))
         except Exception as e:
             log.error(e)
+
+    @staticmethod
+    def _send_batch(dtos: typing.List[dict]) -> None:
+        """Publishes emails to SQS, 10 messages per request which is the most SQS allows"""
+        if getenv("MOCK_AWS"):
+            log.info(f"WOULD have sent {len(dtos)} email messages")
+            return None
+
+        email_queue = sqs.Queue(current_app.config["EMAIL_SQS_ENDPOINT"])
+
+        for i in range(0, len(dtos), 10):
+            entries = [{"Id": str(n), "MessageBody": json.dumps(dto)} for n, dto in enumerate(dtos[i : i + 10])]
+            try:
+                r = email_queue.send_messages(Entries=entries)
+                for failed in r.get("Failed", []):
+                    log.error(f"Couldn't queue email {failed['Id']} of batch {i // 10} - {failed.get('Message')}")
+            except Exception as e:
+                log.error(e)
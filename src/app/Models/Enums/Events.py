@@ -43,6 +43,7 @@ class Events(str):
     user_disabled_user = "user_disabled_user"
     user_disabled_tasktemplate = "user_disabled_tasktemplate"
     user_transitioned_task = "user_transitioned_task"
+    user_bulk_updated_tasks = "user_bulk_updated_tasks"
 
     task_transitioned_inprogress = "task_transitioned_inprogress"
     task_transitioned_ready = "task_transitioned_ready"
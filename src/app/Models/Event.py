@@ -1,4 +1,6 @@
 import json
+import typing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
 from os import getenv
@@ -7,6 +9,8 @@ import boto3
 import structlog
 from flask import current_app
 
+from app.Extensions.Database import after_commit
+
 sns = boto3.resource("sns")
 log = structlog.getLogger()
 
@@ -23,14 +27,42 @@ class Event(object):
         self.event_time = datetime.utcnow().strftime(current_app.config["DYN_DB_ACTIVITY_DATE_FORMAT"])
 
     def publish(self) -> None:
+        """Publishes an event to SNS once the request has been committed"""
+        after_commit(self._publish)
+
+    @staticmethod
+    def publish_all(events: typing.List["Event"]) -> None:
+        """Publishes many events to SNS once the request has been committed"""
+        after_commit(Event._publish_all, events)
+
+    @staticmethod
+    def _publish_all(events: typing.List["Event"]) -> None:
+        """Publishes events to SNS concurrently, SNS can only publish one message per request"""
+        if getenv("MOCK_AWS"):
+            log.info(f"WOULD have published {len(events)} messages")
+            return None
+
+        # resources aren't thread safe but their clients are, so the threads publish with the client
+        topic_arn = current_app.config["EVENTS_SNS_TOPIC_ARN"]
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = [executor.submit(event._send, topic_arn) for event in events]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    log.error(f"Couldn't publish event - {e}")
+
+    def _publish(self) -> None:
         """Publishes an event to SNS"""
         if getenv("MOCK_AWS"):
             log.info(f"WOULD have published message {self.as_dict()}")
             return None
 
-        api_events_sns_topic = sns.Topic(current_app.config["EVENTS_SNS_TOPIC_ARN"])
-        api_events_sns_topic.publish(
-            TopicArn=api_events_sns_topic.arn,
+        self._send(current_app.config["EVENTS_SNS_TOPIC_ARN"])
+
+    def _send(self, topic_arn: str) -> None:
+        sns.meta.client.publish(
+            TopicArn=topic_arn,
             Message=json.dumps({"default": json.dumps(self.as_dict())}),
             MessageStructure="json",
             MessageAttributes={
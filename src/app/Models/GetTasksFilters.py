@@ -6,7 +6,7 @@ from marshmallow import Schema, fields, ValidationError
 from sqlalchemy import or_, func
 
 from app.Models.Enums import TaskStatuses
-from app.Models.Dao import Task, TaskLabel
+from app.Models.Dao import Task
 
 log = structlog.getLogger()
 
@@ -55,6 +55,9 @@ class GetTasksFiltersSchema(Schema):
     to_date = fields.Date(format="%Y-%m-%dT%H:%M:%S.%fZ")
 
 
+# schemas don't hold any state between validations, so one is shared rather than built for each request
+get_tasks_filters_schema = GetTasksFiltersSchema()
+
 get_tasks_schema_docs = {
     "assignee": {
         "description": "Filter tasks in response by the assignee's ID. "
@@ -151,7 +154,7 @@ class GetTasksFilters(object):
             f"toDate={td}"
         )
 
-    def filters(self, org_id: int, label1: TaskLabel, label2: TaskLabel, label3: TaskLabel) -> list:
+    def filters(self, org_id: int) -> list:
         """Returns a list of sqlalchemy filters to be added to a query"""
         # filter things
         filters = [Task.org_id == org_id]
@@ -176,10 +179,9 @@ class GetTasksFilters(object):
         if self.status is not None:
             filters.append(Task.status.in_(self.status))
 
-        # filter by labels
-        if self.labels is not None:
-            for label_id in self.labels:
-                filters.append(or_(label1.id == label_id, label2.id == label_id, label3.id == label_id))
+        # filter by labels, the task must have all of them
+        if self.labels:
+            filters.append(Task.labels.contains(self.labels))
 
         # filter from date
         if self.from_date is not None:
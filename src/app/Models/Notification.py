@@ -10,6 +10,8 @@ import requests
 import structlog
 from flask import current_app
 
+from app.Extensions.Database import after_commit
+
 log = structlog.getLogger()
 
 
@@ -37,6 +39,10 @@ class Notification(object):
     user_ids: typing.List[int] = field(default=list)
 
     def push(self) -> None:
+        """Push the notification once the request has been committed"""
+        after_commit(self._push)
+
+    def _push(self) -> None:
         """Publish the message to SNS for pushing to the user"""
         if getenv("MOCK_SERVICES"):
             log.info(f"WOULD have pushed notification {self.as_dict()} to NotificationApi")
@@ -6,7 +6,7 @@ import boto3
 from boto3.dynamodb.conditions import Key
 from flask import current_app
 
-dyn_db = boto3.resource("dynamodb")
+dyn_db = boto3.resource("dynamodb", endpoint_url=getenv("DYNAMODB_ENDPOINT"))
 
 
 @dataclass
@@ -5,6 +5,7 @@ from app.Extensions.Database import db
 
 class Role(db.Model):
     __tablename__ = "rbac_roles"
+    disabled_tooltip = "You lack permissions to access this role"
 
     id = db.Column("id", db.String, primary_key=True)
     rank = db.Column("rank", db.Integer)
@@ -28,5 +29,5 @@ class Role(db.Model):
             "name": self.name,
             "description": self.description,
             "disabled": disabled,
-            "tooltip": "You lack permissions to access this role" if disabled else None,
+            "tooltip": Role.disabled_tooltip if disabled else None,
         }
@@ -0,0 +1,120 @@
+import typing
+
+import structlog
+from sqlalchemy.orm import joinedload
+
+from app.Extensions.Cache import VersionedCache
+from app.Extensions.Database import session_scope
+from app.Models.Dao import Organisation, TaskLabel, TaskPriority, TaskStatus, TaskTemplate, User
+from app.Models.RBAC import Role
+
+log = structlog.getLogger()
+
+
+class ReferenceData(object):
+    """The priorities, statuses, roles, labels and templates, which are read on most requests but rarely change.
+
+    They're cached in each worker as dicts, which are shared so mustn't be changed. Priorities, statuses and roles
+    are seed data which only change with a release. An org's labels and templates are cached against its
+    reference_version, which is loaded with the requesting user and bumped by invalidate() whenever they change,
+    or when the org's settings change since browsers cache those against the same version.
+    """
+
+    cache = VersionedCache(max_size=1000)
+
+    @classmethod
+    def priorities(cls) -> typing.List[dict]:
+        """Returns the task priorities"""
+        priorities = cls.cache.get(("priorities",))
+        if priorities is None:
+            with session_scope() as session:
+                priorities = [priority.as_dict() for priority in session.query(TaskPriority).all()]
+            cls.cache.set(("priorities",), priorities)
+        return priorities
+
+    @classmethod
+    def statuses(cls) -> typing.Dict[str, dict]:
+        """Returns the task statuses by status"""
+        statuses = cls.cache.get(("statuses",))
+        if statuses is None:
+            with session_scope() as session:
+                statuses = {status.status: status.as_dict() for status in session.query(TaskStatus).all()}
+            cls.cache.set(("statuses",), statuses)
+        return statuses
+
+    @classmethod
+    def roles(cls) -> typing.Dict[str, dict]:
+        """Returns the roles by id, in order of rank"""
+        roles = cls.cache.get(("roles",))
+        if roles is None:
+            with session_scope() as session:
+                roles = {role.id: role.as_dict() for role in session.query(Role).order_by(Role.rank, Role.id)}
+            cls.cache.set(("roles",), roles)
+        return roles
+
+    @classmethod
+    def role(cls, role_id: str) -> typing.Union[dict, None]:
+        """Returns a role, or None if it doesn't exist"""
+        return cls.roles().get(role_id)
+
+    @classmethod
+    def labels(cls, req_user: User) -> typing.List[dict]:
+        """Returns the task labels of the user's org"""
+        return cls._org_data("labels", req_user, cls._query_labels)
+
+    @classmethod
+    def templates(cls, req_user: User) -> typing.List[dict]:
+        """Returns the enabled task templates of the user's org, with their escalations"""
+        return cls._org_data("templates", req_user, cls._query_templates)
+
+    @staticmethod
+    def etag(req_user: User) -> str:
+        """The unquoted ETag of the reference data a user sees, which also depends on their role. Priorities, roles
+        and permissions only change with a migration, which should bump every org's reference_version too."""
+        return f"{req_user.org_id}-{req_user.reference_version}-{req_user.role}"
+
+    @staticmethod
+    def invalidate(org_id: int) -> None:
+        """Bumps the version of the org's reference data, so that every worker stops using what it has cached. This
+        is part of the request's transaction, so the change and the new version are committed together."""
+        with session_scope() as session:
+            session.query(Organisation).filter_by(id=org_id).update(
+                {Organisation.reference_version: Organisation.reference_version + 1}, synchronize_session=False
+            )
+        log.info(f"Invalidated the cached reference data for org {org_id}")
+
+    @classmethod
+    def _org_data(cls, name: str, req_user: User, query: typing.Callable) -> typing.List[dict]:
+        """Returns an org's reference data from the cache, or queries and caches it"""
+        version = req_user.reference_version
+        if version is not None:
+            cached = cls.cache.get((name, req_user.org_id, version))
+            if cached is not None:
+                return cached
+
+        with session_scope() as session:
+            # the version is read first so that the data is at least as new as it, even if it's read from a
+            # replica which has only just caught up with the change
+            version = session.query(Organisation.reference_version).filter_by(id=req_user.org_id).scalar()
+            data = query(session, req_user.org_id)
+        cls.cache.set((name, req_user.org_id, version), data)
+        return data
+
+    @staticmethod
+    def _query_labels(session, org_id: int) -> typing.List[dict]:
+        labels = session.query(TaskLabel).filter_by(org_id=org_id).order_by(TaskLabel.id)
+        return [label.as_dict() for label in labels]
+
+    @staticmethod
+    def _query_templates(session, org_id: int) -> typing.List[dict]:
+        templates = (
+            session.query(TaskTemplate)
+            .options(joinedload(TaskTemplate.escalations))
+            .filter_by(org_id=org_id, disabled=None)
+            .order_by(TaskTemplate.id)
+            .all()
+        )
+        return [
+            {**template.as_dict(), "escalations": [escalation.as_dict() for escalation in template.escalations]}
+            for template in templates
+        ]
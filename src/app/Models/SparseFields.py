@@ -0,0 +1,68 @@
+import typing
+
+from flask_restx import Model
+
+from app.Extensions.Encoders import marshal
+from app.Extensions.Errors import ValidationError
+
+
+class SparseFields(object):
+    """The fields query parameter, which limits the fields that are returned for each item in a list response.
+    The id is always returned."""
+
+    always = ["id"]
+
+    def __init__(self, args: dict, allowed: typing.Iterable[str]):
+        """
+        Create the object
+        :param args: A request.args object
+        :param allowed: The fields that can be selected, in the order that they're returned
+        """
+        self.allowed = list(allowed)
+
+        requested = [field.strip() for field in (args.get("fields") or "").split(",") if len(field.strip()) > 0]
+        if len(requested) == 0:
+            self.sparse = False
+            self.fields = self.allowed
+            return
+
+        invalid = [field for field in requested if field not in self.allowed]
+        if len(invalid) > 0:
+            raise ValidationError(
+                f"Can't select {', '.join(invalid)}, fields must be some of {', '.join(self.allowed)}"
+            )
+
+        self.sparse = True
+        self.fields = [field for field in self.allowed if field in requested or field in self.always]
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.fields
+
+    def __repr__(self):
+        """Returns a str repr of the selected fields"""
+        return ",".join(self.fields)
+
+    def marshal(self, data: dict, model: Model, key: str) -> dict:
+        """Marshals a response which has a list of items under key, with the item model pruned to the selected fields
+        :param data: The response
+        :param model: The response model
+        :param key: The key of the list of items in the response
+        :return: The marshalled response
+        """
+        if not self.sparse:
+            return marshal(data, model)
+        mask = ",".join(f"{name}{{{','.join(self.fields)}}}" if name == key else name for name in model)
+        return marshal(data, model, "{" + mask + "}")
+
+    @staticmethod
+    def docs(allowed: typing.Iterable[str]) -> dict:
+        """The swagger docs for the fields query parameter"""
+        return {
+            "fields": {
+                "description": "Only return these fields for each item, as a comma separated list: e.g. id,title. "
+                f"The id is always returned. Can be any of {', '.join(allowed)}",
+                "in": "query",
+                "type": "str",
+                "default": "null",
+            }
+        }
@@ -7,6 +7,7 @@ import requests
 import structlog
 from flask import current_app
 
+from app.Extensions.Database import after_commit
 from app.Extensions.Errors import InternalServerError
 
 log = structlog.getLogger()
@@ -70,20 +71,32 @@ class Subscription(object):
             log.error(f"There was an error getting the subscription quantity for {subscription_id}")
             raise InternalServerError("Something went wrong getting details about your subscription!")
 
-    def increment_subscription(self, req_user):
-        """Increment the subscription quantity"""
+    def increment_subscription(self, req_user, quantity: int = 1):
+        """Increment the subscription quantity once the request has been committed"""
+        after_commit(self._increment_subscription, req_user, quantity)
+
+    def decrement_subscription(self, req_user):
+        """Decrement the subscription quantity once the request has been committed"""
+        after_commit(self._decrement_subscription, req_user)
+
+    def _increment_subscription(self, req_user, quantity: int = 1):
+        """Increment the subscription quantity by the number of users added in the request, with a single call to
+        the subscription API which adds the "quantity" in the body rather than one at a time"""
         try:
             r = requests.put(
                 url=f"{current_app.config['SUBSCRIPTION_API_PUBLIC_URL']}/subscription/{self._subscription_id}/quantity",
                 headers={"Content-Type": "application/json", "Authorization": self.create_service_account_jwt()},
+                json={"quantity": quantity},
                 timeout=10,
             )
             if r.status_code != 204:
-                log.error(f"Couldn't increment subscription quantity for req_user {req_user.id} - {r.content}")
+                log.error(
+                    f"Couldn't increment subscription quantity by {quantity} for req_user {req_user.id} - {r.content}"
+                )
         except requests.exceptions.RequestException as e:
-            log.error(f"Couldn't increment subscription quantity for req_user {req_user.id} - {e}")
+            log.error(f"Couldn't increment subscription quantity by {quantity} for req_user {req_user.id} - {e}")
 
-    def decrement_subscription(self, req_user):
+    def _decrement_subscription(self, req_user):
         """Decrement the subscription quantity"""
         try:
             r = requests.delete(
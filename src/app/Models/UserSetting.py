@@ -1,3 +1,4 @@
+import typing
 from dataclasses import dataclass
 from decimal import Decimal
 from os import getenv
@@ -5,7 +6,7 @@ from os import getenv
 import boto3
 from flask import current_app
 
-dyn_db = boto3.resource("dynamodb")
+dyn_db = boto3.resource("dynamodb", endpoint_url=getenv("DYNAMODB_ENDPOINT"))
 
 
 @dataclass
@@ -24,6 +25,15 @@ class UserSetting:
         # TODO should be changed to update_item
         self._table().put_item(Item=self.as_dict(), ReturnValues="NONE")
 
+    @staticmethod
+    def batch_update(settings: typing.List["UserSetting"]) -> None:
+        """Writes many UserSettings to DynamoDB, the batch writer sends them 25 at a time"""
+        if getenv("MOCK_AWS"):
+            return
+        with UserSetting._table().batch_writer() as batch:
+            for setting in settings:
+                batch.put_item(Item=setting.as_dict())
+
     @staticmethod
     def get():
         """Returns user settings from DynamoDB as a UserSetting object"""
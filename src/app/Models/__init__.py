@@ -1,7 +1,10 @@
 from app.Models.Event import Event
 from app.Models.GetTasksFilters import GetTasksFilters
 from app.Models.GetTasksFilters import GetTasksFiltersSchema
+from app.Models.GetTasksFilters import get_tasks_filters_schema
 from app.Models.GetTasksFilters import get_tasks_schema_docs
+from app.Models.ReferenceData import ReferenceData
+from app.Models.SparseFields import SparseFields
 from app.Models.UserSetting import UserSetting
 from app.Models.Email import Email
 from app.Models.Notification import Notification
@@ -14,10 +17,13 @@ __all__ = [
     Email,
     GetTasksFilters,
     GetTasksFiltersSchema,
+    get_tasks_filters_schema,
     get_tasks_schema_docs,
     Notification,
     NotificationAction,
     OrgSetting,
+    ReferenceData,
+    SparseFields,
     Subscription,
     UserSetting,
 ]
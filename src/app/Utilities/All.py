@@ -1,13 +1,14 @@
+import base64
 import datetime
-import pytz
+import json
 import typing
 
-from flask import current_app
 from sqlalchemy import and_
 
 from app.Extensions.Database import session_scope
+from app.Extensions.Encoders import format_datetime
 from app.Models.Dao import Task
-from app.Extensions.Errors import ResourceNotFoundError
+from app.Extensions.Errors import ResourceNotFoundError, ValidationError
 
 
 def get_task_by_id(task_id: int, org_id: int) -> Task:
@@ -44,12 +45,13 @@ def get_all_user_ids(org_id: int, exclude: list = None) -> typing.List[int]:
     return [user_id[0] for user_id in user_ids_qry]
 
 
-def reindex_display_orders(org_id: int, new_position: int = None):
+def reindex_display_orders(org_id: int, new_position: int = None, exclude_task_id: int = None):
     """Re-index's all task display orders for an organisation. If a position is provided then
     only tasks above it will be re-indexed. This should be called whenever its visual position in the UI is updated
 
     :param org_id: The ID of the org in which to re-index that tasks
     :param new_position: An optional position from which to re-index tasks from
+    :param exclude_task_id: The task being moved, which is left alone so that its version doesn't change under it
     :return: None
     """
     with session_scope() as session:
@@ -59,8 +61,9 @@ def reindex_display_orders(org_id: int, new_position: int = None):
                    UPDATE tasks
                    SET display_order = display_order + 1
                    WHERE org_id = :org_id
+                   AND id IS DISTINCT FROM :exclude_task_id
                 """,
-                {"org_id": org_id},
+                {"org_id": org_id, "exclude_task_id": exclude_task_id},
             )
         else:
             session.execute(
@@ -69,8 +72,9 @@ def reindex_display_orders(org_id: int, new_position: int = None):
                    SET display_order = display_order + 1
                    WHERE org_id = :org_id
                    AND display_order >= :new_position
+                   AND id IS DISTINCT FROM :exclude_task_id
                 """,
-                {"org_id": org_id, "new_position": new_position},
+                {"org_id": org_id, "new_position": new_position, "exclude_task_id": exclude_task_id},
             )
 
 
@@ -80,7 +84,42 @@ def format_date(date: typing.Union[datetime.datetime, None]) -> typing.Union[str
     :param date: The date to format
     :return: The date as a string in the RESPONSE_DATE_FORMAT
     """
-    if date is None:
-        return None
-    else:
-        return pytz.utc.localize(date).strftime(current_app.config["RESPONSE_DATE_FORMAT"])
+    return format_datetime(date)
+
+
+def encode_cursor(position: typing.Any) -> str:
+    """Encodes the position of the last item in a page as an opaque cursor for getting the next page
+
+    :param position: Anything that can be serialised to JSON
+    :return: The cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> typing.Any:
+    """Decodes a cursor made by encode_cursor
+
+    :param cursor: The cursor from the request
+    :return: The position of the last item in the previous page
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValidationError("Invalid cursor")
+
+
+def page_args(args: dict, max_limit: int, default_limit: int) -> typing.Tuple[int, typing.Union[str, None]]:
+    """Gets the limit and cursor for a page from the request's query string
+
+    :param args: The request's query string arguments
+    :param max_limit: The most items that can be asked for in a page
+    :param default_limit: The number of items when the limit isn't given
+    :return: The limit and the cursor, or None for the first page
+    """
+    try:
+        limit = int(args.get("limit", default_limit))
+    except ValueError:
+        raise ValidationError("limit must be an integer")
+    if not 1 <= limit <= max_limit:
+        raise ValidationError(f"limit must be between 1 and {max_limit}")
+    return limit, args.get("cursor")
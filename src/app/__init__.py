@@ -3,18 +3,20 @@ from os import getenv
 
 import sentry_sdk
 import structlog
-from flask import Flask
+from flask import Flask, g
 from flask_cors import CORS
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 from app.Apis import api
 from app.Config.parameter_store import ParameterStore
-from app.Extensions.Database import db
+from app.Extensions.Database import db, UnitOfWork
+from app.Extensions.DatabasePool import engine_options, replica_uri
 from app.Extensions.ErrorHandlers import handle_error
 from app.Extensions.Errors import ValidationError
 from app.Extensions.Errors import AuthenticationError
 from app.Extensions.Errors import AuthorizationError
 from app.Extensions.Errors import InternalServerError
+from app.Extensions.Errors import PreconditionFailedError
 from app.Extensions.Errors import ResourceNotFoundError
 from app.Extensions.Logging import SetupLogging
 
@@ -40,12 +42,33 @@ if app_env not in ["Local", "Docker", "Ci"]:
 
 # db conf
 app.config["SQLALCHEMY_DATABASE_URI"] = app.config["DB_URI"]
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_pre_ping": True}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+if app.config["DB_REPLICA_URI"]:
+    app.config["SQLALCHEMY_BINDS"] = {"replica": replica_uri(app.config)}
 db.init_app(app)
+db.session.configure(expire_on_commit=app.config["DB_EXPIRE_ON_COMMIT"])
+
+
+@app.before_request
+def begin_unit_of_work():
+    if app.config["DB_UNIT_OF_WORK"]:
+        UnitOfWork.begin()
+
+
+@app.after_request
+def end_unit_of_work(response):
+    # error responses are rolled back so that a request either fully applies or not at all
+    UnitOfWork.end(commit=response.status_code < 400)
+    if app.config["DB_STATS_HEADERS"]:
+        response.headers["X-DB-Statements"] = g.get("db_statements", 0)
+        response.headers["X-DB-Commits"] = g.get("db_commits", 0)
+        response.headers["X-DB-Route"] = g.get("db_route", "primary")
+    return response
 
 
 @app.teardown_appcontext
 def shutdown_session(exception=None):
+    UnitOfWork.discard()
     db.session.close()
 
 
@@ -58,5 +81,6 @@ app.register_error_handler(AuthenticationError, handle_error)
 app.register_error_handler(AuthorizationError, handle_error)
 app.register_error_handler(ResourceNotFoundError, handle_error)
 app.register_error_handler(InternalServerError, handle_error)
+app.register_error_handler(PreconditionFailedError, handle_error)
 
 log.info("Finished init")
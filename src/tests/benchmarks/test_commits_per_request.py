@@ -0,0 +1,78 @@
+"""
+Checks that each endpoint commits at most once, since a request is a single unit of work, and reports the number of
+statements that it costs.
+
+Runs against a local API (APP_ENV=Local) which returns the X-DB-Commits and X-DB-Statements headers, e.g.
+pytest -s tests/benchmarks/test_commits_per_request.py
+"""
+import json
+
+import requests
+
+host = "http://localhost:5000"
+auth = ""
+
+
+def _report(name: str, r: requests.Response):
+    assert r.status_code < 400, r.content
+    commits = int(r.headers["X-DB-Commits"])
+    statements = r.headers["X-DB-Statements"]
+    print(f"{name:<40} commits={commits:<4} statements={statements}")
+    assert commits <= 1
+
+
+def test_login():
+    data = {"email": "admin@delegator.com.au", "password": "B4ckburn3r"}
+    r = requests.post(f"{host}/account/", headers={"Content-Type": "application/json"}, data=json.dumps(data))
+    assert r.status_code == 200
+    global auth
+    auth = "Bearer " + r.json()["jwt"]
+
+
+def test_create_task():
+    data = {"title": "Benchmark task", "priority": 0, "description": "Benchmarking", "labels": [1]}
+    r = requests.post(
+        f"{host}/task/", headers={"Content-Type": "application/json", "Authorization": auth}, data=json.dumps(data)
+    )
+    _report("POST /task/", r)
+
+
+def test_update_task():
+    data = {
+        "id": 1,
+        "title": "Benchmark task updated",
+        "priority": 1,
+        "status": "IN_PROGRESS",
+        "assignee": 1,
+        "description": "Benchmarking again",
+        "labels": [],
+    }
+    r = requests.put(
+        f"{host}/task/", headers={"Content-Type": "application/json", "Authorization": auth}, data=json.dumps(data)
+    )
+    _report("PUT /task/", r)
+
+
+def test_transition_task():
+    data = {"task_id": 1, "task_status": "COMPLETED"}
+    r = requests.put(
+        f"{host}/task/transition/",
+        headers={"Content-Type": "application/json", "Authorization": auth},
+        data=json.dumps(data),
+    )
+    _report("PUT /task/transition/", r)
+
+
+def test_get_task():
+    r = requests.get(f"{host}/task/1", headers={"Authorization": auth})
+    _report("GET /task/1", r)
+
+
+def test_get_tasks():
+    r = requests.get(f"{host}/tasks/", headers={"Authorization": auth})
+    _report("GET /tasks/", r)
+
+
+def test_get_users():
+    r = requests.get(f"{host}/users/", headers={"Authorization": auth})
+    _report("GET /users/", r)
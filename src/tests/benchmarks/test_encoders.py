@@ -0,0 +1,103 @@
+"""
+Reports how long it takes to marshal and serialise 10,000 tasks and 5,000 users, with flask-restx's marshal and the
+stdlib json module compared to the compiled encoders and orjson.
+
+Runs in process without a database or API, e.g.
+PYTHONPATH=. pytest -s tests/benchmarks/test_encoders.py
+"""
+import datetime
+import json
+import time
+
+import pytest
+import pytz
+from flask_restx import marshal
+
+from app import app
+from app.Controllers.Authenticated.Task.TasksController import Tasks
+from app.Controllers.Authenticated.User.UsersController import UserController
+from app.Extensions import Encoders
+
+task_count = 10000
+user_count = 5000
+now = datetime.datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app_context():
+    with app.app_context():
+        yield
+
+
+def _task(i: int) -> dict:
+    return {
+        "id": i,
+        "title": f"Benchmark task {i}",
+        "description": "A task to benchmark marshalling with",
+        "status": "READY",
+        "scheduled_for": None,
+        "assignee": {"id": i % 50, "uuid": f"uuid-{i % 50}", "first_name": "Bench", "last_name": "Mark"},
+        "priority": i % 3,
+        "display_order": i,
+        "scheduled_notification_period": None,
+        "scheduled_notification_sent": None,
+        "time_estimate": 3600,
+        "labels": [{"id": 1, "label": "Benchmark", "colour": "#ff0000"}],
+    }
+
+
+def _user(i: int) -> dict:
+    return {
+        "id": i,
+        "uuid": f"uuid-{i}",
+        "org_id": 1,
+        "email": f"user{i}@delegator.com.au",
+        "first_name": "Bench",
+        "last_name": f"Mark {i}",
+        "role": {"id": "USER", "rank": 2, "name": "Team Member", "description": "Works on tasks"},
+        "role_before_locked": None,
+        "disabled": None,
+        "job_title": "Benchmarker",
+        "deleted": None,
+        "created_at": Encoders.format_datetime(now),
+        "created_by": "admin@delegator.com.au",
+        "updated_at": Encoders.format_datetime(now),
+        "updated_by": None,
+        "last_active": None,
+        "invite_accepted": True,
+        "invite_expires_in": None,
+    }
+
+
+def _report(name: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<50} {elapsed * 1000:.0f}ms")
+    return elapsed
+
+
+def _compare(name: str, data: dict, model):
+    # this also warms up both, so that neither pays for collecting the garbage from building the data
+    assert Encoders.marshal(data, model) == marshal(data, model)
+    restx = _report(f"{name} flask-restx marshal", lambda: json.dumps(marshal(data, model)))
+    compiled = _report(f"{name} compiled encoder", lambda: Encoders.dumps(Encoders.marshal(data, model)))
+    print(f"{name:<50} {restx / compiled:.1f}x quicker")
+
+
+def test_format_datetime():
+    dates = [now - datetime.timedelta(minutes=i) for i in range(task_count)]
+    fmt = app.config["RESPONSE_DATE_FORMAT"]
+    expected = [pytz.utc.localize(date).strftime(fmt) for date in dates]
+    assert [Encoders.format_datetime(date) for date in dates] == expected
+    _report("format 10,000 dates with strftime", lambda: [pytz.utc.localize(date).strftime(fmt) for date in dates])
+    _report("format 10,000 dates with format_datetime", lambda: [Encoders.format_datetime(date) for date in dates])
+
+
+def test_tasks():
+    _compare("10,000 tasks", {"tasks": [_task(i) for i in range(task_count)]}, Tasks.response_dto)
+
+
+def test_users():
+    users = {"count": user_count, "users": [_user(i) for i in range(user_count)]}
+    _compare("5,000 users", users, UserController.get_users_response)
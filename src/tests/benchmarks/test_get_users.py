@@ -0,0 +1,67 @@
+"""
+Reports what it costs to get the users of an org with 1,000 users, which used to be two extra queries per user.
+
+Runs against a local API (APP_ENV=Local) which returns the X-DB-Commits and X-DB-Statements headers, e.g.
+pytest -s tests/benchmarks/test_get_users.py
+"""
+import json
+import time
+from random import randint
+
+import requests
+
+host = "http://localhost:5000"
+auth = ""
+user_count = 1000
+
+
+def test_login():
+    data = {"email": "admin@delegator.com.au", "password": "B4ckburn3r"}
+    r = requests.post(f"{host}/account/", headers={"Content-Type": "application/json"}, data=json.dumps(data))
+    assert r.status_code == 200
+    global auth
+    auth = "Bearer " + r.json()["jwt"]
+
+
+def test_import_users():
+    run = randint(0, 100000)
+    for batch in range(0, user_count, 500):
+        data = {
+            "users": [
+                {
+                    "email": f"ryan.flett+users{run}.{i}@delegator.com.au",
+                    "role_id": "USER",
+                    "first_name": "Users",
+                    "last_name": f"Benchmark {i}",
+                }
+                for i in range(batch, batch + 500)
+            ]
+        }
+        r = requests.post(
+            f"{host}/users/import/",
+            headers={"Content-Type": "application/json", "Authorization": auth},
+            data=json.dumps(data),
+        )
+        assert r.status_code == 200, r.content
+
+
+def _report(name: str, path: str):
+    start = time.perf_counter()
+    r = requests.get(f"{host}{path}", headers={"Authorization": auth})
+    elapsed = time.perf_counter() - start
+    assert r.status_code == 200, r.content
+    commits = r.headers["X-DB-Commits"]
+    statements = r.headers["X-DB-Statements"]
+    print(f"{name:<40} {elapsed * 1000:.0f}ms commits={commits:<4} statements={statements}")
+
+
+def test_get_users():
+    _report("GET /users/", "/users/")
+
+
+def test_get_users_page():
+    _report("GET /users/ page of 50", "/users/?page_index=0&page_size=50")
+
+
+def test_get_users_sparse():
+    _report("GET /users/ first_name,last_name", "/users/?fields=first_name,last_name")
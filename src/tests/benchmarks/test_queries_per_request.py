@@ -0,0 +1,82 @@
+"""
+Reports the number of database statements that the endpoints which use the requester's org or a task's assignee
+cost, which used to include a SELECT each time one was used after a commit.
+
+Runs against a local API (APP_ENV=Local) which returns the X-DB-Commits and X-DB-Statements headers. To compare
+against instances being reloaded after every commit, run it once as it is and once with DB_EXPIRE_ON_COMMIT = True
+in flask_conf.py, and again with DB_UNIT_OF_WORK = False to see both together, e.g.
+pytest -s tests/benchmarks/test_queries_per_request.py
+"""
+import json
+
+import requests
+
+host = "http://localhost:5000"
+auth = ""
+task_id = None
+
+
+def _report(name: str, r: requests.Response):
+    assert r.status_code < 400, r.content
+    commits = r.headers["X-DB-Commits"]
+    statements = r.headers["X-DB-Statements"]
+    print(f"{name:<40} commits={commits:<4} statements={statements}")
+
+
+def _post(path: str, data: dict = None) -> requests.Response:
+    return requests.post(
+        f"{host}{path}", headers={"Content-Type": "application/json", "Authorization": auth}, data=json.dumps(data)
+    )
+
+
+def _put(path: str, data: dict) -> requests.Response:
+    return requests.put(
+        f"{host}{path}", headers={"Content-Type": "application/json", "Authorization": auth}, data=json.dumps(data)
+    )
+
+
+def test_login():
+    data = {"email": "admin@delegator.com.au", "password": "B4ckburn3r"}
+    r = requests.post(f"{host}/account/", headers={"Content-Type": "application/json"}, data=json.dumps(data))
+    assert r.status_code == 200
+    global auth
+    auth = "Bearer " + r.json()["jwt"]
+
+
+def test_get_org():
+    r = requests.get(f"{host}/org/", headers={"Authorization": auth})
+    _report("GET /org/", r)
+
+
+def test_get_org_customer_id():
+    r = requests.get(f"{host}/org/customer", headers={"Authorization": auth})
+    _report("GET /org/customer", r)
+
+
+def test_create_task():
+    r = _post("/task/", {"title": "Benchmark task", "priority": 0, "assignee": 1, "labels": [1]})
+    _report("POST /task/", r)
+
+    r = requests.get(f"{host}/tasks/", headers={"Authorization": auth})
+    global task_id
+    task_id = max(task["id"] for task in r.json()["tasks"])
+
+
+def test_assign_task():
+    _report("POST /task/assign/", _post("/task/assign/", {"task_id": task_id, "assignee": 1}))
+
+
+def test_transition_task():
+    _report("PUT /task/transition/", _put("/task/transition/", {"task_id": task_id, "task_status": "IN_PROGRESS"}))
+
+
+def test_delay_task():
+    _report("PUT /task/delay/", _put("/task/delay/", {"task_id": task_id, "delay_for": 1200, "reason": "Benchmark"}))
+
+
+def test_drop_task():
+    _report("POST /task/drop/", _post(f"/task/drop/{task_id}"))
+
+
+def test_cancel_task():
+    _report("POST /task/cancel/", _post(f"/task/cancel/{task_id}"))
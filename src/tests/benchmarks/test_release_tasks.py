@@ -0,0 +1,64 @@
+"""
+Reports what it costs to disable a user who is assigned 1,000 tasks, which drops all of their tasks.
+
+Runs against a local API (APP_ENV=Local) which returns the X-DB-Commits and X-DB-Statements headers, e.g.
+pytest -s tests/benchmarks/test_release_tasks.py
+"""
+import json
+import time
+from random import randint
+
+import requests
+
+host = "http://localhost:5000"
+auth = ""
+user_id = None
+task_count = 1000
+
+
+def test_login():
+    data = {"email": "admin@delegator.com.au", "password": "B4ckburn3r"}
+    r = requests.post(f"{host}/account/", headers={"Content-Type": "application/json"}, data=json.dumps(data))
+    assert r.status_code == 200
+    global auth
+    auth = "Bearer " + r.json()["jwt"]
+
+
+def test_create_user():
+    data = {
+        "users": [
+            {
+                "email": f"ryan.flett+release{randint(0, 100000)}@delegator.com.au",
+                "role_id": "USER",
+                "first_name": "Release",
+                "last_name": "Benchmark",
+            }
+        ]
+    }
+    r = requests.post(
+        f"{host}/users/import/",
+        headers={"Content-Type": "application/json", "Authorization": auth},
+        data=json.dumps(data),
+    )
+    assert r.status_code == 200, r.content
+    global user_id
+    user_id = r.json()["users"][0]["id"]
+
+
+def test_assign_tasks():
+    with requests.Session() as s:
+        s.headers.update({"Content-Type": "application/json", "Authorization": auth})
+        for i in range(task_count):
+            data = {"title": f"Release benchmark {i}", "priority": 0, "description": "Bench", "assignee": user_id}
+            r = s.post(f"{host}/task/", data=json.dumps(data))
+            assert r.status_code == 204, r.content
+
+
+def test_disable_user():
+    start = time.perf_counter()
+    r = requests.post(f"{host}/user/disable/{user_id}", headers={"Authorization": auth})
+    elapsed = time.perf_counter() - start
+    assert r.status_code == 204, r.content
+    commits = r.headers["X-DB-Commits"]
+    statements = r.headers["X-DB-Statements"]
+    print(f"disable user with {task_count} tasks   {elapsed * 1000:.0f}ms commits={commits:<4} statements={statements}")
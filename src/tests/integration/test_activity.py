@@ -0,0 +1,95 @@
+"""
+Pages through task activity in DynamoDB Local, which needs to be running and DYNAMODB_ENDPOINT set, e.g.
+docker run -p 8000:8000 amazon/dynamodb-local
+export DYNAMODB_ENDPOINT=http://localhost:8000 AWS_DEFAULT_REGION=ap-southeast-2
+PYTHONPATH=. pytest tests/integration/test_activity.py
+"""
+import datetime
+import os
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("DYNAMODB_ENDPOINT") or os.getenv("MOCK_AWS"), reason="needs DynamoDB Local and MOCK_AWS unset"
+)
+
+item_count = 120
+
+
+@pytest.fixture(scope="module")
+def table():
+    from app import app
+    from app.Models.Activity import dyn_db
+
+    date_format = app.config["DYN_DB_ACTIVITY_DATE_FORMAT"]
+    table = dyn_db.create_table(
+        TableName=f"task-activity-test-{uuid.uuid4()}",
+        KeySchema=[
+            {"AttributeName": "id", "KeyType": "HASH"},
+            {"AttributeName": "activity_timestamp", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "N"},
+            {"AttributeName": "activity_timestamp", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table.wait_until_exists()
+
+    now = datetime.datetime.utcnow()
+    with table.batch_writer() as batch:
+        for i in range(item_count):
+            batch.put_item(
+                Item={
+                    "id": 1,
+                    "activity_timestamp": (now - datetime.timedelta(hours=i)).strftime(date_format),
+                    "activity": f"activity_{i}",
+                    "event_friendly": f"Event {i}",
+                    "org_id": 1,
+                }
+            )
+        # another task's activity mustn't be in the pages
+        batch.put_item(Item={"id": 2, "activity_timestamp": now.strftime(date_format), "activity": "other"})
+
+    with app.app_context():
+        yield table.name
+    table.delete()
+
+
+def test_pages(table):
+    from app.Models.Activity import query_activity
+
+    start_of_history = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+    pages, cursor = [], None
+    while True:
+        page, cursor = query_activity(table, 1, start_of_history, 50, cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+
+    activity = [item["activity"] for page in pages for item in page]
+    assert activity == [f"activity_{i}" for i in range(item_count)]
+    assert [len(page) for page in pages][:2] == [50, 50]
+    # only the rendered attributes are read
+    assert set(pages[0][0]) == {"activity", "activity_timestamp", "event_friendly"}
+
+
+def test_time_bound(table):
+    from app.Models.Activity import query_activity
+
+    start_of_history = datetime.datetime.utcnow() - datetime.timedelta(hours=10, minutes=30)
+    page, cursor = query_activity(table, 1, start_of_history, 50)
+    assert len(page) == 11
+    assert cursor is None
+
+
+@pytest.mark.parametrize("last_timestamp", [5, "not a timestamp", "20000101T000000.000000Z"])
+def test_invalid_cursor(table, last_timestamp):
+    from app.Extensions.Errors import ValidationError
+    from app.Models.Activity import query_activity
+    from app.Utilities.All import encode_cursor
+
+    start_of_history = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+    with pytest.raises(ValidationError):
+        query_activity(table, 1, start_of_history, 50, encode_cursor(last_timestamp))
@@ -43,11 +43,76 @@ def test_account_signup():
     assert "url" in r.json()
 
 
+def test_login_locks_after_failed_attempts():
+    email = f"ryan.flett+apitest-{uuid.uuid4()}@delegator.com.au"
+    data = {
+        "org_name": str(uuid.uuid4()),
+        "email": email,
+        "password": "Ap1t3stAccount!",
+        "first_name": "Ryan",
+        "last_name": "Flett",
+        "plan_id": "basic",
+    }
+    r = requests.put(
+        "http://localhost:5000/account/",
+        headers={"Content-Type": "application/json"},
+        data=json.dumps(data),
+    )
+    assert r.status_code == 200
+
+    # FAILED_LOGIN_ATTEMPTS_MAX
+    for _ in range(5):
+        r = requests.post(
+            "http://localhost:5000/account/",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({"email": email, "password": "Wr0ngPassword!"}),
+        )
+        assert r.status_code == 400
+        assert r.json()["msg"] == "Email or password incorrect"
+
+    # the right password is refused until the timeout has passed
+    r = requests.post(
+        "http://localhost:5000/account/",
+        headers={"Content-Type": "application/json"},
+        data=json.dumps({"email": email, "password": "Ap1t3stAccount!"}),
+    )
+    assert r.status_code == 400
+    assert r.json()["msg"] == "Too many incorrect password attempts."
+
+
+def test_login_locks_unknown_email():
+    email = f"nobody-{uuid.uuid4()}@delegator.com.au"
+    for _ in range(5):
+        r = requests.post(
+            "http://localhost:5000/account/",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({"email": email, "password": "Wr0ngPassword!"}),
+        )
+        assert r.json()["msg"] == "Email incorrect."
+
+    r = requests.post(
+        "http://localhost:5000/account/",
+        headers={"Content-Type": "application/json"},
+        data=json.dumps({"email": email, "password": "Wr0ngPassword!"}),
+    )
+    assert r.status_code == 400
+    assert r.json()["msg"] == "Too many incorrect attempts."
+
+
 def test_logout():
     r = requests.delete("http://localhost:5000/account/", headers={"Authorization": auth})
     assert r.status_code == 204
 
 
+def test_get_db_pool():
+    r = requests.get("http://localhost:5000/health/db-pool")
+    assert r.status_code == 401
+
+    # only service accounts can see the pools
+    r = requests.get("http://localhost:5000/health/db-pool", headers={"Authorization": auth})
+    assert r.status_code == 403
+
+
 def test_get_active_users():
     r = requests.get("http://localhost:5000/active-users/", headers={"Authorization": auth})
     assert r.status_code == 200
@@ -151,6 +216,26 @@ def test_get_labels():
     assert r.status_code == 200
 
 
+def test_get_labels_if_none_match():
+    r = requests.get("http://localhost:5000/task-labels/", headers={"Authorization": auth})
+    etag = r.headers["ETag"]
+    assert "max-age" in r.headers["Cache-Control"]
+    r = requests.get("http://localhost:5000/task-labels/", headers={"Authorization": auth, "If-None-Match": etag})
+    assert r.status_code == 304
+
+    # changing a label changes the version of the org's reference data
+    data = {"label": "Cached", "colour": "#000000"}
+    r = requests.post(
+        "http://localhost:5000/task-labels/",
+        headers={"Content-Type": "application/json", "Authorization": auth},
+        data=json.dumps(data),
+    )
+    assert r.status_code == 204
+    r = requests.get("http://localhost:5000/task-labels/", headers={"Authorization": auth, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
 # templates
 def test_create_template():
     data = {
@@ -239,6 +324,17 @@ def test_create_task():
     assert r.status_code == 204
 
 
+def test_create_task_missing_label():
+    data = {"title": "Some title", "priority": 1, "template_id": 2, "assignee": 1, "labels": [1, 999999]}
+    r = requests.post(
+        "http://localhost:5000/task/",
+        headers={"Content-Type": "application/json", "Authorization": auth},
+        data=json.dumps(data),
+    )
+    assert r.status_code == 404
+    assert "999999" in r.json()["msg"]
+
+
 def test_update_task():
     data = {
         "id": 1,
@@ -281,6 +377,13 @@ def test_get_task():
     assert r.status_code == 200
 
 
+def test_get_task_reads_own_write():
+    # the task was just updated so the read should go to the primary even if a replica is configured
+    r = requests.get("http://localhost:5000/task/1", headers={"Authorization": auth})
+    assert r.status_code == 200
+    assert r.headers["X-DB-Route"] == "primary"
+
+
 def test_assign_task():
     data = {
         "task_id": 1,
@@ -294,9 +397,74 @@ def test_assign_task():
     assert r.status_code == 204
 
 
+def test_get_task_after_assign():
+    # the cached task is replaced once it changes
+    r = requests.get("http://localhost:5000/task/1", headers={"Authorization": auth})
+    assert r.status_code == 200
+    assert r.json()["assignee"]["id"] == 1
+
+
+def test_update_task_if_match():
+    r = requests.get("http://localhost:5000/task/1", headers={"Authorization": auth})
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+
+    r = requests.get("http://localhost:5000/task/1", headers={"Authorization": auth, "If-None-Match": etag})
+    assert r.status_code == 304
+
+    data = {
+        "id": 1,
+        "title": f"Some title {randint(0, 100000)}",
+        "priority": 0,
+        "status": "READY",
+        "assignee": 1,
+        "labels": [],
+    }
+    r = requests.put(
+        "http://localhost:5000/task/",
+        headers={"Content-Type": "application/json", "Authorization": auth, "If-Match": etag},
+        data=json.dumps(data),
+    )
+    assert r.status_code == 204
+    assert r.headers["ETag"] != etag
+
+    # the task has changed since the etag was read
+    r = requests.post(
+        "http://localhost:5000/task/reposition/",
+        headers={"Content-Type": "application/json", "Authorization": auth, "If-Match": etag},
+        data=json.dumps({"task_id": 1, "display_order": 0}),
+    )
+    assert r.status_code == 412
+
+
+def test_reposition_tasks():
+    before = requests.get("http://localhost:5000/task/1", headers={"Authorization": auth})
+    r = requests.post(
+        "http://localhost:5000/task/reposition/batch",
+        headers={"Content-Type": "application/json", "Authorization": auth},
+        data=json.dumps({"task_ids": [2, 1]}),
+    )
+    assert r.status_code == 204
+
+    # reordering doesn't change a task's version, but the display order is up to date
+    after = requests.get("http://localhost:5000/task/1", headers={"Authorization": auth})
+    task_2 = requests.get("http://localhost:5000/task/2", headers={"Authorization": auth})
+    assert after.headers["ETag"] == before.headers["ETag"]
+    assert after.json()["display_order"] >= task_2.json()["display_order"]
+
+    r = requests.post(
+        "http://localhost:5000/task/reposition/batch",
+        headers={"Content-Type": "application/json", "Authorization": auth},
+        data=json.dumps({"task_ids": [1, 999999]}),
+    )
+    assert r.status_code == 404
+
+
 def test_get_task_activity():
-    r = requests.get("http://localhost:5000/task/activity/1", headers={"Authorization": auth})
+    r = requests.get("http://localhost:5000/task/activity/1?limit=10", headers={"Authorization": auth})
     assert r.status_code == 200
+    assert len(r.json()["activity"]) <= 10
+    assert "next_cursor" in r.json()
 
 
 def test_get_transitions():
@@ -358,12 +526,94 @@ def test_get_tasks():
     assert r.status_code == 200
 
 
+def test_get_tasks_sparse_fields():
+    r = requests.get("http://localhost:5000/tasks/?fields=title,status", headers={"Authorization": auth})
+    assert r.status_code == 200
+    for task in r.json()["tasks"]:
+        assert set(task) == {"id", "title", "status"}
+
+    r = requests.get("http://localhost:5000/tasks/?fields=title,nope", headers={"Authorization": auth})
+    assert r.status_code == 400
+
+
+def test_get_dashboard():
+    r = requests.get("http://localhost:5000/dashboard/", headers={"Authorization": auth})
+    assert r.status_code == 200
+    dashboard = r.json()
+    assert [t["task_id"] for t in dashboard["transitions"]] == [t["id"] for t in dashboard["tasks"]]
+    assert len(dashboard["priorities"]) > 0
+
+
+def test_get_task_facets():
+    r = requests.get("http://localhost:5000/tasks/", headers={"Authorization": auth})
+    task_count = len(r.json()["tasks"])
+
+    r = requests.get("http://localhost:5000/tasks/facets", headers={"Authorization": auth})
+    assert r.status_code == 200
+    facets = r.json()
+    assert facets["total"] == task_count
+    assert sum(facet["count"] for facet in facets["status"]) == task_count
+
+
+def test_search_tasks():
+    r = requests.get("http://localhost:5000/tasks/search?q=description&limit=50", headers={"Authorization": auth})
+    assert r.status_code == 200
+    first_page = [task["id"] for task in r.json()["tasks"]]
+    assert len(first_page) > 0
+
+    # paging one at a time gives the same tasks, without repeating or skipping any that tie on rank
+    ids, params = [], {"q": "description", "limit": 1}
+    while len(ids) < len(first_page):
+        r = requests.get("http://localhost:5000/tasks/search", params=params, headers={"Authorization": auth})
+        assert r.status_code == 200
+        assert len(r.json()["tasks"]) == 1
+        ids += [task["id"] for task in r.json()["tasks"]]
+        params["cursor"] = r.json()["next_cursor"]
+        if params["cursor"] is None:
+            break
+    assert len(set(ids)) == len(ids)
+    assert ids == first_page
+
+
+def test_get_tasks_by_id():
+    r = requests.get("http://localhost:5000/tasks/by-id/?ids=2,1,999999", headers={"Authorization": auth})
+    assert r.status_code == 200
+    assert [task["id"] for task in r.json()["tasks"]] == [2, 1]
+
+
+def test_get_tasks_by_label():
+    r = requests.get("http://localhost:5000/tasks/?labels=1", headers={"Authorization": auth})
+    assert r.status_code == 200
+    for task in r.json()["tasks"]:
+        assert 1 in [label["id"] for label in task["labels"]]
+
+
 # user
 def test_get_user_activity():
     r = requests.get("http://localhost:5000/user/activity/1", headers={"Authorization": auth})
     assert r.status_code == 200
 
 
+def test_bulk_tasks():
+    data = {
+        "operations": [
+            {"task_id": 1, "action": "assign", "assignee": 1},
+            {"task_id": 1, "action": "prioritise", "priority": 2},
+            {"task_id": 1, "action": "label", "labels": [1]},
+            {"task_id": 1, "action": "transition", "status": "IN_PROGRESS"},
+            {"task_id": 999999, "action": "cancel"},
+        ]
+    }
+    r = requests.post(
+        "http://localhost:5000/tasks/bulk/",
+        headers={"Content-Type": "application/json", "Authorization": auth},
+        data=json.dumps(data),
+    )
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [result["success"] for result in results] == [True, True, True, True, False]
+
+
 def test_get_user_pages():
     r = requests.get("http://localhost:5000/user/pages/", headers={"Authorization": auth})
     assert r.status_code == 200
@@ -389,6 +639,37 @@ def test_get_minimal_users():
     assert r.status_code == 200
 
 
+def test_get_users_page():
+    r = requests.get(
+        "http://localhost:5000/users/?page_index=0&page_size=1&role=ORG_ADMIN&disabled=false",
+        headers={"Authorization": auth},
+    )
+    assert r.status_code == 200
+    assert len(r.json()["users"]) == 1
+    assert r.json()["count"] >= 1
+    assert r.json()["users"][0]["role"]["id"] == "ORG_ADMIN"
+
+
+def test_search_users():
+    r = requests.get("http://localhost:5000/users/search?q=adm&limit=5", headers={"Authorization": auth})
+    assert r.status_code == 200
+    users = r.json()["users"]
+    assert 0 < len(users) <= 5
+    assert users[0]["email"].startswith("admin")
+
+
+def test_get_users_sparse_fields():
+    r = requests.get("http://localhost:5000/users/?fields=first_name,role", headers={"Authorization": auth})
+    assert r.status_code == 200
+    for user in r.json()["users"]:
+        assert set(user) == {"id", "first_name", "role"}
+
+    r = requests.get("http://localhost:5000/users/minimal?fields=email", headers={"Authorization": auth})
+    assert r.status_code == 200
+    for user in r.json()["users"]:
+        assert set(user) == {"id", "email"}
+
+
 def test_update_user():
     data = {
         "id": 3,
@@ -436,6 +717,31 @@ def test_create_user():
     assert r.status_code == 204
 
 
+def test_import_users():
+    n = randint(0, 100000)
+    csv_body = (
+        "email,role_id,first_name,last_name,job_title\n"
+        f"ryan.flett+import{n}a@delegator.com.au,USER,Ryan,Flett,\n"
+        f"ryan.flett+import{n}b@delegator.com.au,DELEGATOR,Ryan,Flett,Director\n"
+    )
+    r = requests.post(
+        "http://localhost:5000/users/import/",
+        headers={"Authorization": auth},
+        files={"file": ("users.csv", csv_body, "text/csv")},
+    )
+    assert r.status_code == 200
+    assert len(r.json()["users"]) == 2
+
+    # importing them again fails for both rows and creates no one
+    r = requests.post(
+        "http://localhost:5000/users/import/",
+        headers={"Content-Type": "text/csv", "Authorization": auth},
+        data=csv_body,
+    )
+    assert r.status_code == 400
+    assert [e["row"] for e in r.json()["errors"]] == [1, 2]
+
+
 def test_resend_welcome():
     data = {"user_id": 6}
     r = requests.post(